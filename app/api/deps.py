@@ -0,0 +1,53 @@
+import asyncio
+from typing import AsyncIterator, Callable, Optional
+
+from fastapi import Request
+
+from app.core.config import settings
+from app.ml.deadline import Deadline
+from app.ml.model_manager import ModelManager
+from app.services.jobs import TrainingJobQueue
+
+async def get_model_manager(request: Request) -> ModelManager:
+    """Dependency returning the process-wide model manager created at startup"""
+    return request.app.state.model_manager
+
+async def get_job_queue(request: Request) -> TrainingJobQueue:
+    """Dependency returning the training job queue created at startup"""
+    return request.app.state.job_queue
+
+def get_request_timeout(request: Request, default_ms: int) -> Optional[float]:
+    """Parse the client's timeout header, capped by the route default, in seconds"""
+    timeout_ms = float(default_ms) if default_ms > 0 else None
+    
+    value = request.headers.get(settings.REQUEST_TIMEOUT_HEADER)
+    if value:
+        try:
+            client_ms = max(float(value), 0.0)
+        except ValueError:
+            client_ms = None
+        if client_ms is not None:
+            timeout_ms = client_ms if timeout_ms is None else min(client_ms, timeout_ms)
+    
+    return None if timeout_ms is None else timeout_ms / 1000.0
+
+async def _watch_disconnect(request: Request, deadline: Deadline) -> None:
+    """Cancel the deadline when the client disconnects"""
+    # The body has already been read, so the next message is the disconnect
+    while True:
+        message = await request.receive()
+        if message["type"] == "http.disconnect":
+            deadline.cancel()
+            return
+
+def request_deadline(default_ms: int) -> Callable[[Request], AsyncIterator[Deadline]]:
+    """Build a dependency yielding a per-request Deadline for a route"""
+    async def dependency(request: Request) -> AsyncIterator[Deadline]:
+        deadline = Deadline(get_request_timeout(request, default_ms))
+        watcher = asyncio.create_task(_watch_disconnect(request, deadline))
+        try:
+            yield deadline
+        finally:
+            watcher.cancel()
+    
+    return dependency
@@ -0,0 +1,70 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from pydantic import BaseModel, Field
+from typing import Any, List, Optional
+
+from app.api.deps import get_job_queue, get_model_manager
+from app.core.config import settings
+from app.ml.model_manager import ModelManager
+from app.models.schemas import MODEL_VERSION_PATTERN
+from app.services.jobs import JobQueueFull, TrainingJobQueue
+from app.utils.logger import logger
+
+router = APIRouter()
+
+class FeedbackItem(BaseModel):
+    """Ground truth for one prediction request, one label per feature row"""
+    request_id: str
+    labels: List[Any]
+
+class FeedbackRequest(BaseModel):
+    items: List[FeedbackItem]
+
+class IncrementalUpdateRequest(BaseModel):
+    """Version to update from its new feedback and, optionally, the new version's name"""
+    base_version: str
+    version: Optional[str] = Field(None, regex=MODEL_VERSION_PATTERN, max_length=128)
+
+@router.post("/feedback")
+async def submit_feedback(
+    feedback: FeedbackRequest,
+    model_manager: ModelManager = Depends(get_model_manager)
+):
+    """Join ground-truth labels to logged predictions by request id"""
+    if model_manager.prediction_log is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Prediction logging is disabled"
+        )
+    if len(feedback.items) > settings.FEEDBACK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Feedback exceeds maximum of {settings.FEEDBACK_MAX_ITEMS} items"
+        )
+    try:
+        return await model_manager.prediction_log.record_feedback([item.dict() for item in feedback.items])
+    except Exception as e:
+        logger.error(f"Failed to record feedback: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to record feedback"
+        )
+
+@router.post("/feedback/updates", status_code=status.HTTP_202_ACCEPTED)
+async def submit_incremental_update(
+    update_request: IncrementalUpdateRequest,
+    job_queue: TrainingJobQueue = Depends(get_job_queue)
+):
+    """Queue a partial_fit update of a model version from the feedback it has not seen"""
+    try:
+        job = await job_queue.submit_update(update_request.base_version, update_request.version)
+        return job.to_dict()
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except JobQueueFull as e:
+        raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail=str(e))
+    except Exception as e:
+        logger.error(f"Failed to submit incremental update: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to submit incremental update"
+        )
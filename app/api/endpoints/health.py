@@ -1,8 +1,10 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, status
+from fastapi.responses import JSONResponse
 from datetime import datetime
-import psutil
 import os
 
+from app.api.deps import get_model_manager
+from app.ml.model_manager import ModelManager
 from app.models.schemas import HealthCheck
 from app.core.config import settings
 
@@ -17,9 +19,21 @@ async def health_check():
         version="1.0.0"
     )
 
+@router.get("/ready")
+async def readiness_check(model_manager: ModelManager = Depends(get_model_manager)):
+    """Readiness from the latest saturation sample; 503 while not ready"""
+    readiness = model_manager.saturation.readiness()
+    return JSONResponse(
+        readiness,
+        status_code=status.HTTP_200_OK if readiness["ready"] else status.HTTP_503_SERVICE_UNAVAILABLE
+    )
+
 @router.get("/detailed")
 async def detailed_health_check():
     """Detailed health check with system metrics"""
+    # Only needed here; kept out of the startup import graph
+    import psutil
+    
     return {
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
@@ -1,15 +1,25 @@
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
+from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
 import json
+import re
+from pathlib import Path
 
+from app.api.deps import get_model_manager
+from app.ml.bundle import BUNDLE_SUFFIX, BundleFormatError, read_bundle_metadata
 from app.ml.model_manager import ModelManager
-from app.models.schemas import ModelInfo, ModelUpdateRequest
+from app.models.schemas import MODEL_VERSION_PATTERN, ModelInfo, ModelUpdateRequest
 from app.utils.logger import logger
 
 router = APIRouter()
 
+class ShadowConfigRequest(BaseModel):
+    """Candidate version to mirror traffic to, and the fraction of requests mirrored"""
+    candidate_version: str
+    sample_rate: float = Field(..., gt=0, le=1)
+
 @router.get("/models", response_model=List[ModelInfo])
-async def list_models(model_manager: ModelManager = Depends()):
+async def list_models(model_manager: ModelManager = Depends(get_model_manager)):
     """List all available models with their information"""
     try:
         models = await model_manager.list_models()
@@ -22,7 +32,7 @@ async def list_models(model_manager: ModelManager = Depends()):
         )
 
 @router.get("/models/{version}", response_model=ModelInfo)
-async def get_model_info(version: str, model_manager: ModelManager = Depends()):
+async def get_model_info(version: str, model_manager: ModelManager = Depends(get_model_manager)):
     """Get information about a specific model version"""
     try:
         model_info = await model_manager.get_model_info(version)
@@ -45,25 +55,51 @@ async def get_model_info(version: str, model_manager: ModelManager = Depends()):
 async def update_model(
     version: str,
     model_file: UploadFile = File(...),
-    metadata: str = Form(...),
-    model_manager: ModelManager = Depends()
+    metadata: Optional[str] = Form(None),
+    model_manager: ModelManager = Depends(get_model_manager)
 ):
-    """Update or add a new model version"""
+    """Update or add a new model version
+
+    Model bundles (``.mlb``) carry their own metadata; other formats need the
+    ``metadata`` form field.
+    """
+    # The version names a storage directory
+    if len(version) > 128 or not re.match(MODEL_VERSION_PATTERN, version):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid model version name"
+        )
+    
     try:
-        # Parse metadata
-        try:
-            model_metadata = json.loads(metadata)
-        except json.JSONDecodeError:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid metadata JSON"
-            )
+        # Keep the uploaded format; storage and the loader dispatch on it
+        suffix = Path(model_file.filename or "").suffix.lower()
+        if not model_manager.model_loader.supports_format(suffix):
+            suffix = ".joblib"
+        file_name = f"model{suffix}"
         
         # Read model file
         model_data = await model_file.read()
         
+        if suffix == BUNDLE_SUFFIX:
+            try:
+                model_metadata = read_bundle_metadata(model_data)
+            except (BundleFormatError, KeyError, ValueError):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Invalid model bundle"
+                )
+        else:
+            # Parse metadata
+            try:
+                model_metadata = json.loads(metadata or "")
+            except json.JSONDecodeError:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Invalid metadata JSON"
+                )
+        
         # Update model
-        await model_manager.update_model(version, model_data, model_metadata)
+        await model_manager.update_model(version, model_data, model_metadata, file_name)
         
         return {"message": f"Model version {version} updated successfully"}
         
@@ -76,17 +112,82 @@ async def update_model(
             detail="Failed to update model"
         )
 
+@router.put("/models/{version}/aliases/{alias}", status_code=status.HTTP_200_OK)
+async def set_model_alias(
+    version: str,
+    alias: str,
+    model_manager: ModelManager = Depends(get_model_manager)
+):
+    """Point an alias (e.g. ``production``) at a model version"""
+    try:
+        await model_manager.set_alias(alias, version)
+        return {"message": f"Alias {alias} now points at model version {version}"}
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Model version {version} not found"
+        )
+    except Exception as e:
+        logger.error(f"Failed to set model alias: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to set model alias"
+        )
+
+@router.put("/models/{version}/shadow", status_code=status.HTTP_200_OK)
+async def set_model_shadow(
+    version: str,
+    shadow_request: ShadowConfigRequest,
+    model_manager: ModelManager = Depends(get_model_manager)
+):
+    """Mirror a sampled fraction of a version's /predict traffic to a candidate version"""
+    try:
+        await model_manager.set_shadow(version, shadow_request.candidate_version, shadow_request.sample_rate)
+        return {
+            "message": f"Shadowing {shadow_request.sample_rate:.0%} of model version {version} "
+                       f"traffic to {shadow_request.candidate_version}"
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except Exception as e:
+        logger.error(f"Failed to set model shadow: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to set model shadow"
+        )
+
+@router.delete("/models/{version}/shadow", status_code=status.HTTP_200_OK)
+async def clear_model_shadow(version: str, model_manager: ModelManager = Depends(get_model_manager)):
+    """Stop mirroring a version's traffic"""
+    try:
+        cleared = await model_manager.clear_shadow(version)
+    except Exception as e:
+        logger.error(f"Failed to clear model shadow: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to clear model shadow"
+        )
+    if not cleared:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Model version {version} has no shadow"
+        )
+    return {"message": f"Stopped shadowing model version {version}"}
+
 @router.delete("/models/{version}", status_code=status.HTTP_200_OK)
-async def delete_model(version: str, model_manager: ModelManager = Depends()):
-    """Delete a model version"""
+async def delete_model(version: str, model_manager: ModelManager = Depends(get_model_manager)):
+    """Delete a model version from storage and unload it"""
     try:
-        await model_manager.unload_model(version)
-        # Note: This only unloads from memory. For permanent deletion, 
-        # you'd need to implement storage deletion logic.
-        return {"message": f"Model version {version} unloaded successfully"}
+        deleted = await model_manager.delete_model(version)
     except Exception as e:
         logger.error(f"Failed to delete model: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to delete model"
-        )
\ No newline at end of file
+        )
+    if not deleted:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Model version {version} not found"
+        )
+    return {"message": f"Model version {version} deleted successfully"}
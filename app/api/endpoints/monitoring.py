@@ -1,6 +1,7 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from typing import Dict, List, Any
 
+from app.api.deps import get_model_manager
 from app.ml.model_manager import ModelManager
 from app.ml.monitoring import ModelMonitor
 from app.utils.logger import logger
@@ -8,7 +9,7 @@ from app.utils.logger import logger
 router = APIRouter()
 
 @router.get("/monitoring/models/{version}/stats")
-async def get_model_stats(version: str, model_manager: ModelManager = Depends()):
+async def get_model_stats(version: str, model_manager: ModelManager = Depends(get_model_manager)):
     """Get monitoring statistics for a specific model version"""
     try:
         stats = await model_manager.get_model_stats(version)
@@ -42,18 +43,50 @@ async def check_data_drift(version: str, window_size: int = 100):
             detail="Failed to check data drift"
         )
 
+@router.get("/monitoring/shadow")
+async def get_shadow_stats(model_manager: ModelManager = Depends(get_model_manager)):
+    """Agreement and latency of candidate versions against the traffic they shadow
+
+    Counts are this worker's; model_shadow_* metrics aggregate all workers.
+    """
+    try:
+        return model_manager.shadow.summary()
+    except Exception as e:
+        logger.error(f"Failed to get shadow stats: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail="Failed to get shadow statistics"
+        )
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Whether an If-None-Match header covers the given ETag"""
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate in ("*", etag):
+            return True
+    return False
+
 @router.get("/monitoring/overview")
-async def get_monitoring_overview(model_manager: ModelManager = Depends()):
-    """Get overview of all model monitoring data"""
+async def get_monitoring_overview(request: Request, model_manager: ModelManager = Depends(get_model_manager)):
+    """Get overview of all model monitoring data
+
+    Served from a snapshot rebuilt every MONITORING_OVERVIEW_INTERVAL
+    seconds; polls sending the last ETag get a 304 while it is unchanged.
+    """
     try:
-        models = await model_manager.list_models()
-        overview = {}
+        overview = model_manager.monitor.overview
+        if overview is None:
+            # Only before the background refresh has run once
+            overview = model_manager.refresh_overview()
         
-        for model in models:
-            stats = await model_manager.get_model_stats(model['version'])
-            overview[model['version']] = stats
+        headers = {"ETag": overview.etag, "Cache-Control": "no-cache"}
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and _etag_matches(if_none_match, overview.etag):
+            return Response(status_code=304, headers=headers)
         
-        return overview
+        return Response(overview.body, media_type="application/json", headers=headers)
     except Exception as e:
         logger.error(f"Failed to get monitoring overview: {str(e)}")
         raise HTTPException(
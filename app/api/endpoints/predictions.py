@@ -2,37 +2,86 @@ from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
 from typing import List, Optional, Dict, Any
 import uuid
 
+from app.api.deps import get_model_manager, request_deadline
+from app.api.responses import PredictionJSONResponse, render_prediction, render_prediction_list
 from app.core.config import settings
+from app.ml.admission import AdmissionRejected
+from app.ml.deadline import Deadline, DeadlineExceeded
 from app.ml.model_manager import ModelManager
+from app.ml.timing import StageTimer
 from app.models.schemas import PredictionRequest, PredictionResponse, BatchPredictionRequest
 from app.utils.logger import logger
 
 router = APIRouter()
 
-@router.post("/predict", response_model=PredictionResponse)
+# Non-standard status (nginx) for requests whose client disconnected
+CLIENT_CLOSED_REQUEST = 499
+
+def deadline_error(e: DeadlineExceeded) -> HTTPException:
+    """Map a dropped request to its HTTP error"""
+    if e.reason == "cancelled":
+        return HTTPException(status_code=CLIENT_CLOSED_REQUEST, detail=str(e))
+    return HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail=str(e))
+
+@router.post(
+    "/predict",
+    response_model=PredictionResponse,
+    response_class=PredictionJSONResponse
+)
 async def predict(
     request: PredictionRequest,
     background_tasks: BackgroundTasks,
-    model_manager: ModelManager = Depends()
+    include_metadata: bool = True,
+    model_manager: ModelManager = Depends(get_model_manager),
+    deadline: Deadline = Depends(request_deadline(settings.PREDICT_TIMEOUT_MS))
 ):
     """Make a prediction using the specified model version"""
     try:
+        timer = StageTimer()
         request_id = str(uuid.uuid4())
         
         result = await model_manager.predict(
             version=request.model_version or settings.DEFAULT_MODEL_VERSION,
             features=request.features,
-            request_id=request_id
+            request_id=request_id,
+            timer=timer,
+            native_predictions=True,
+            deadline=deadline
         )
         
-        return PredictionResponse(
-            request_id=request_id,
-            predictions=result["predictions"],
-            model_version=result["model_version"],
-            inference_time=result["inference_time"],
-            metadata=result["metadata"]
+        # The body is encoded directly; response_model only documents it
+        version = result["model_version"]
+        if model_manager.shadow.is_shadowed(version):
+            # Offered once the response has been sent, so mirroring adds no latency
+            background_tasks.add_task(
+                model_manager.shadow.offer,
+                version,
+                request.features,
+                result["predictions"],
+                result["inference_time"]
+            )
+        with timer.stage("serialize", version):
+            body = render_prediction(
+                request_id,
+                result["predictions"],
+                version,
+                result["inference_time"],
+                model_manager.get_encoded_metadata(version) if include_metadata else None
+            )
+        
+        return PredictionJSONResponse(
+            body,
+            headers={"Server-Timing": timer.server_timing()}
         )
         
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    except DeadlineExceeded as e:
+        raise deadline_error(e)
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -45,11 +94,17 @@ async def predict(
             detail="Prediction failed"
         )
 
-@router.post("/predict/batch", response_model=List[PredictionResponse])
+@router.post(
+    "/predict/batch",
+    response_model=List[PredictionResponse],
+    response_class=PredictionJSONResponse
+)
 async def predict_batch(
     request: BatchPredictionRequest,
     background_tasks: BackgroundTasks,
-    model_manager: ModelManager = Depends()
+    include_metadata: bool = True,
+    model_manager: ModelManager = Depends(get_model_manager),
+    deadline: Deadline = Depends(request_deadline(settings.BATCH_PREDICT_TIMEOUT_MS))
 ):
     """Make batch predictions"""
     try:
@@ -59,26 +114,62 @@ async def predict_batch(
                 detail=f"Batch size exceeds maximum of {settings.MAX_PREDICTION_BATCH_SIZE}"
             )
         
+        model_manager.saturation.record_batch(len(request.requests))
+        
+        # One timer for the whole batch: later items accumulate queue time
+        # while earlier items are being predicted
+        timer = StageTimer()
+        versions = [
+            pred_request.model_version or settings.DEFAULT_MODEL_VERSION
+            for pred_request in request.requests
+        ]
         results = []
-        for pred_request in request.requests:
+        for i, pred_request in enumerate(request.requests):
+            # Stop scheduling items once the client is gone or out of time
+            deadline.check_batch(versions[i:], "batch")
             request_id = str(uuid.uuid4())
             
-            result = await model_manager.predict(
-                version=pred_request.model_version or settings.DEFAULT_MODEL_VERSION,
-                features=pred_request.features,
-                request_id=request_id
-            )
+            try:
+                result = await model_manager.predict(
+                    version=versions[i],
+                    features=pred_request.features,
+                    request_id=request_id,
+                    timer=timer,
+                    native_predictions=True,
+                    deadline=deadline
+                )
+            except DeadlineExceeded as e:
+                # The items after this one will not run either
+                deadline.drop(versions[i + 1:], e.reason, "batch")
+                raise
             
-            results.append(PredictionResponse(
-                request_id=request_id,
-                predictions=result["predictions"],
-                model_version=result["model_version"],
-                inference_time=result["inference_time"],
-                metadata=result["metadata"]
-            ))
+            version = result["model_version"]
+            with timer.stage("serialize"):
+                results.append(render_prediction(
+                    request_id,
+                    result["predictions"],
+                    version,
+                    result["inference_time"],
+                    model_manager.get_encoded_metadata(version) if include_metadata else None
+                ))
         
-        return results
+        # A batch can span versions, so serialization only goes in the header
+        with timer.stage("serialize"):
+            body = render_prediction_list(results)
         
+        return PredictionJSONResponse(
+            body,
+            headers={"Server-Timing": timer.server_timing()}
+        )
+        
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    except DeadlineExceeded as e:
+        raise deadline_error(e)
     except Exception as e:
         logger.error(f"Batch prediction failed: {str(e)}")
         raise HTTPException(
@@ -87,7 +178,7 @@ async def predict_batch(
         )
 
 @router.get("/predict/versions")
-async def get_model_versions(model_manager: ModelManager = Depends()):
+async def get_model_versions(model_manager: ModelManager = Depends(get_model_manager)):
     """Get available model versions"""
     try:
         versions = await model_manager.list_models()
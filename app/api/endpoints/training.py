@@ -0,0 +1,75 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Optional
+
+from app.api.deps import get_job_queue
+from app.models.schemas import MODEL_VERSION_PATTERN
+from app.services.jobs import JobNotCancellable, JobNotFound, JobQueueFull, TrainingJobQueue
+from app.utils.logger import logger
+
+router = APIRouter()
+
+class TrainingJobRequest(BaseModel):
+    """Training pipeline options for one job; ``data_path`` is relative to TRAINING_DATA_DIR"""
+    data_path: str
+    target_column: str = "target"
+    version: Optional[str] = Field(None, regex=MODEL_VERSION_PATTERN, max_length=128)
+    param_grid: Optional[Dict[str, List[Any]]] = None
+    search: str = "halving"
+    time_budget: Optional[float] = None
+    feature_dtype: str = "float32"
+    objective: str = "accuracy"
+    latency_slo_ms: Optional[float] = None
+    n_bootstrap: int = 1000
+
+@router.post("/training/jobs", status_code=status.HTTP_202_ACCEPTED)
+async def submit_training_job(
+    job_request: TrainingJobRequest,
+    job_queue: TrainingJobQueue = Depends(get_job_queue)
+):
+    """Queue a training job; it runs in a separate process and registers its model when done"""
+    try:
+        job = job_queue.submit(job_request.dict(exclude_none=True))
+        return job.to_dict()
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except JobQueueFull as e:
+        raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail=str(e))
+    except Exception as e:
+        logger.error(f"Failed to submit training job: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to submit training job"
+        )
+
+@router.get("/training/jobs")
+async def list_training_jobs(job_queue: TrainingJobQueue = Depends(get_job_queue)):
+    """Recent training jobs, newest first"""
+    return [job.to_dict() for job in job_queue.list()]
+
+@router.get("/training/jobs/{job_id}")
+async def get_training_job(job_id: str, job_queue: TrainingJobQueue = Depends(get_job_queue)):
+    """Status and stage progress of a training job"""
+    try:
+        return job_queue.get(job_id).to_dict()
+    except JobNotFound:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Training job {job_id} not found"
+        )
+
+@router.delete("/training/jobs/{job_id}")
+async def cancel_training_job(job_id: str, job_queue: TrainingJobQueue = Depends(get_job_queue)):
+    """Cancel a training job that has not started yet"""
+    try:
+        return job_queue.cancel(job_id).to_dict()
+    except JobNotFound:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Training job {job_id} not found"
+        )
+    except JobNotCancellable:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Training job {job_id} is already running"
+        )
@@ -1,4 +1,4 @@
 # API endpoints package
-from app.api.endpoints import predictions, models, monitoring, health
+from app.api.endpoints import predictions, models, monitoring, health, training, feedback
 
-__all__ = ["predictions", "models", "monitoring", "health"]
\ No newline at end of file
+__all__ = ["predictions", "models", "monitoring", "health", "training", "feedback"]
\ No newline at end of file
@@ -1,55 +1,118 @@
 import time
 import logging
+from typing import Any, Dict, Tuple
 from fastapi import Request, Response
 from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 from prometheus_client import Counter, Histogram
 
+from app.ml.timing import LATENCY_BUCKETS
+
 logger = logging.getLogger(__name__)
 
+# Label values are drawn from these fixed sets so the number of series is
+# bounded by (methods x routes x status classes)
+STATUS_CLASSES = ("1xx", "2xx", "3xx", "4xx", "5xx")
+KNOWN_METHODS = frozenset(["GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"])
+OTHER_METHOD = "OTHER"
+UNMATCHED_ROUTE = "<unmatched>"
+
 # Prometheus metrics
 REQUEST_COUNT = Counter(
     'http_requests_total',
     'Total HTTP Requests',
-    ['method', 'endpoint', 'status_code']
+    ['method', 'route', 'status_class']
 )
 
 REQUEST_LATENCY = Histogram(
     'http_request_latency_seconds',
     'HTTP request latency',
-    ['method', 'endpoint']
+    ['method', 'route'],
+    buckets=LATENCY_BUCKETS
 )
 
-class LoggingMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        # Record start time
-        start_time = time.time()
-        
-        # Process request
-        response = await call_next(request)
-        
-        # Calculate latency
-        latency = time.time() - start_time
-        
-        # Log the request
-        logger.info(
-            f"{request.method} {request.url.path} - "
-            f"Status: {response.status_code} - "
-            f"Latency: {latency:.4f}s"
-        )
-        
-        # Update Prometheus metrics
-        REQUEST_COUNT.labels(
-            method=request.method,
-            endpoint=request.url.path,
-            status_code=response.status_code
-        ).inc()
-        
-        REQUEST_LATENCY.labels(
-            method=request.method,
-            endpoint=request.url.path
-        ).observe(latency)
-        
-        return response
+class MetricsMiddleware:
+    """Pure ASGI middleware recording request count and latency.
+
+    Requests are labelled by route template (``/api/v1/models/{version}``)
+    rather than the raw path. Label children are resolved once per
+    (method, route, status class) and reused, so the per-request cost is a
+    dict lookup plus the counter and histogram updates.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self._route_templates: Dict[Any, str] = {}
+        self._children: Dict[Tuple[str, str, str], Tuple[Any, Any]] = {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self._observe(scope, status_code, time.perf_counter() - start_time)
+
+    def _observe(self, scope: Scope, status_code: int, latency: float) -> None:
+        """Update metrics for a finished request"""
+        method = scope["method"]
+        if method not in KNOWN_METHODS:
+            method = OTHER_METHOD
+        route = self._route_template(scope)
+
+        class_index = status_code // 100 - 1
+        status_class = STATUS_CLASSES[class_index] if 0 <= class_index < 5 else "5xx"
+
+        key = (method, route, status_class)
+        children = self._children.get(key)
+        if children is None:
+            children = (
+                REQUEST_COUNT.labels(method, route, status_class),
+                REQUEST_LATENCY.labels(method, route),
+            )
+            self._children[key] = children
+
+        children[0].inc()
+        children[1].observe(latency)
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "%s %s - Status: %d - Latency: %.4fs",
+                method, scope["path"], status_code, latency
+            )
+
+    def _route_template(self, scope: Scope) -> str:
+        """Resolve the route template the router matched for this request"""
+        route = scope.get("route")
+        if route is not None:
+            return route.path
+
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return UNMATCHED_ROUTE
+
+        template = self._route_templates.get(endpoint)
+        if template is None:
+            template = UNMATCHED_ROUTE
+            app = scope.get("app")
+            for candidate in getattr(app, "routes", ()):
+                if getattr(candidate, "endpoint", None) is endpoint or \
+                        getattr(candidate, "app", None) is endpoint:
+                    template = candidate.path
+                    break
+            self._route_templates[endpoint] = template
+        return template
 
 class AuthenticationMiddleware(BaseHTTPMiddleware):
     async def dispatch(self, request: Request, call_next):
@@ -0,0 +1,43 @@
+from typing import Any, List, Optional
+
+from fastapi import Response
+
+from app.utils.helpers import fast_json_dumps
+
+class PredictionJSONResponse(Response):
+    """JSON response for the prediction hot path.
+
+    Bytes content is sent as-is; anything else goes through
+    ``fast_json_dumps``, which encodes numpy arrays without converting them
+    to Python lists first.
+    """
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return fast_json_dumps(content)
+
+def render_prediction(
+    request_id: str,
+    predictions: Any,
+    model_version: str,
+    inference_time: float,
+    encoded_metadata: Optional[bytes] = None
+) -> bytes:
+    """Encode a prediction response body, splicing in pre-encoded metadata"""
+    parts = [
+        b'{"request_id":', fast_json_dumps(request_id),
+        b',"predictions":', fast_json_dumps(predictions),
+        b',"model_version":', fast_json_dumps(model_version),
+        b',"inference_time":', fast_json_dumps(inference_time),
+    ]
+    if encoded_metadata is not None:
+        parts.append(b',"metadata":')
+        parts.append(encoded_metadata)
+    parts.append(b'}')
+    return b''.join(parts)
+
+def render_prediction_list(bodies: List[bytes]) -> bytes:
+    """Join encoded prediction bodies into a JSON array"""
+    return b'[' + b','.join(bodies) + b']'
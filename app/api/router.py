@@ -1,9 +1,9 @@
 """
-Main endpoints router configuration.
+Aggregate router over every endpoint module.
 """
 
 from fastapi import APIRouter
-from app.api.endpoints import predictions, models, monitoring, health
+from app.api.endpoints import predictions, models, monitoring, health, training, feedback
 
 # Create main router
 router = APIRouter()
@@ -12,4 +12,6 @@ router = APIRouter()
 router.include_router(predictions.router, prefix="/api/v1", tags=["predictions"])
 router.include_router(models.router, prefix="/api/v1", tags=["models"])
 router.include_router(monitoring.router, prefix="/api/v1", tags=["monitoring"])
+router.include_router(training.router, prefix="/api/v1", tags=["training"])
+router.include_router(feedback.router, prefix="/api/v1", tags=["feedback"])
 router.include_router(health.router, prefix="/health", tags=["health"])
\ No newline at end of file
@@ -1,12 +1,19 @@
+import asyncio
 import logging
+import os
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, Depends
+from fastapi import FastAPI, Depends, Response
 from fastapi.middleware.cors import CORSMiddleware
-from prometheus_fastapi_instrumentator import Instrumentator
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, generate_latest, multiprocess
 
 from app.core.config import settings
-from app.api.endpoints import predictions, models, monitoring, health
+from app.api.endpoints import predictions, models, monitoring, health, training, feedback
+from app.api.middleware import MetricsMiddleware
 from app.ml.model_manager import ModelManager
+from app.ml.prediction_log import PredictionLog
+from app.ml.registry import ModelRegistry
+from app.ml.shared_stats import get_shared_stats
+from app.services.jobs import TrainingJobQueue
 from app.utils.logger import setup_logging
 from app.db.session import AsyncSessionLocal, init_db
 
@@ -22,18 +29,71 @@ async def lifespan(app: FastAPI):
     # Initialize database
     await init_db()
     
-    # Initialize model manager
-    model_manager = ModelManager()
-    await model_manager.load_models()
+    # Initialize model manager, unless a preforking parent (app.prefork)
+    # already loaded the models into pages shared with this worker
+    model_manager = getattr(app.state, "model_manager", None)
+    if model_manager is None:
+        model_manager = ModelManager()
+        await model_manager.load_models()
+        
+        # Store model manager in app state
+        app.state.model_manager = model_manager
     
-    # Store model manager in app state
-    app.state.model_manager = model_manager
+    # Record loaded versions in the shared registry and keep its cache warm
+    registry = ModelRegistry()
+    await model_manager.attach_registry(registry)
+    registry_task = asyncio.create_task(registry.run())
+    
+    # Log predictions by request id so ground-truth feedback can be joined to them
+    prediction_log_task = None
+    if settings.PREDICTION_LOG_ENABLED:
+        model_manager.attach_prediction_log(PredictionLog())
+        prediction_log_task = asyncio.create_task(model_manager.prediction_log.run())
+    
+    # Replay sampled traffic against shadow candidates off the request path
+    shadow_task = asyncio.create_task(model_manager.shadow.run())
+    
+    # Keep saturation and readiness signals fresh for probes and autoscaling
+    saturation_task = asyncio.create_task(model_manager.saturation.run())
+    
+    # Dashboards poll a prebuilt overview instead of computing stats per request
+    overview_task = asyncio.create_task(
+        model_manager.refresh_overview_periodically(settings.MONITORING_OVERVIEW_INTERVAL)
+    )
+    
+    # Training runs in its own process pool and publishes through the model manager
+    app.state.job_queue = TrainingJobQueue(model_manager)
+    
+    # Pick up versions published by other replicas or deploy jobs
+    watch_task = None
+    if settings.MODEL_WATCH_INTERVAL > 0:
+        watch_task = asyncio.create_task(
+            model_manager.watch_models(settings.MODEL_WATCH_INTERVAL)
+        )
     
     logger.info("Startup complete")
     yield
     
     # Shutdown
     logger.info("Shutting down")
+    # The prediction log flushes what is buffered when cancelled
+    for task in (watch_task, registry_task, saturation_task, overview_task, prediction_log_task, shadow_task):
+        if task is None:
+            continue
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+    
+    app.state.job_queue.shutdown()
+    
+    # Hand this worker's stats row to its replacement and drop its live gauges
+    model_manager.inference_executor.shutdown()
+    model_manager.shadow_executor.shutdown()
+    get_shared_stats().close()
+    if settings.PROMETHEUS_MULTIPROC_DIR:
+        multiprocess.mark_process_dead(os.getpid())
     await AsyncSessionLocal.close_all()
 
 app = FastAPI(
@@ -58,10 +118,22 @@ app.add_middleware(
 app.include_router(predictions.router, prefix="/api/v1", tags=["predictions"])
 app.include_router(models.router, prefix="/api/v1", tags=["models"])
 app.include_router(monitoring.router, prefix="/api/v1", tags=["monitoring"])
+app.include_router(training.router, prefix="/api/v1", tags=["training"])
+app.include_router(feedback.router, prefix="/api/v1", tags=["feedback"])
 app.include_router(health.router, prefix="/health", tags=["health"])
 
 # Prometheus metrics
-Instrumentator().instrument(app).expose(app)
+if settings.ENABLE_METRICS:
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        if settings.PROMETHEUS_MULTIPROC_DIR:
+            # Any worker can answer with every worker's samples
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+            return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+        return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
 
 @app.get("/")
 async def root():
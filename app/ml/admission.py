@@ -0,0 +1,157 @@
+import asyncio
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional
+
+from prometheus_client import Counter, Gauge, Histogram
+
+from app.core.config import settings
+from app.ml.deadline import WORK_AVOIDED, DeadlineExceeded
+from app.ml.timing import LATENCY_BUCKETS
+
+QUEUE_DEPTH = Gauge(
+    'model_admission_queue_depth',
+    'Requests waiting for an inference slot',
+    ['model_version'],
+    multiprocess_mode='livesum'
+)
+
+IN_FLIGHT = Gauge(
+    'model_admission_in_flight',
+    'Requests holding an inference slot',
+    ['model_version'],
+    multiprocess_mode='livesum'
+)
+
+REJECTIONS = Counter(
+    'model_admission_rejections_total',
+    'Requests rejected by admission control',
+    ['model_version', 'reason']
+)
+
+QUEUE_WAIT = Histogram(
+    'model_admission_queue_wait_seconds',
+    'Time spent waiting for an inference slot',
+    ['model_version'],
+    buckets=LATENCY_BUCKETS
+)
+
+class AdmissionRejected(Exception):
+    """Raised when a request is shed instead of being queued"""
+
+    def __init__(self, version: str, reason: str, status_code: int, retry_after: float):
+        super().__init__(f"Model version {version} is overloaded ({reason})")
+        self.version = version
+        self.reason = reason
+        self.status_code = status_code
+        # Retry-After is whole seconds; never tell clients to retry immediately
+        self.retry_after = max(1, math.ceil(retry_after))
+
+class VersionQueue:
+    """Bounded in-flight slots and wait queue for one model version"""
+
+    # Weight of the newest sample in the service time moving average
+    SERVICE_TIME_ALPHA = 0.2
+
+    def __init__(self, version: str, max_concurrency: int, max_queue: int):
+        self.version = version
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.waiting = 0
+        self.in_flight = 0
+        self.service_time = 0.0
+
+    def estimated_wait(self) -> float:
+        """Estimate how long a newly arriving request would queue"""
+        if self.in_flight < self.max_concurrency and not self.waiting:
+            return 0.0
+        return (self.waiting + 1) / self.max_concurrency * self.service_time
+
+    def check(self, timeout: Optional[float]) -> None:
+        """Reject the request now if it cannot be served"""
+        if self.waiting >= self.max_queue:
+            REJECTIONS.labels(self.version, 'queue_full').inc()
+            raise AdmissionRejected(self.version, 'queue_full', 429, self.estimated_wait())
+
+        if timeout is not None:
+            estimated_wait = self.estimated_wait()
+            if estimated_wait + self.service_time > timeout:
+                REJECTIONS.labels(self.version, 'deadline').inc()
+                raise AdmissionRejected(self.version, 'deadline', 503, estimated_wait)
+
+    def record_service_time(self, seconds: float) -> None:
+        """Update the moving average of time spent holding a slot"""
+        if self.service_time == 0.0:
+            self.service_time = seconds
+        else:
+            alpha = self.SERVICE_TIME_ALPHA
+            self.service_time += alpha * (seconds - self.service_time)
+
+class AdmissionController:
+    """Per-version admission control in front of model inference.
+
+    Each version gets ``max_concurrency`` in-flight slots and a wait queue of
+    at most ``max_queue`` requests. Requests are rejected up front when the
+    queue is full (429) or when the estimated wait would overrun the
+    client's timeout (503). A request whose timeout runs out while it waits
+    raises DeadlineExceeded (504) instead, since it was admitted, not shed.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: Optional[int] = None,
+        max_queue: Optional[int] = None
+    ):
+        self.max_concurrency = max_concurrency or settings.ADMISSION_MAX_CONCURRENCY
+        self.max_queue = max_queue if max_queue is not None else settings.ADMISSION_MAX_QUEUE
+        self.queues: Dict[str, VersionQueue] = {}
+
+    def get_queue(self, version: str) -> VersionQueue:
+        """Get the queue for a version, creating it on first use"""
+        queue = self.queues.get(version)
+        if queue is None:
+            queue = VersionQueue(version, self.max_concurrency, self.max_queue)
+            self.queues[version] = queue
+        return queue
+
+    def queued(self) -> int:
+        """Requests waiting for a slot, across all versions"""
+        return sum(queue.waiting for queue in self.queues.values())
+
+    @asynccontextmanager
+    async def admit(self, version: str, timeout: Optional[float] = None) -> AsyncIterator[float]:
+        """Hold an inference slot for the enclosed block, yielding the queue wait"""
+        queue = self.get_queue(version)
+        queue.check(timeout)
+
+        start_time = time.perf_counter()
+        if queue.semaphore.locked():
+            queue.waiting += 1
+            QUEUE_DEPTH.labels(version).inc()
+            try:
+                await asyncio.wait_for(queue.semaphore.acquire(), timeout)
+            except asyncio.TimeoutError:
+                REJECTIONS.labels(version, 'expired').inc()
+                WORK_AVOIDED.labels(version, 'expired', 'queue').inc()
+                raise DeadlineExceeded(version, 'expired', 'queue')
+            finally:
+                queue.waiting -= 1
+                QUEUE_DEPTH.labels(version).dec()
+        else:
+            await queue.semaphore.acquire()
+
+        acquired_at = time.perf_counter()
+        queue_wait = acquired_at - start_time
+        QUEUE_WAIT.labels(version).observe(queue_wait)
+
+        queue.in_flight += 1
+        IN_FLIGHT.labels(version).inc()
+        try:
+            yield queue_wait
+        finally:
+            queue.in_flight -= 1
+            IN_FLIGHT.labels(version).dec()
+            queue.semaphore.release()
+            queue.record_service_time(time.perf_counter() - acquired_at)
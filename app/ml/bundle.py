@@ -0,0 +1,222 @@
+import hashlib
+import io
+import json
+import os
+import struct
+import threading
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Optional
+
+import numpy as np
+
+BUNDLE_SUFFIX = ".mlb"
+BUNDLE_MAGIC = b"MLBUNDL1"
+BUNDLE_FORMAT_VERSION = 1
+
+# Sections start on this boundary so array sections can be memory-mapped
+SECTION_ALIGNMENT = 64
+
+_HEADER_LENGTH = struct.Struct("<I")
+
+class BundleFormatError(Exception):
+    """Raised when a file is not a valid model bundle"""
+
+def _pad(length: int) -> int:
+    return -length % SECTION_ALIGNMENT
+
+def _dump_joblib(obj: Any) -> bytes:
+    import joblib
+    buffer = io.BytesIO()
+    joblib.dump(obj, buffer)
+    return buffer.getvalue()
+
+def encode_bundle(
+    model: Any,
+    metadata: Dict[str, Any],
+    preprocessing: Optional[Any] = None,
+    reference_stats: Optional[Dict[str, np.ndarray]] = None
+) -> bytes:
+    """Encode a model version as a single bundle.
+
+    Layout: magic, little-endian u32 header length, JSON header, then the
+    sections, each aligned to ``SECTION_ALIGNMENT`` bytes. The header maps
+    section names to offset, length, encoding and SHA-256, so readers can
+    get at the metadata without touching the model.
+    """
+    payloads = [
+        ("metadata", "json", json.dumps(metadata, default=str).encode(), {}),
+        ("model", "joblib", _dump_joblib(model), {}),
+    ]
+    if preprocessing is not None:
+        payloads.append(("preprocessing", "joblib", _dump_joblib(preprocessing), {}))
+    for name, array in (reference_stats or {}).items():
+        array = np.ascontiguousarray(array)
+        payloads.append((
+            f"reference_stats/{name}",
+            "array",
+            array.tobytes(),
+            {"dtype": array.dtype.str, "shape": list(array.shape)}
+        ))
+
+    # Offsets depend on the header length and the header holds the offsets;
+    # growing offsets only ever grow the header, so this settles quickly
+    data_start = 0
+    while True:
+        sections = {}
+        offset = data_start
+        for name, encoding, data, extra in payloads:
+            sections[name] = {
+                "offset": offset,
+                "length": len(data),
+                "encoding": encoding,
+                "sha256": hashlib.sha256(data).hexdigest(),
+                **extra
+            }
+            offset += len(data) + _pad(len(data))
+        header = json.dumps(
+            {"format_version": BUNDLE_FORMAT_VERSION, "sections": sections}
+        ).encode()
+        prefix_size = len(BUNDLE_MAGIC) + _HEADER_LENGTH.size + len(header)
+        if prefix_size + _pad(prefix_size) == data_start:
+            break
+        data_start = prefix_size + _pad(prefix_size)
+
+    output = io.BytesIO()
+    output.write(BUNDLE_MAGIC)
+    output.write(_HEADER_LENGTH.pack(len(header)))
+    output.write(header)
+    output.write(b"\0" * (data_start - output.tell()))
+    for _, _, data, _ in payloads:
+        output.write(data)
+        output.write(b"\0" * _pad(len(data)))
+    return output.getvalue()
+
+def write_bundle(path: str, *args, **kwargs) -> None:
+    """Encode a bundle (see encode_bundle) and write it atomically to ``path``"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    tmp_path.write_bytes(encode_bundle(*args, **kwargs))
+    os.replace(tmp_path, path)
+
+def _parse_header(prefix: bytes) -> Dict[str, Any]:
+    if len(prefix) < len(BUNDLE_MAGIC) + _HEADER_LENGTH.size or not prefix.startswith(BUNDLE_MAGIC):
+        raise BundleFormatError("Not a model bundle")
+    (header_length,) = _HEADER_LENGTH.unpack_from(prefix, len(BUNDLE_MAGIC))
+    start = len(BUNDLE_MAGIC) + _HEADER_LENGTH.size
+    if len(prefix) < start + header_length:
+        raise BundleFormatError("Truncated bundle header")
+    header = json.loads(prefix[start:start + header_length])
+    if header.get("format_version") != BUNDLE_FORMAT_VERSION:
+        raise BundleFormatError(f"Unsupported bundle version {header.get('format_version')}")
+    return header
+
+def _read_header(f: BinaryIO) -> Dict[str, Any]:
+    prefix = f.read(len(BUNDLE_MAGIC) + _HEADER_LENGTH.size)
+    if len(prefix) < len(BUNDLE_MAGIC) + _HEADER_LENGTH.size:
+        raise BundleFormatError("Not a model bundle")
+    (header_length,) = _HEADER_LENGTH.unpack_from(prefix, len(BUNDLE_MAGIC))
+    return _parse_header(prefix + f.read(header_length))
+
+def read_bundle_metadata(data: bytes) -> Dict[str, Any]:
+    """Metadata section of an encoded bundle held in memory"""
+    section = _parse_header(data)["sections"]["metadata"]
+    return json.loads(data[section["offset"]:section["offset"] + section["length"]])
+
+class ModelBundle:
+    """Read-only view of a bundle file.
+
+    Opening a bundle reads only the header. Metadata is read on first
+    access; the model and preprocessing sections are unpickled only when
+    asked for, and reference statistics are memory-mapped.
+
+    The file stays open until ``close``, and sections are read through it,
+    so a bundle registered from its header can still be loaded after the
+    path is evicted from the artifact cache or replaced.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._file = open(self.path, 'rb')
+        try:
+            self.header = _read_header(self._file)
+        except BaseException:
+            self._file.close()
+            raise
+        self.sections: Dict[str, Dict[str, Any]] = self.header["sections"]
+        self._metadata: Optional[Dict[str, Any]] = None
+        self._read_lock = threading.Lock()
+
+    def close(self) -> None:
+        """Close the bundle file; memory-mapped reference stats stay valid"""
+        self._file.close()
+
+    def __enter__(self) -> "ModelBundle":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __del__(self) -> None:
+        # A replaced bundle may still be materializing elsewhere, so the
+        # model manager lets the last reference close it
+        file = getattr(self, "_file", None)
+        if file is not None:
+            file.close()
+
+    def has_section(self, name: str) -> bool:
+        """Whether the bundle contains a section"""
+        return name in self.sections
+
+    def read_section(self, name: str, verify: bool = True) -> bytes:
+        """Raw bytes of a section, checked against its digest"""
+        section = self.sections[name]
+        # The shared file position is only moved under the lock
+        with self._read_lock:
+            self._file.seek(section["offset"])
+            data = self._file.read(section["length"])
+        if len(data) != section["length"]:
+            raise BundleFormatError(f"Truncated section {name} in {self.path}")
+        if verify and hashlib.sha256(data).hexdigest() != section["sha256"]:
+            raise BundleFormatError(f"Digest mismatch for section {name} in {self.path}")
+        return data
+
+    def metadata(self) -> Dict[str, Any]:
+        """Model metadata"""
+        if self._metadata is None:
+            self._metadata = json.loads(self.read_section("metadata"))
+        return self._metadata
+
+    def load_model(self) -> Any:
+        """Unpickle the model section"""
+        return self._load_joblib("model")
+
+    def load_preprocessing(self) -> Optional[Any]:
+        """Unpickle the fitted preprocessing state, if the bundle has one"""
+        if not self.has_section("preprocessing"):
+            return None
+        return self._load_joblib("preprocessing")
+
+    def reference_stats(self) -> Dict[str, np.ndarray]:
+        """Reference statistics as read-only memory-mapped arrays"""
+        stats = {}
+        prefix = "reference_stats/"
+        for name, section in self.sections.items():
+            if not name.startswith(prefix):
+                continue
+            shape = tuple(section["shape"])
+            if section["length"] == 0:
+                stats[name[len(prefix):]] = np.empty(shape, dtype=np.dtype(section["dtype"]))
+                continue
+            stats[name[len(prefix):]] = np.memmap(
+                self._file,
+                dtype=np.dtype(section["dtype"]),
+                mode='r',
+                offset=section["offset"],
+                shape=shape
+            )
+        return stats
+
+    def _load_joblib(self, name: str) -> Any:
+        import joblib
+        return joblib.load(io.BytesIO(self.read_section(name)))
@@ -0,0 +1,70 @@
+import time
+from typing import Iterable, List, Optional
+
+from prometheus_client import Counter
+
+WORK_AVOIDED = Counter(
+    'model_work_avoided_total',
+    'Predictions dropped before inference because the request expired or was cancelled',
+    ['model_version', 'reason', 'stage']
+)
+
+class DeadlineExceeded(Exception):
+    """Raised when a request's deadline passed or its client went away"""
+
+    def __init__(self, version: str, reason: str, stage: str):
+        super().__init__(f"Request for model version {version} {reason} before {stage}")
+        self.version = version
+        self.reason = reason
+        self.stage = stage
+
+class Deadline:
+    """Monotonic request deadline that can also be cancelled.
+
+    Created per request and passed down to ``ModelManager.predict``, which
+    checks it before each expensive stage so expired or abandoned work never
+    reaches the model.
+    """
+
+    __slots__ = ("expires_at", "cancelled")
+
+    def __init__(self, timeout: Optional[float] = None):
+        self.expires_at = None if timeout is None else time.perf_counter() + timeout
+        self.cancelled = False
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left before the deadline, or None when unbounded"""
+        if self.expires_at is None:
+            return None
+        return self.expires_at - time.perf_counter()
+
+    def cancel(self) -> None:
+        """Mark the request as abandoned by the client"""
+        self.cancelled = True
+
+    def reason(self) -> Optional[str]:
+        """Why work for this request should stop, or None to carry on"""
+        if self.cancelled:
+            return "cancelled"
+        if self.expires_at is not None and time.perf_counter() >= self.expires_at:
+            return "expired"
+        return None
+
+    def check(self, version: str, stage: str) -> None:
+        """Raise DeadlineExceeded if the request should not reach ``stage``"""
+        reason = self.reason()
+        if reason is not None:
+            WORK_AVOIDED.labels(version, reason, stage).inc()
+            raise DeadlineExceeded(version, reason, stage)
+
+    def check_batch(self, versions: List[str], stage: str) -> None:
+        """Like check, counting every remaining batch item as avoided work"""
+        reason = self.reason()
+        if reason is not None:
+            self.drop(versions, reason, stage)
+            raise DeadlineExceeded(versions[0] if versions else "unknown", reason, stage)
+
+    def drop(self, versions: Iterable[str], reason: str, stage: str) -> None:
+        """Count predictions skipped for the given versions"""
+        for version in versions:
+            WORK_AVOIDED.labels(version, reason, stage).inc()
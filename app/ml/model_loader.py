@@ -5,11 +5,13 @@ from typing import Any, List, Optional
 import numpy as np
 from pathlib import Path
 
+from app.ml.bundle import BUNDLE_SUFFIX, ModelBundle
+from app.ml.forest import FOREST_SUFFIX, CompiledForest
 from app.utils.logger import logger
 
 class ModelLoader:
     def __init__(self):
-        self.supported_formats = ['.pkl', '.joblib', '.h5', '.onnx']
+        self.supported_formats = ['.mlb', '.forest', '.pkl', '.joblib', '.h5', '.onnx']
     
     async def load_model(self, model_path: str) -> Any:
         """Load a model from the given path"""
@@ -20,7 +22,13 @@ class ModelLoader:
                 raise FileNotFoundError(f"Model file not found: {model_path}")
             
             # Load based on file format
-            if model_path.suffix == '.pkl':
+            if model_path.suffix == BUNDLE_SUFFIX:
+                with ModelBundle(model_path) as bundle:
+                    return bundle.load_model()
+            elif model_path.suffix == FOREST_SUFFIX:
+                # Node arrays are memory-mapped, so workers share one copy
+                return CompiledForest.load(model_path)
+            elif model_path.suffix == '.pkl':
                 return await self._load_pickle_model(model_path)
             elif model_path.suffix == '.joblib':
                 return await self._load_joblib_model(model_path)
@@ -37,32 +45,44 @@ class ModelLoader:
     
     async def predict(self, model: Any, features: List[Any]) -> List[Any]:
         """Make predictions using the loaded model"""
+        predictions = await self.predict_raw(model, features)
+        return self.to_list(predictions)
+    
+    async def predict_raw(self, model: Any, features: List[Any]) -> Any:
+        """Make predictions and return the model's native output"""
+        return self.predict_native(model, features)
+    
+    def predict_native(self, model: Any, features: List[Any]) -> Any:
+        """Blocking form of predict_raw, for running on an inference thread"""
         try:
-            # Convert to numpy array if needed
+            # Arrays arrive in the model's feature dtype and are used as-is
             if not isinstance(features, np.ndarray):
                 features = np.array(features)
             
             # Handle different model types
             if hasattr(model, 'predict'):
-                predictions = model.predict(features)
+                return model.predict(features)
             elif hasattr(model, 'forward'):
                 # PyTorch model
                 import torch
                 with torch.no_grad():
+                    # Shares memory with float32 input; only other dtypes are copied
                     features_tensor = torch.from_numpy(features).float()
-                    predictions = model(features_tensor).numpy()
+                    return model(features_tensor).numpy()
             else:
                 raise ValueError("Model does not have predict method")
             
-            # Convert predictions to list
-            if hasattr(predictions, 'tolist'):
-                return predictions.tolist()
-            return predictions
-            
         except Exception as e:
             logger.error(f"Prediction failed: {str(e)}")
             raise
     
+    @staticmethod
+    def to_list(predictions: Any) -> List[Any]:
+        """Convert model output to a JSON-friendly list"""
+        if hasattr(predictions, 'tolist'):
+            return predictions.tolist()
+        return predictions
+    
     async def _load_pickle_model(self, model_path: Path) -> Any:
         """Load a pickle model"""
         with open(model_path, 'rb') as f:
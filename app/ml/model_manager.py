@@ -1,27 +1,96 @@
 import asyncio
 import logging
 import json
-from typing import Dict, List, Optional, Any
+import time
+from typing import TYPE_CHECKING, Dict, List, Optional, Any, Set, Tuple
 from datetime import datetime
 import aiofiles
+import numpy as np
 from pathlib import Path
 
 from app.core.config import settings
+from app.ml.admission import AdmissionController
+from app.ml.bundle import BUNDLE_SUFFIX, ModelBundle
+from app.ml.deadline import Deadline, DeadlineExceeded
 from app.ml.model_loader import ModelLoader
 from app.ml.preprocessor import DataPreprocessor
-from app.ml.monitoring import ModelMonitor
+from app.ml.monitoring import ModelMonitor, OverviewSnapshot
+from app.ml.saturation import InferenceExecutor, SaturationMonitor
+from app.ml.shadow import ShadowRunner
+from app.ml.timing import StageTimer
+from app.utils.helpers import fast_json_dumps
 from app.utils.storage import ModelStorage
 from app.utils.logger import logger
 
+if TYPE_CHECKING:
+    # SQLAlchemy is only needed once the API attaches a registry
+    from app.ml.prediction_log import PredictionLog
+    from app.ml.registry import ModelRegistry
+
 class ModelManager:
     def __init__(self):
         self.models: Dict[str, Any] = {}
         self.model_metadata: Dict[str, Dict] = {}
+        self.encoded_metadata: Dict[str, bytes] = {}
+        # Dtype each version's features are converted to once, at the edge
+        self.feature_dtypes: Dict[str, np.dtype] = {}
+        self.loaded_at: Dict[str, datetime] = {}
+        # Artifact digest each loaded version came from, to detect changes
+        self.model_digests: Dict[str, Optional[str]] = {}
+        # Bundled versions are registered from their header and materialized
+        # on first prediction
+        self.bundles: Dict[str, ModelBundle] = {}
+        self.preprocessors: Dict[str, DataPreprocessor] = {}
+        self.reference_stats: Dict[str, Dict[str, Any]] = {}
+        self._materialize_locks: Dict[str, asyncio.Lock] = {}
+        # Versions being loaded or materialized right now
+        self.loading: Set[str] = set()
         self.model_loader = ModelLoader()
         self.preprocessor = DataPreprocessor()
         self.monitor = ModelMonitor()
         self.storage = ModelStorage()
+        self.admission = AdmissionController()
+        self.inference_executor = InferenceExecutor()
+        # Mirrored traffic never takes a thread from live requests
+        self.shadow_executor = InferenceExecutor(settings.SHADOW_INFERENCE_THREADS, thread_name_prefix="shadow")
+        self.saturation = SaturationMonitor(self)
+        # Shared registry, attached once the database is available
+        self.registry: Optional["ModelRegistry"] = None
+        # Predictions logged for feedback joins, attached at startup when enabled
+        self.prediction_log: Optional["PredictionLog"] = None
+        # Replays sampled traffic against candidate versions once started
+        self.shadow = ShadowRunner(self)
         
+    async def attach_registry(self, registry: "ModelRegistry") -> None:
+        """Start recording loads in the shared registry, including those already done"""
+        self.registry = registry
+        for version in list(self.model_metadata):
+            await self._register(version)
+        await registry.refresh(force=True)
+    
+    def attach_prediction_log(self, prediction_log: "PredictionLog") -> None:
+        """Start logging served predictions by request id"""
+        self.prediction_log = prediction_log
+    
+    async def _register(self, version: str) -> None:
+        """Record a loaded version in the registry; failures only cost the record"""
+        if self.registry is None:
+            return
+        try:
+            entry = await self.storage.get_version_entry(version)
+            file_name = self.storage.model_file_name(version, entry)
+            file_info = entry["files"][file_name]
+            await self.registry.record_version(
+                version,
+                self.model_metadata[version],
+                file_name=file_name,
+                artifact_sha256=file_info.get("sha256"),
+                artifact_size=file_info.get("size"),
+                loaded_at=self.loaded_at.get(version)
+            )
+        except Exception as e:
+            logger.error(f"Failed to register model {version}: {str(e)}")
+    
     async def load_models(self) -> None:
         """Load all available models from storage"""
         try:
@@ -39,66 +108,257 @@ class ModelManager:
     
     async def load_model(self, version: str) -> None:
         """Load a specific model version"""
+        self.loading.add(version)
         try:
+            digest = await self.storage.get_version_digest(version)
+            
             # Load model artifact
             model_path = await self.storage.get_model_path(version)
-            model = await self.model_loader.load_model(model_path)
             
-            # Load metadata
-            metadata_path = await self.storage.get_metadata_path(version)
-            metadata = await self.load_metadata(metadata_path)
+            if Path(model_path).suffix == BUNDLE_SUFFIX:
+                # Only the header and metadata are read until the version serves traffic
+                bundle = ModelBundle(model_path)
+                metadata = bundle.metadata()
+                self._discard_model(version)
+                self.bundles[version] = bundle
+            else:
+                model = await self.model_loader.load_model(model_path)
+                
+                # Load metadata
+                metadata_path = await self.storage.get_metadata_path(version)
+                metadata = await self.load_metadata(metadata_path)
+                
+                self._discard_model(version)
+                self.models[version] = model
             
-            # Store model and metadata
-            self.models[version] = model
+            # Store metadata
             self.model_metadata[version] = metadata
+            self.feature_dtypes[version] = np.dtype(metadata.get("feature_dtype", settings.FEATURE_DTYPE))
+            self.encoded_metadata[version] = fast_json_dumps(metadata)
+            self.model_digests[version] = digest
+            self.loaded_at[version] = datetime.now()
+            await self._register(version)
             
             logger.info(f"Loaded model {version} with metadata: {metadata}")
             
         except Exception as e:
             logger.error(f"Failed to load model {version}: {str(e)}")
             raise
+        finally:
+            self.loading.discard(version)
+    
+    async def watch_models(self, interval: float) -> None:
+        """Poll the storage manifest and load versions that appear or change
+
+        Each poll only fetches the manifest's change stamp; the manifest itself
+        is re-read when the stamp moves. The first poll always syncs, covering
+        changes made between load_models and the watch starting. Runs until
+        cancelled.
+        """
+        stamp = object()
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                new_stamp = await self.storage.manifest_stamp()
+                if new_stamp == stamp:
+                    continue
+                stamp = new_stamp
+                await self.sync_models()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Model watch failed: {str(e)}")
+    
+    async def sync_models(self) -> None:
+        """Load every version whose artifact is new or changed in storage, and drop deleted ones"""
+        manifest = await self.storage.get_manifest(refresh=True)
+        for version in sorted(set(self.model_metadata) - set(manifest["versions"])):
+            await self.unload_model(version)
+        for version in sorted(manifest["versions"]):
+            try:
+                digest = await self.storage.get_version_digest(version)
+                if version in self.model_metadata and self.model_digests.get(version) == digest:
+                    continue
+                await self.load_model(version)
+                logger.info(f"Loaded model version {version} from storage change")
+            except Exception as e:
+                logger.error(f"Failed to load model version {version}: {str(e)}")
     
     async def unload_model(self, version: str) -> None:
         """Unload a specific model version"""
-        if version in self.models:
-            del self.models[version]
+        self._discard_model(version)
         if version in self.model_metadata:
             del self.model_metadata[version]
+        self.encoded_metadata.pop(version, None)
+        self.feature_dtypes.pop(version, None)
+        self.model_digests.pop(version, None)
+        self.loaded_at.pop(version, None)
         logger.info(f"Unloaded model version {version}")
     
+    async def delete_model(self, version: str) -> bool:
+        """Delete a version from storage and the registry and unload it; returns whether either had it"""
+        deleted = await self.storage.delete_model(version)
+        await self.unload_model(version)
+        if self.registry is not None:
+            # Otherwise list_models would keep showing it from the registry
+            deleted = await self.registry.remove_version(version) or deleted
+        return deleted
+    
+    def _discard_model(self, version: str) -> None:
+        """Drop a version's model and everything loaded alongside it"""
+        self.models.pop(version, None)
+        self.bundles.pop(version, None)
+        self.preprocessors.pop(version, None)
+        self.reference_stats.pop(version, None)
+    
+    async def materialize_models(self) -> None:
+        """Load every bundled version now instead of on its first prediction"""
+        for version in list(self.bundles):
+            try:
+                await self._materialize(version)
+            except Exception as e:
+                logger.error(f"Failed to materialize model version {version}: {str(e)}")
+
+    async def get_model(self, version: str) -> Any:
+        """Get a version's model object, loading a lazily registered bundle first"""
+        model = self.models.get(version)
+        if model is None:
+            model = await self._materialize(version)
+        return model
+
+    async def _materialize(self, version: str) -> Any:
+        """Load a bundled version's model, preprocessing and reference stats"""
+        lock = self._materialize_locks.setdefault(version, asyncio.Lock())
+        async with lock:
+            # Concurrent first requests wait for a single load
+            model = self.models.get(version)
+            if model is not None:
+                return model
+            
+            bundle = self.bundles.get(version)
+            if bundle is None:
+                raise ValueError(f"Model version {version} not loaded")
+            
+            start_time = time.perf_counter()
+            loop = asyncio.get_running_loop()
+            self.loading.add(version)
+            try:
+                model = await loop.run_in_executor(None, bundle.load_model)
+                preprocessing = await loop.run_in_executor(None, bundle.load_preprocessing)
+            finally:
+                self.loading.discard(version)
+            
+            # The bundle may have been replaced while it was loading
+            if self.bundles.get(version) is not bundle:
+                return model
+            
+            if preprocessing is not None:
+                self.preprocessors[version] = preprocessing
+            self.reference_stats[version] = bundle.reference_stats()
+            self.models[version] = model
+            
+            logger.info(
+                f"Materialized model {version} from bundle in "
+                f"{time.perf_counter() - start_time:.3f}s"
+            )
+            return model
+    
     async def predict(
         self, 
         version: str, 
         features: List[Any], 
-        request_id: Optional[str] = None
+        request_id: Optional[str] = None,
+        timer: Optional[StageTimer] = None,
+        native_predictions: bool = False,
+        deadline: Optional[Deadline] = None
     ) -> Dict:
-        """Make predictions using the specified model version"""
-        if version not in self.models:
+        """Make predictions using the specified model version
+
+        With ``native_predictions`` the model output is returned as-is (e.g. a
+        numpy array) for callers that serialize it directly. ``deadline`` is
+        checked before queueing, preprocessing and inference; expired or
+        cancelled requests raise DeadlineExceeded instead of running.
+        """
+        # Queue time is this item's own, not the whole (batch) request's
+        submitted_at = time.perf_counter()
+        version = self.resolve_version(version)
+        if version not in self.model_metadata:
             raise ValueError(f"Model version {version} not loaded")
         
-        model = self.models[version]
+        if timer is None:
+            timer = StageTimer()
+        if deadline is None:
+            deadline = Deadline()
+        
         metadata = self.model_metadata[version]
         
+        deadline.check(version, "queue")
+        
+        model = self.models.get(version)
+        if model is None:
+            model = await self._materialize(version)
+        
+        # Raises AdmissionRejected without queueing when overloaded
+        async with self.admission.admit(version, deadline.remaining()):
+            # Time spent between this prediction being submitted and reaching the model
+            timer.record_longest("queue", time.perf_counter() - submitted_at, version)
+            return await self._predict_admitted(
+                version, model, metadata, features, request_id, timer,
+                native_predictions, deadline
+            )
+    
+    async def _predict_admitted(
+        self,
+        version: str,
+        model: Any,
+        metadata: Dict,
+        features: List[Any],
+        request_id: Optional[str],
+        timer: StageTimer,
+        native_predictions: bool,
+        deadline: Deadline
+    ) -> Dict:
+        """Run preprocessing, inference and monitoring while holding a slot"""
+        # The client may have gone away while this request was queued
+        deadline.check(version, "preprocess")
+        
         try:
             # Preprocess features
-            processed_features = await self.preprocessor.process(
-                features, 
-                metadata.get("preprocessing", {})
-            )
+            with timer.stage("preprocess", version):
+                preprocessor = self.preprocessors.get(version, self.preprocessor)
+                processed_features = await preprocessor.process(
+                    self.to_feature_array(version, features), 
+                    metadata.get("preprocessing", {})
+                )
+            
+            deadline.check(version, "inference")
             
             # Make prediction
-            start_time = datetime.now()
-            predictions = await self.model_loader.predict(model, processed_features)
-            inference_time = (datetime.now() - start_time).total_seconds()
+            start_time = time.perf_counter()
+            raw_predictions = await self.inference_executor.run(
+                self.model_loader.predict_native, model, processed_features
+            )
+            inference_time = time.perf_counter() - start_time
+            timer.record("inference", inference_time, version)
+            
+            with timer.stage("postprocess", version):
+                if native_predictions:
+                    predictions = raw_predictions
+                else:
+                    predictions = self.model_loader.to_list(raw_predictions)
             
             # Monitor prediction
-            await self.monitor.record_prediction(
-                version=version,
-                features=features,
-                predictions=predictions,
-                inference_time=inference_time,
-                request_id=request_id
-            )
+            with timer.stage("monitor", version):
+                await self.monitor.record_prediction(
+                    version=version,
+                    features=features,
+                    predictions=predictions,
+                    inference_time=inference_time,
+                    request_id=request_id
+                )
+                if self.prediction_log is not None and request_id is not None:
+                    # As the model saw them, so partial_fit gets the same inputs
+                    self.prediction_log.record(request_id, version, processed_features, raw_predictions)
             
             return {
                 "predictions": predictions,
@@ -107,28 +367,125 @@ class ModelManager:
                 "metadata": metadata
             }
             
+        except DeadlineExceeded:
+            # Dropped work is counted by the deadline, not as a model error
+            raise
         except Exception as e:
             logger.error(f"Prediction failed for model {version}: {str(e)}")
             await self.monitor.record_error(version, str(e))
             raise
     
+    def to_feature_array(self, version: str, features: Any) -> np.ndarray:
+        """The single conversion of request features; nothing downstream changes the dtype"""
+        dtype = self.feature_dtypes.get(version) or np.dtype(settings.FEATURE_DTYPE)
+        return np.asarray(features, dtype=dtype)
+    
+    def get_reference_stats(self, version: str) -> Optional[Dict[str, Any]]:
+        """Reference statistics from a materialized bundle, if it has any"""
+        return self.reference_stats.get(version) or None
+    
+    def get_encoded_metadata(self, version: str) -> Optional[bytes]:
+        """Get the JSON-encoded metadata for a model version"""
+        return self.encoded_metadata.get(version)
+    
+    def resolve_version(self, version: str) -> str:
+        """Version an alias points at (from the cached registry), or the version itself"""
+        if self.registry is None:
+            return version
+        return self.registry.resolve(version)
+    
+    async def set_alias(self, alias: str, version: str) -> None:
+        """Point an alias at a registered version"""
+        if self.registry is None:
+            raise RuntimeError("Model registry is not available")
+        await self.registry.set_alias(alias, version)
+    
+    def shadow_config(self, version: str) -> Optional[Dict[str, Any]]:
+        """Candidate mirroring this version's traffic, from the cached registry"""
+        if self.registry is None:
+            return None
+        return self.registry.shadow_for(version)
+    
+    def shadow_configs(self) -> Dict[str, Dict[str, Any]]:
+        if self.registry is None:
+            return {}
+        return self.registry.snapshot.shadows
+    
+    async def set_shadow(self, version: str, candidate_version: str, sample_rate: float) -> None:
+        """Mirror a sampled fraction of a version's traffic to a candidate version"""
+        if self.registry is None:
+            raise RuntimeError("Model registry is not available")
+        await self.registry.set_shadow(
+            self.resolve_version(version), self.resolve_version(candidate_version), sample_rate
+        )
+    
+    async def clear_shadow(self, version: str) -> bool:
+        """Stop mirroring a version's traffic"""
+        if self.registry is None:
+            raise RuntimeError("Model registry is not available")
+        return await self.registry.clear_shadow(self.resolve_version(version))
+    
+    async def predict_shadow(self, version: str, features: List[Any]) -> Tuple[Any, float]:
+        """Predict with a candidate on mirrored traffic; returns native predictions and inference time
+
+        Shadow work takes no admission slot and runs on its own executor, so
+        it never holds a thread live requests are waiting for. It is kept out
+        of the version's monitoring stats and the prediction log, which
+        describe served traffic.
+        """
+        if version not in self.model_metadata:
+            raise ValueError(f"Model version {version} not loaded")
+        model = self.models.get(version)
+        if model is None:
+            model = await self._materialize(version)
+        
+        preprocessor = self.preprocessors.get(version, self.preprocessor)
+        processed_features = await preprocessor.process(
+            self.to_feature_array(version, features),
+            self.model_metadata[version].get("preprocessing", {})
+        )
+        start_time = time.perf_counter()
+        predictions = await self.shadow_executor.run(
+            self.model_loader.predict_native, model, processed_features
+        )
+        return predictions, time.perf_counter() - start_time
+    
     async def get_model_info(self, version: str) -> Optional[Dict]:
         """Get information about a specific model version"""
-        if version not in self.model_metadata:
+        # Served from the registry's in-process snapshot, never the database
+        if self.registry is not None:
+            await self.registry.get_snapshot()
+        version = self.resolve_version(version)
+        entry = self.registry.get(version) if self.registry is not None else None
+        if version not in self.model_metadata and entry is None:
             return None
         
+        entry = entry or {}
+        loaded_at = self.loaded_at.get(version)
+        metadata = self.model_metadata.get(version, entry.get("metadata", {}))
+        selection = metadata.get("training_metrics", {}).get("selection")
         return {
             "version": version,
-            "metadata": self.model_metadata[version],
+            "metadata": metadata,
             "loaded": version in self.models,
-            "loaded_at": datetime.now().isoformat() if version in self.models else None
+            "loaded_at": loaded_at.isoformat() if loaded_at else None,
+            "artifact_sha256": entry.get("artifact_sha256"),
+            "artifact_size": entry.get("artifact_size"),
+            "aliases": self.registry.aliases_for(version) if self.registry is not None else [],
+            "shadow": self.shadow_config(version),
+            # Size and latency measured at training time, and how the version was picked
+            "inference_profile": metadata.get("inference_profile"),
+            "selection_objective": selection["objective"] if selection else None
         }
     
     async def list_models(self) -> List[Dict]:
-        """List all available models"""
-        models_info = []
+        """List all available models, including those only other replicas loaded"""
+        versions = set(self.model_metadata)
+        if self.registry is not None:
+            versions.update((await self.registry.get_snapshot()).versions)
         
-        for version in self.model_metadata.keys():
+        models_info = []
+        for version in sorted(versions):
             info = await self.get_model_info(version)
             if info:
                 models_info.append(info)
@@ -145,11 +502,17 @@ class ModelManager:
             logger.error(f"Failed to load metadata from {metadata_path}: {str(e)}")
             return {}
     
-    async def update_model(self, version: str, model_data: bytes, metadata: Dict) -> None:
+    async def update_model(
+        self,
+        version: str,
+        model_data: bytes,
+        metadata: Dict,
+        file_name: str = "model.joblib"
+    ) -> None:
         """Update or add a new model version"""
         try:
             # Save model and metadata
-            await self.storage.save_model(version, model_data, metadata)
+            await self.storage.save_model(version, model_data, metadata, file_name)
             
             # Load the new model
             await self.load_model(version)
@@ -160,6 +523,16 @@ class ModelManager:
             logger.error(f"Failed to update model {version}: {str(e)}")
             raise
     
+    async def import_model(self, source: ModelStorage, version: str) -> None:
+        """Add a version from another storage, such as a training job's output, with all its files"""
+        try:
+            await self.storage.copy_version(source, version)
+            await self.load_model(version)
+            logger.info(f"Successfully imported model version {version}")
+        except Exception as e:
+            logger.error(f"Failed to import model {version}: {str(e)}")
+            raise
+    
     async def get_model_stats(self, version: str) -> Dict:
         """Get statistics for a model version"""
         stats = await self.monitor.get_model_stats(version)
@@ -167,4 +540,20 @@ class ModelManager:
             "version": version,
             "stats": stats,
             "loaded": version in self.models
-        }
\ No newline at end of file
+        }
+    
+    def refresh_overview(self) -> OverviewSnapshot:
+        """Rebuild the monitoring overview snapshot for every known version"""
+        versions = set(self.model_metadata)
+        if self.registry is not None:
+            versions.update(self.registry.snapshot.versions)
+        return self.monitor.refresh_overview(versions, loaded=self.models)
+    
+    async def refresh_overview_periodically(self, interval: float) -> None:
+        """Keep the monitoring overview snapshot fresh until cancelled"""
+        while True:
+            try:
+                self.refresh_overview()
+            except Exception as e:
+                logger.error(f"Failed to refresh monitoring overview: {str(e)}")
+            await asyncio.sleep(interval)
\ No newline at end of file
@@ -1,43 +1,107 @@
+import hashlib
 import logging
 import time
-from typing import Dict, List, Any, Optional
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Any, NamedTuple, Optional
 from datetime import datetime, timedelta
 import numpy as np
 from prometheus_client import Counter, Histogram, Gauge
 
+from app.ml.shared_stats import THROUGHPUT_WINDOW, get_shared_stats
+from app.ml.timing import LATENCY_BUCKETS
+from app.utils.helpers import fast_json_dumps
 from app.utils.logger import logger
 
+# Records kept per version for drift checks and error reports
+HISTORY_SIZE = 1000
+
+PREDICTION_COUNTER = Counter(
+    'model_predictions_total',
+    'Total predictions made',
+    ['model_version', 'status']
+)
+
+PREDICTION_LATENCY = Histogram(
+    'model_prediction_latency_seconds',
+    'Prediction latency in seconds',
+    ['model_version'],
+    buckets=LATENCY_BUCKETS
+)
+
+PREDICTION_ERRORS = Counter(
+    'model_prediction_errors_total',
+    'Total prediction errors',
+    ['model_version', 'error_type']
+)
+
+MODEL_THROUGHPUT = Gauge(
+    'model_throughput_predictions_per_second',
+    'Predictions per second',
+    ['model_version'],
+    # Each worker reports its own rate; the node's rate is their sum
+    multiprocess_mode='livesum'
+)
+
+class ThroughputWindow:
+    """This worker's predictions per second for one version, updated in O(1) per prediction
+
+    Counts, errors and latency sums are aggregated node-wide in SharedStats.
+    """
+
+    __slots__ = ("bucket_stamps", "bucket_counts")
+
+    def __init__(self):
+        # One-second buckets over the throughput window, reused round-robin
+        self.bucket_stamps = [0] * THROUGHPUT_WINDOW
+        self.bucket_counts = [0] * THROUGHPUT_WINDOW
+
+    def record(self, now: float) -> None:
+        second = int(now)
+        bucket = second % THROUGHPUT_WINDOW
+        if self.bucket_stamps[bucket] != second:
+            self.bucket_stamps[bucket] = second
+            self.bucket_counts[bucket] = 0
+        self.bucket_counts[bucket] += 1
+
+    def throughput(self, now: float) -> float:
+        """Predictions per second over the buckets still inside the window"""
+        second = int(now)
+        recent = [
+            (stamp, count) for stamp, count in zip(self.bucket_stamps, self.bucket_counts)
+            if second - THROUGHPUT_WINDOW < stamp <= second
+        ]
+        if not recent:
+            return 0.0
+        span = second - min(stamp for stamp, _ in recent) + 1
+        return sum(count for _, count in recent) / span
+
+class OverviewSnapshot(NamedTuple):
+    """Pre-encoded monitoring overview, shared by every request until the next refresh"""
+    body: bytes
+    etag: str
+    built_at: float
+
 class ModelMonitor:
     def __init__(self):
-        # Prometheus metrics
-        self.prediction_counter = Counter(
-            'model_predictions_total',
-            'Total predictions made',
-            ['model_version', 'status']
-        )
-        
-        self.prediction_latency = Histogram(
-            'model_prediction_latency_seconds',
-            'Prediction latency in seconds',
-            ['model_version']
-        )
-        
-        self.prediction_errors = Counter(
-            'model_prediction_errors_total',
-            'Total prediction errors',
-            ['model_version', 'error_type']
-        )
-        
-        self.model_throughput = Gauge(
-            'model_throughput_predictions_per_second',
-            'Predictions per second',
-            ['model_version']
-        )
+        # Prometheus metrics are process-wide; a collector can only be
+        # registered once, so every monitor shares them
+        self.prediction_counter = PREDICTION_COUNTER
+        self.prediction_latency = PREDICTION_LATENCY
+        self.prediction_errors = PREDICTION_ERRORS
+        self.model_throughput = MODEL_THROUGHPUT
         
         # In-memory storage for monitoring data
-        self.prediction_history: Dict[str, List] = {}
-        self.error_history: Dict[str, List] = {}
-        self.throughput_data: Dict[str, List] = {}
+        self.prediction_history: Dict[str, Deque] = {}
+        self.error_history: Dict[str, Deque] = {}
+        self.throughput_windows: Dict[str, ThroughputWindow] = {}
+        # Rebuilt by refresh_overview; never mutated once published
+        self.overview: Optional[OverviewSnapshot] = None
+    
+    def _throughput_window(self, version: str) -> ThroughputWindow:
+        window = self.throughput_windows.get(version)
+        if window is None:
+            window = self.throughput_windows[version] = ThroughputWindow()
+        return window
     
     async def record_prediction(
         self,
@@ -52,17 +116,10 @@ class ModelMonitor:
             # Update Prometheus metrics
             self.prediction_counter.labels(version, 'success').inc()
             self.prediction_latency.labels(version).observe(inference_time)
+            get_shared_stats().record_prediction(version, inference_time)
             
-            # Update throughput
-            current_time = time.time()
-            if version not in self.throughput_data:
-                self.throughput_data[version] = []
-            
-            self.throughput_data[version].append(current_time)
-            self._clean_throughput_data(version)
-            
-            throughput = self._calculate_throughput(version)
-            self.model_throughput.labels(version).set(throughput)
+            # Throughput is folded into buckets here and published by refresh_overview
+            self._throughput_window(version).record(time.time())
             
             # Store prediction history
             prediction_record = {
@@ -75,13 +132,10 @@ class ModelMonitor:
             }
             
             if version not in self.prediction_history:
-                self.prediction_history[version] = []
+                # Keep only the last predictions for memory efficiency
+                self.prediction_history[version] = deque(maxlen=HISTORY_SIZE)
             
             self.prediction_history[version].append(prediction_record)
-            
-            # Keep only last 1000 predictions for memory efficiency
-            if len(self.prediction_history[version]) > 1000:
-                self.prediction_history[version] = self.prediction_history[version][-1000:]
                 
         except Exception as e:
             logger.error(f"Failed to record prediction: {str(e)}")
@@ -91,6 +145,7 @@ class ModelMonitor:
         try:
             self.prediction_counter.labels(version, 'error').inc()
             self.prediction_errors.labels(version, 'prediction_error').inc()
+            get_shared_stats().record_error(version)
             
             error_record = {
                 'timestamp': datetime.now(),
@@ -99,18 +154,19 @@ class ModelMonitor:
             }
             
             if version not in self.error_history:
-                self.error_history[version] = []
+                self.error_history[version] = deque(maxlen=HISTORY_SIZE)
             
             self.error_history[version].append(error_record)
-            
-            if len(self.error_history[version]) > 1000:
-                self.error_history[version] = self.error_history[version][-1000:]
                 
         except Exception as e:
             logger.error(f"Failed to record error: {str(e)}")
     
     async def get_model_stats(self, version: str) -> Dict[str, Any]:
         """Get statistics for a model version"""
+        return self._model_stats(version)
+    
+    def _model_stats(self, version: str) -> Dict[str, Any]:
+        """Statistics for a version from running totals, without scanning history"""
         try:
             stats = {
                 'total_predictions': 0,
@@ -121,21 +177,18 @@ class ModelMonitor:
                 'recent_errors': []
             }
             
-            # Count predictions from Prometheus or history
-            if version in self.prediction_history:
-                stats['total_predictions'] = len(self.prediction_history[version])
-                stats['successful_predictions'] = len(self.prediction_history[version])
-                
-                if self.prediction_history[version]:
-                    latencies = [p['inference_time'] for p in self.prediction_history[version]]
-                    stats['average_latency'] = sum(latencies) / len(latencies)
+            # Counts are node-wide, summed across worker processes
+            totals = get_shared_stats().totals(version)
+            stats['successful_predictions'] = totals['predictions']
+            stats['failed_predictions'] = totals['errors']
+            stats['total_predictions'] = totals['predictions'] + totals['errors']
+            if totals['predictions']:
+                stats['average_latency'] = totals['latency_sum'] / totals['predictions']
+            stats['throughput'] = totals['throughput']
             
+            # Error messages are only kept by the worker that saw them
             if version in self.error_history:
-                stats['failed_predictions'] = len(self.error_history[version])
-                stats['recent_errors'] = self.error_history[version][-10:]  # Last 10 errors
-            
-            # Calculate throughput
-            stats['throughput'] = self._calculate_throughput(version)
+                stats['recent_errors'] = list(self.error_history[version])[-10:]  # Last 10 errors
             
             return stats
             
@@ -143,40 +196,65 @@ class ModelMonitor:
             logger.error(f"Failed to get model stats: {str(e)}")
             return {}
     
-    def _clean_throughput_data(self, version: str) -> None:
-        """Clean old throughput data"""
-        if version in self.throughput_data:
-            current_time = time.time()
-            # Keep only data from the last minute
-            self.throughput_data[version] = [
-                t for t in self.throughput_data[version] 
-                if current_time - t <= 60
-            ]
-    
-    def _calculate_throughput(self, version: str) -> float:
-        """Calculate predictions per second"""
-        if version not in self.throughput_data or not self.throughput_data[version]:
-            return 0.0
+    def refresh_overview(self, versions: Iterable[str], loaded: Iterable[str] = ()) -> OverviewSnapshot:
+        """Rebuild the pre-encoded overview and publish this worker's throughput gauges"""
+        now = time.time()
+        for version, window in self.throughput_windows.items():
+            self.model_throughput.labels(version).set(window.throughput(now))
         
-        timestamps = self.throughput_data[version]
-        if len(timestamps) <= 1:
-            return 0.0
-        
-        time_range = max(timestamps) - min(timestamps)
-        if time_range <= 0:
-            return 0.0
+        loaded = set(loaded)
+        overview = {
+            version: {
+                "version": version,
+                "stats": self._model_stats(version),
+                "loaded": version in loaded
+            }
+            for version in sorted(versions)
+        }
+        body = fast_json_dumps(overview)
         
-        return len(timestamps) / time_range
+        # Unchanged stats keep their ETag, so pollers get 304s
+        previous = self.overview
+        if previous is not None and previous.body == body:
+            self.overview = previous._replace(built_at=now)
+        else:
+            etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+            self.overview = OverviewSnapshot(body=body, etag=etag, built_at=now)
+        return self.overview
     
-    async def check_data_drift(self, version: str, window_size: int = 100) -> Dict[str, Any]:
-        """Check for data drift in recent predictions"""
+    async def check_data_drift(
+        self,
+        version: str,
+        window_size: int = 100,
+        reference_stats: Optional[Dict[str, np.ndarray]] = None
+    ) -> Dict[str, Any]:
+        """Check for data drift in recent predictions
+
+        With ``reference_stats`` (training ``mean`` and ``std`` from the model
+        bundle) recent feature means are compared to the training distribution.
+        """
         try:
             if version not in self.prediction_history or len(self.prediction_history[version]) < window_size:
                 return {'drift_detected': False, 'confidence': 0.0}
             
-            recent_data = self.prediction_history[version][-window_size:]
+            recent_data = list(self.prediction_history[version])[-window_size:]
             features = [pred['features'] for pred in recent_data]
             
+            if reference_stats and 'mean' in reference_stats and 'std' in reference_stats:
+                n_features = len(reference_stats['mean'])
+                feature_array = np.concatenate([
+                    np.asarray(batch, dtype=np.float64).reshape(-1, n_features) for batch in features
+                ])
+                # Shift of the recent mean in units of the training standard deviation
+                mean_changes = np.abs(feature_array.mean(axis=0) - reference_stats['mean']) / (
+                    np.asarray(reference_stats['std']) + 1e-10
+                )
+                return {
+                    'drift_detected': bool(np.any(mean_changes > 0.5)),
+                    'confidence': float(np.mean(mean_changes)),
+                    'feature_changes': mean_changes.tolist()
+                }
+            
             # Simple drift detection based on feature statistics
             # This would be replaced with more sophisticated methods like KS-test, etc.
             feature_array = np.array(features)
@@ -0,0 +1,204 @@
+import asyncio
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, NamedTuple, Optional, Sequence
+
+from prometheus_client import Counter
+from sqlalchemy import insert, select
+
+from app.core.config import settings
+from app.models.database import PredictionLogEntry
+from app.utils.logger import logger
+
+# request_id IN (...) lists are kept below common bind-parameter limits
+LOOKUP_CHUNK_SIZE = 500
+
+PREDICTION_LOG_DROPPED = Counter(
+    'prediction_log_dropped_total',
+    'Logged predictions dropped before reaching the database'
+)
+
+FEEDBACK_LABELS = Counter(
+    'feedback_labels_total',
+    'Feedback items received, by join outcome',
+    ['outcome']
+)
+
+class LabelledRows(NamedTuple):
+    """Feedback joined with the predictions it labels, oldest label first"""
+    # Preprocessed, as the model received them
+    features: List[List[Any]]
+    labels: List[Any]
+    # What the model served for each row, for live accuracy
+    predictions: List[Any]
+    requests: int
+    # Label time of the newest row; the next update starts after it
+    labelled_through: Optional[datetime]
+
+def _to_list(values: Any) -> Any:
+    return values.tolist() if hasattr(values, "tolist") else values
+
+class PredictionLog:
+    """Served predictions keyed by request id, for joining ground truth to later.
+
+    ``record`` only appends to an in-memory buffer, so serving never waits on
+    the database; ``run`` writes the buffer in batches of ``batch_size`` every
+    ``flush_interval`` seconds. If the database falls behind, at most
+    ``max_buffer`` records are kept and the oldest are dropped (and counted).
+    Labels are stored on the logged row itself, so the join happens once, at
+    ingestion, and an incremental update reads only rows labelled since its
+    base version's watermark. Features are logged after preprocessing, as
+    the model received them, so updates can feed them straight to
+    ``partial_fit``.
+    """
+
+    def __init__(
+        self,
+        session_factory=None,
+        flush_interval: Optional[float] = None,
+        batch_size: Optional[int] = None,
+        max_buffer: Optional[int] = None
+    ):
+        if session_factory is None:
+            from app.db.session import AsyncSessionLocal
+            session_factory = AsyncSessionLocal
+        self.session_factory = session_factory
+        self.flush_interval = flush_interval or settings.PREDICTION_LOG_FLUSH_INTERVAL
+        self.batch_size = batch_size or settings.PREDICTION_LOG_BATCH_SIZE
+        self.max_buffer = max_buffer or settings.PREDICTION_LOG_MAX_BUFFER
+        self.buffer: Deque[Dict[str, Any]] = deque()
+        self._flush_lock = asyncio.Lock()
+
+    def record(self, request_id: str, version: str, features: Any, predictions: Any) -> None:
+        """Queue a prediction for the next batched write"""
+        if len(self.buffer) >= self.max_buffer:
+            self.buffer.popleft()
+            PREDICTION_LOG_DROPPED.inc()
+        # Native predictions are converted at write time, off the request path
+        self.buffer.append({
+            "request_id": request_id,
+            "model_version": version,
+            "features": features,
+            "predictions": predictions
+        })
+
+    async def flush(self) -> int:
+        """Write everything buffered so far; returns the number of rows written"""
+        written = 0
+        async with self._flush_lock:
+            while self.buffer:
+                batch = [self.buffer.popleft() for _ in range(min(self.batch_size, len(self.buffer)))]
+                rows = [
+                    {
+                        **record,
+                        "features": _to_list(record["features"]),
+                        "predictions": _to_list(record["predictions"]),
+                        "created_at": datetime.utcnow(),
+                        "updated_at": datetime.utcnow()
+                    }
+                    for record in batch
+                ]
+                try:
+                    async with self.session_factory() as session:
+                        async with session.begin():
+                            await session.execute(insert(PredictionLogEntry), rows)
+                except Exception:
+                    # Put the batch back so the next flush retries it
+                    self.buffer.extendleft(reversed(batch))
+                    while len(self.buffer) > self.max_buffer:
+                        self.buffer.popleft()
+                        PREDICTION_LOG_DROPPED.inc()
+                    raise
+                written += len(rows)
+        return written
+
+    async def run(self) -> None:
+        """Flush the buffer periodically until cancelled, then once more"""
+        try:
+            while True:
+                await asyncio.sleep(self.flush_interval)
+                try:
+                    await self.flush()
+                except Exception as e:
+                    logger.error(f"Failed to write prediction log: {str(e)}")
+        finally:
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Failed to write prediction log on shutdown: {str(e)}")
+
+    async def record_feedback(self, items: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+        """Attach ground-truth labels to logged predictions by request id.
+
+        Each item has a ``request_id`` and ``labels``, one per feature row of
+        that request. Unknown request ids and label counts that do not match
+        the logged rows are reported back, not stored. Relabelling a request
+        replaces its labels but keeps its first label time, so an update that
+        already consumed the request does not read it again.
+        """
+        # Predictions served moments ago may still be buffered
+        await self.flush()
+
+        labels_by_id = {item["request_id"]: item["labels"] for item in items}
+        matched: List[str] = []
+        mismatched: List[str] = []
+        labelled_at = datetime.utcnow()
+        ids = list(labels_by_id)
+        async with self.session_factory() as session:
+            async with session.begin():
+                for start in range(0, len(ids), LOOKUP_CHUNK_SIZE):
+                    entries = (await session.scalars(
+                        select(PredictionLogEntry)
+                        .where(PredictionLogEntry.request_id.in_(ids[start:start + LOOKUP_CHUNK_SIZE]))
+                    )).all()
+                    for entry in entries:
+                        labels = labels_by_id[entry.request_id]
+                        if len(labels) != len(entry.features):
+                            mismatched.append(entry.request_id)
+                            continue
+                        entry.labels = list(labels)
+                        if entry.labelled_at is None:
+                            entry.labelled_at = labelled_at
+                        matched.append(entry.request_id)
+
+        found = set(matched) | set(mismatched)
+        unknown = [request_id for request_id in ids if request_id not in found]
+        FEEDBACK_LABELS.labels('matched').inc(len(matched))
+        FEEDBACK_LABELS.labels('mismatched').inc(len(mismatched))
+        FEEDBACK_LABELS.labels('unknown').inc(len(unknown))
+        return {
+            "received": len(items),
+            "matched": len(matched),
+            "label_count_mismatch": mismatched,
+            "unknown_request_ids": unknown
+        }
+
+    async def labelled_rows(self, versions: Sequence[str], since: Optional[datetime] = None) -> LabelledRows:
+        """Feature rows of ``versions``' predictions labelled after ``since``"""
+        query = (
+            select(
+                PredictionLogEntry.features,
+                PredictionLogEntry.labels,
+                PredictionLogEntry.predictions,
+                PredictionLogEntry.labelled_at
+            )
+            .where(PredictionLogEntry.model_version.in_(list(versions)))
+            .where(PredictionLogEntry.labelled_at.is_not(None))
+            .order_by(PredictionLogEntry.labelled_at)
+        )
+        if since is not None:
+            query = query.where(PredictionLogEntry.labelled_at > since)
+
+        features: List[List[Any]] = []
+        labels: List[Any] = []
+        predictions: List[Any] = []
+        requests = 0
+        labelled_through = None
+        async with self.session_factory() as session:
+            for row in await session.execute(query):
+                features.extend(row.features)
+                labels.extend(row.labels)
+                predictions.extend(row.predictions)
+                requests += 1
+                labelled_through = row.labelled_at
+        return LabelledRows(features, labels, predictions, requests, labelled_through)
@@ -1,21 +1,39 @@
 import logging
 import numpy as np
 from typing import Any, Dict, List, Optional
-from sklearn.preprocessing import StandardScaler, MinMaxScaler
-import pandas as pd
 
 from app.utils.logger import logger
 
+def _as_array(features: Any) -> np.ndarray:
+    """View features as an array without copying or changing an array's dtype"""
+    return np.asarray(features)
+
+def _like_input(result: np.ndarray, features: Any) -> Any:
+    """Arrays stay arrays in their own dtype; lists come back as lists"""
+    return result if isinstance(features, np.ndarray) else result.tolist()
+
 class DataPreprocessor:
+    """Applies a model's serving-time preprocessing.
+
+    Arrays are transformed in their own dtype (scikit-learn scalers keep
+    float32 as float32), so the precision chosen at the serving edge is
+    the precision the model sees. A config with ``fitted`` statistics (as
+    the training pipeline records them) is applied exactly as training
+    applied it; the other keys describe transforms fitted at serving time.
+    """
+    
     def __init__(self):
         self.scalers: Dict[str, Any] = {}
     
-    async def process(self, features: List[Any], preprocessing_config: Dict) -> List[Any]:
+    async def process(self, features: Any, preprocessing_config: Dict) -> Any:
         """Preprocess features based on configuration"""
         try:
             if not preprocessing_config:
                 return features
             
+            if 'fitted' in preprocessing_config:
+                return self._apply_fitted(features, preprocessing_config['fitted'])
+            
             processed_features = features
             
             # Handle different preprocessing steps
@@ -36,19 +54,38 @@ class DataPreprocessor:
             logger.error(f"Preprocessing failed: {str(e)}")
             raise
     
+    def _apply_fitted(self, features: Any, fitted: Dict) -> Any:
+        """Fill missing values with the training means, then standardize, in the features' dtype"""
+        features_array = _as_array(features)
+        dtype = features_array.dtype if features_array.dtype.kind == 'f' else np.dtype(np.float64)
+        result = features_array.astype(dtype, copy=True)
+        
+        if 'fill_values' in fitted:
+            missing = np.isnan(result)
+            if missing.any():
+                fill_values = np.asarray(fitted['fill_values'], dtype=dtype)
+                result[missing] = np.take(fill_values, np.nonzero(missing)[1])
+        if 'mean' in fitted:
+            # Same operations in the same dtype as the training matrix got
+            result -= np.asarray(fitted['mean'], dtype=dtype)
+            result /= np.asarray(fitted['scale'], dtype=dtype)
+        
+        return _like_input(result, features)
+    
     async def _standard_scale(self, features: List[Any], config: Dict) -> List[Any]:
         """Apply standard scaling"""
         try:
-            features_array = np.array(features)
+            features_array = _as_array(features)
             scaler_key = config.get('scaler_key', 'default')
             
             if scaler_key not in self.scalers:
+                from sklearn.preprocessing import StandardScaler
                 self.scalers[scaler_key] = StandardScaler()
                 # Fit on the first batch
                 if config.get('fit_on_first_batch', True):
                     self.scalers[scaler_key].fit(features_array)
             
-            return self.scalers[scaler_key].transform(features_array).tolist()
+            return _like_input(self.scalers[scaler_key].transform(features_array), features)
             
         except Exception as e:
             logger.error(f"Standard scaling failed: {str(e)}")
@@ -57,17 +94,18 @@ class DataPreprocessor:
     async def _minmax_scale(self, features: List[Any], config: Dict) -> List[Any]:
         """Apply min-max scaling"""
         try:
-            features_array = np.array(features)
+            features_array = _as_array(features)
             scaler_key = config.get('scaler_key', 'default')
             
             if scaler_key not in self.scalers:
+                from sklearn.preprocessing import MinMaxScaler
                 self.scalers[scaler_key] = MinMaxScaler(
                     feature_range=config.get('feature_range', (0, 1))
                 )
                 if config.get('fit_on_first_batch', True):
                     self.scalers[scaler_key].fit(features_array)
             
-            return self.scalers[scaler_key].transform(features_array).tolist()
+            return _like_input(self.scalers[scaler_key].transform(features_array), features)
             
         except Exception as e:
             logger.error(f"MinMax scaling failed: {str(e)}")
@@ -82,15 +120,16 @@ class DataPreprocessor:
     async def _impute_missing(self, features: List[Any], config: Dict) -> List[Any]:
         """Impute missing values"""
         try:
-            features_array = np.array(features)
+            features_array = _as_array(features)
             
-            # Replace NaN with mean
+            # Replace NaN with mean; only then is a copy needed
             if np.isnan(features_array).any():
+                features_array = features_array.copy()
                 col_mean = np.nanmean(features_array, axis=0)
                 inds = np.where(np.isnan(features_array))
                 features_array[inds] = np.take(col_mean, inds[1])
             
-            return features_array.tolist()
+            return _like_input(features_array, features)
             
         except Exception as e:
             logger.error(f"Imputation failed: {str(e)}")
@@ -103,11 +142,13 @@ class DataPreprocessor:
             
             if config.get('normalization') == 'standard':
                 scaler_key = config.get('scaler_key', 'default')
+                from sklearn.preprocessing import StandardScaler
                 self.scalers[scaler_key] = StandardScaler()
                 self.scalers[scaler_key].fit(data_array)
             
             elif config.get('normalization') == 'minmax':
                 scaler_key = config.get('scaler_key', 'default')
+                from sklearn.preprocessing import MinMaxScaler
                 self.scalers[scaler_key] = MinMaxScaler(
                     feature_range=config.get('feature_range', (0, 1))
                 )
@@ -0,0 +1,243 @@
+import asyncio
+import time
+from datetime import datetime
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from sqlalchemy import delete, or_, select, update
+from sqlalchemy.exc import IntegrityError
+
+from app.core.config import settings
+from app.models.database import ModelAlias, ModelRegistryEntry, RegistryState, ShadowConfig
+from app.utils.logger import logger
+
+class RegistrySnapshot(NamedTuple):
+    """Immutable view of the registry as of one generation"""
+    generation: int
+    versions: Dict[str, Dict[str, Any]]
+    aliases: Dict[str, str]
+    # Primary version -> {"candidate_version", "sample_rate"}
+    shadows: Dict[str, Dict[str, Any]]
+    fetched_at: float
+
+EMPTY_SNAPSHOT = RegistrySnapshot(generation=-1, versions={}, aliases={}, shadows={}, fetched_at=0.0)
+
+def _entry_to_dict(entry: ModelRegistryEntry) -> Dict[str, Any]:
+    return {
+        "version": entry.version,
+        "file_name": entry.file_name,
+        "artifact_sha256": entry.artifact_sha256,
+        "artifact_size": entry.artifact_size,
+        "model_type": entry.model_type,
+        "metadata": entry.model_metadata or {},
+        "loaded_at": entry.loaded_at.isoformat() if entry.loaded_at else None,
+        "registered_at": entry.created_at.isoformat() if entry.created_at else None,
+    }
+
+class ModelRegistry:
+    """Database-backed model registry with a read-through in-process cache.
+
+    Reads are served from an immutable snapshot. Once the snapshot is older
+    than ``ttl`` the next read starts a background refresh and keeps serving
+    the old snapshot, so request handlers never wait on the database (except
+    for the very first read). A refresh first compares the registry's
+    generation stamp and reloads the tables only when it moved.
+    """
+
+    def __init__(self, session_factory=None, ttl: Optional[float] = None):
+        if session_factory is None:
+            from app.db.session import AsyncSessionLocal
+            session_factory = AsyncSessionLocal
+        self.session_factory = session_factory
+        self.ttl = settings.REGISTRY_CACHE_TTL if ttl is None else ttl
+        self.snapshot = EMPTY_SNAPSHOT
+        self._refresh_lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    async def refresh(self, force: bool = False) -> RegistrySnapshot:
+        """Reload the snapshot if the registry changed since the last one"""
+        async with self._refresh_lock:
+            async with self.session_factory() as session:
+                generation = await session.scalar(
+                    select(RegistryState.generation).where(RegistryState.id == 1)
+                ) or 0
+                if not force and generation == self.snapshot.generation:
+                    self.snapshot = self.snapshot._replace(fetched_at=time.monotonic())
+                    return self.snapshot
+
+                entries = (await session.scalars(select(ModelRegistryEntry))).all()
+                aliases = (await session.scalars(select(ModelAlias))).all()
+                shadows = (await session.scalars(select(ShadowConfig))).all()
+
+            self.snapshot = RegistrySnapshot(
+                generation=generation,
+                versions={entry.version: _entry_to_dict(entry) for entry in entries},
+                aliases={alias.alias: alias.version for alias in aliases},
+                shadows={
+                    shadow.primary_version: {
+                        "candidate_version": shadow.candidate_version,
+                        "sample_rate": shadow.sample_rate
+                    }
+                    for shadow in shadows
+                },
+                fetched_at=time.monotonic()
+            )
+            return self.snapshot
+
+    async def get_snapshot(self) -> RegistrySnapshot:
+        """Current snapshot; stale ones are refreshed in the background"""
+        snapshot = self.snapshot
+        if snapshot is EMPTY_SNAPSHOT:
+            return await self.refresh()
+        if time.monotonic() - snapshot.fetched_at > self.ttl:
+            self._schedule_refresh()
+        return snapshot
+
+    def _schedule_refresh(self) -> None:
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh_quietly())
+
+    async def _refresh_quietly(self) -> None:
+        try:
+            await self.refresh()
+        except Exception as e:
+            logger.error(f"Failed to refresh model registry: {str(e)}")
+
+    async def run(self, interval: Optional[float] = None) -> None:
+        """Keep the snapshot fresh in the background until cancelled"""
+        interval = interval or self.ttl
+        while True:
+            await self._refresh_quietly()
+            await asyncio.sleep(interval)
+
+    def resolve(self, name: str) -> str:
+        """Version an alias points at, or the name itself"""
+        return self.snapshot.aliases.get(name, name)
+
+    def get(self, version: str) -> Optional[Dict[str, Any]]:
+        """Cached registry entry for a version"""
+        return self.snapshot.versions.get(version)
+
+    def aliases_for(self, version: str) -> List[str]:
+        """Cached aliases pointing at a version"""
+        return sorted(alias for alias, target in self.snapshot.aliases.items() if target == version)
+
+    def shadow_for(self, version: str) -> Optional[Dict[str, Any]]:
+        """Cached shadow configuration of a primary version"""
+        return self.snapshot.shadows.get(version)
+
+    async def record_version(
+        self,
+        version: str,
+        metadata: Dict[str, Any],
+        file_name: Optional[str] = None,
+        artifact_sha256: Optional[str] = None,
+        artifact_size: Optional[int] = None,
+        loaded_at: Optional[datetime] = None
+    ) -> None:
+        """Create or update a version's entry"""
+        async with self.session_factory() as session:
+            async with session.begin():
+                entry = await session.scalar(
+                    select(ModelRegistryEntry).where(ModelRegistryEntry.version == version)
+                )
+                if entry is None:
+                    entry = ModelRegistryEntry(version=version)
+                    session.add(entry)
+                entry.file_name = file_name
+                entry.artifact_sha256 = artifact_sha256
+                entry.artifact_size = artifact_size
+                entry.model_type = metadata.get("model_type")
+                entry.model_metadata = metadata
+                if loaded_at is not None:
+                    entry.loaded_at = loaded_at
+                await self._bump_generation(session)
+        self._schedule_refresh()
+
+    async def remove_version(self, version: str) -> bool:
+        """Delete a version's entry with the aliases and shadows naming it; returns whether it was registered"""
+        async with self.session_factory() as session:
+            async with session.begin():
+                result = await session.execute(
+                    delete(ModelRegistryEntry).where(ModelRegistryEntry.version == version)
+                )
+                # Left in place they would route traffic to a version that is gone
+                await session.execute(delete(ModelAlias).where(ModelAlias.version == version))
+                await session.execute(
+                    delete(ShadowConfig).where(or_(
+                        ShadowConfig.primary_version == version,
+                        ShadowConfig.candidate_version == version
+                    ))
+                )
+                await self._bump_generation(session)
+        await self.refresh()
+        return result.rowcount > 0
+
+    async def set_alias(self, alias: str, version: str) -> None:
+        """Point an alias at a registered version"""
+        async with self.session_factory() as session:
+            async with session.begin():
+                if await session.scalar(
+                    select(ModelRegistryEntry.id).where(ModelRegistryEntry.version == version)
+                ) is None:
+                    raise ValueError(f"Model version {version} is not registered")
+                entry = await session.scalar(select(ModelAlias).where(ModelAlias.alias == alias))
+                if entry is None:
+                    session.add(ModelAlias(alias=alias, version=version))
+                else:
+                    entry.version = version
+                await self._bump_generation(session)
+        await self.refresh()
+
+    async def set_shadow(self, version: str, candidate_version: str, sample_rate: float) -> None:
+        """Mirror a sampled fraction of a version's traffic to a registered candidate"""
+        async with self.session_factory() as session:
+            async with session.begin():
+                for name in (version, candidate_version):
+                    if await session.scalar(
+                        select(ModelRegistryEntry.id).where(ModelRegistryEntry.version == name)
+                    ) is None:
+                        raise ValueError(f"Model version {name} is not registered")
+                entry = await session.scalar(
+                    select(ShadowConfig).where(ShadowConfig.primary_version == version)
+                )
+                if entry is None:
+                    entry = ShadowConfig(primary_version=version)
+                    session.add(entry)
+                entry.candidate_version = candidate_version
+                entry.sample_rate = sample_rate
+                await self._bump_generation(session)
+        await self.refresh()
+
+    async def clear_shadow(self, version: str) -> bool:
+        """Stop shadowing a version's traffic; returns whether it was shadowed"""
+        async with self.session_factory() as session:
+            async with session.begin():
+                entry = await session.scalar(
+                    select(ShadowConfig).where(ShadowConfig.primary_version == version)
+                )
+                if entry is None:
+                    return False
+                await session.delete(entry)
+                await self._bump_generation(session)
+        await self.refresh()
+        return True
+
+    @staticmethod
+    async def _bump_generation(session) -> None:
+        """Advance the version stamp that cache refreshes compare against"""
+        result = await session.execute(
+            update(RegistryState)
+            .where(RegistryState.id == 1)
+            .values(generation=RegistryState.generation + 1)
+        )
+        if result.rowcount == 0:
+            try:
+                async with session.begin_nested():
+                    session.add(RegistryState(id=1, generation=1))
+            except IntegrityError:
+                # Another replica created the row first
+                await session.execute(
+                    update(RegistryState)
+                    .where(RegistryState.id == 1)
+                    .values(generation=RegistryState.generation + 1)
+                )
@@ -0,0 +1,204 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from prometheus_client import Gauge
+
+from app.core.config import settings
+from app.utils.logger import logger
+
+EVENT_LOOP_LAG = Gauge(
+    'model_event_loop_lag_seconds',
+    'How late the event loop woke the saturation sampler',
+    # A single stalled worker is what matters, not the sum
+    multiprocess_mode='livemax'
+)
+
+EXECUTOR_UTILIZATION = Gauge(
+    'model_inference_executor_utilization',
+    'Fraction of inference thread time spent busy over the last sample',
+    multiprocess_mode='liveall'
+)
+
+BATCH_FILL_RATIO = Gauge(
+    'model_batch_fill_ratio',
+    'Mean batch size over the last sample, as a fraction of the maximum',
+    multiprocess_mode='liveall'
+)
+
+MODELS_LOADING = Gauge(
+    'model_versions_loading',
+    'Model versions currently being loaded or materialized',
+    multiprocess_mode='livesum'
+)
+
+SERVICE_READY = Gauge(
+    'model_service_ready',
+    'Whether the worker passes its readiness check (1) or not (0)',
+    multiprocess_mode='livemin'
+)
+
+class InferenceExecutor:
+    """Thread pool that runs model inference off the event loop.
+
+    Keeps a running total of busy thread time so the saturation sampler can
+    report utilization over an interval rather than an instantaneous count.
+    The pool is created on first use in each process, so a preforking parent
+    never hands dead threads to its workers.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, thread_name_prefix: str = "inference"):
+        self.max_workers = max_workers or settings.INFERENCE_THREADS
+        self.thread_name_prefix = thread_name_prefix
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pid: Optional[int] = None
+        self._busy_seconds = 0.0
+        self._running: Dict[int, float] = {}
+        self._next_token = 0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None or self._pid != os.getpid():
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix=self.thread_name_prefix
+            )
+            self._pid = os.getpid()
+            self._busy_seconds = 0.0
+            self._running = {}
+        return self._executor
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Run ``func(*args)`` on an inference thread"""
+        executor = self._get_executor()
+        token = self._next_token
+        self._next_token += 1
+        # Counted from submission: queued calls are load the pool must absorb
+        self._running[token] = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+        finally:
+            self._busy_seconds += time.perf_counter() - self._running.pop(token)
+
+    @property
+    def active(self) -> int:
+        """Inference calls running or waiting for a thread"""
+        return len(self._running)
+
+    def busy_seconds(self) -> float:
+        """Total busy thread time so far, including calls still running"""
+        now = time.perf_counter()
+        return self._busy_seconds + sum(now - start for start in self._running.values())
+
+    def shutdown(self) -> None:
+        if self._executor is not None and self._pid == os.getpid():
+            self._executor.shutdown(wait=False)
+        self._executor = None
+
+class SaturationMonitor:
+    """Background sampler of the signals that show a worker is saturated.
+
+    Every ``interval`` seconds it measures event-loop lag and reads executor
+    utilization, admission queue depths, batch fill and loading models into
+    a snapshot and the Prometheus gauges. Probes only read the snapshot, so
+    they never do real work.
+    """
+
+    def __init__(self, model_manager, interval: Optional[float] = None):
+        self.model_manager = model_manager
+        self.interval = interval or settings.SATURATION_SAMPLE_INTERVAL
+        self.snapshot: Optional[Dict[str, Any]] = None
+        self._batch_items = 0
+        self._batch_count = 0
+        self._last_busy: Optional[float] = None
+        self._last_sample: Optional[float] = None
+
+    def record_batch(self, size: int) -> None:
+        """Count a batch request towards the fill ratio"""
+        self._batch_items += size
+        self._batch_count += 1
+
+    def sample(self, loop_lag: float = 0.0) -> Dict[str, Any]:
+        """Take a snapshot of the current saturation signals"""
+        manager = self.model_manager
+        now = time.monotonic()
+
+        executor = manager.inference_executor
+        busy = executor.busy_seconds()
+        utilization = 0.0
+        if self._last_busy is not None and now > self._last_sample:
+            capacity = (now - self._last_sample) * executor.max_workers
+            utilization = min(max(busy - self._last_busy, 0.0) / capacity, 1.0)
+        self._last_busy = busy
+        self._last_sample = now
+
+        batch_fill = 0.0
+        if self._batch_count:
+            batch_fill = self._batch_items / (self._batch_count * settings.MAX_PREDICTION_BATCH_SIZE)
+        self._batch_items = self._batch_count = 0
+
+        queues = {
+            version: {
+                "waiting": queue.waiting,
+                "in_flight": queue.in_flight,
+                "queue_fill": queue.waiting / queue.max_queue if queue.max_queue else 0.0
+            }
+            for version, queue in manager.admission.queues.items()
+        }
+
+        snapshot = {
+            "sampled_at": now,
+            "event_loop_lag": loop_lag,
+            "executor_utilization": utilization,
+            "executor_active": executor.active,
+            "batch_fill_ratio": batch_fill,
+            "models_loading": len(manager.loading),
+            "models_loaded": len(manager.model_metadata),
+            "queues": queues
+        }
+        snapshot["reasons"] = self._not_ready_reasons(snapshot)
+        snapshot["ready"] = not snapshot["reasons"]
+
+        EVENT_LOOP_LAG.set(loop_lag)
+        EXECUTOR_UTILIZATION.set(utilization)
+        BATCH_FILL_RATIO.set(batch_fill)
+        MODELS_LOADING.set(snapshot["models_loading"])
+        SERVICE_READY.set(1 if snapshot["ready"] else 0)
+
+        self.snapshot = snapshot
+        return snapshot
+
+    def _not_ready_reasons(self, snapshot: Dict[str, Any]) -> List[str]:
+        reasons = []
+        if not snapshot["models_loaded"]:
+            reasons.append("no models loaded")
+        if snapshot["event_loop_lag"] > settings.READINESS_MAX_LOOP_LAG:
+            reasons.append("event loop lagging")
+        full = sorted(version for version, queue in snapshot["queues"].items() if queue["queue_fill"] >= 1.0)
+        if full:
+            reasons.append(f"admission queue full for {', '.join(full)}")
+        return reasons
+
+    def readiness(self) -> Dict[str, Any]:
+        """Latest snapshot with its readiness verdict; never samples"""
+        snapshot = self.snapshot
+        if snapshot is None:
+            return {"ready": False, "reasons": ["saturation sampler not started"]}
+
+        # A sampler that stopped waking up means the loop is stuck
+        age = time.monotonic() - snapshot["sampled_at"]
+        if age > 3 * self.interval:
+            return {**snapshot, "ready": False, "reasons": snapshot["reasons"] + ["saturation sample stale"]}
+        return snapshot
+
+    async def run(self) -> None:
+        """Sample until cancelled; lag is how late each wake-up is"""
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            try:
+                self.sample(max(loop.time() - expected, 0.0))
+            except Exception as e:
+                logger.error(f"Saturation sample failed: {str(e)}")
@@ -0,0 +1,219 @@
+import asyncio
+import random
+from collections import deque
+from typing import TYPE_CHECKING, Any, Callable, Deque, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from prometheus_client import Counter, Histogram
+
+from app.core.config import settings
+from app.ml.timing import LATENCY_BUCKETS
+from app.utils.logger import logger
+
+if TYPE_CHECKING:
+    from app.ml.model_manager import ModelManager
+
+SHADOW_REQUESTS = Counter(
+    'model_shadow_requests_total',
+    'Mirrored requests by outcome (completed, shed, error)',
+    ['model_version', 'candidate_version', 'outcome']
+)
+
+SHADOW_ROWS = Counter(
+    'model_shadow_rows_total',
+    'Rows predicted by both primary and shadow, by whether they agreed',
+    ['model_version', 'candidate_version', 'agreement']
+)
+
+SHADOW_LATENCY = Histogram(
+    'model_shadow_latency_seconds',
+    'Shadow inference latency in seconds',
+    ['model_version', 'candidate_version'],
+    buckets=LATENCY_BUCKETS
+)
+
+class ShadowRequest(NamedTuple):
+    """A primary prediction waiting to be replayed against its candidate"""
+    version: str
+    candidate_version: str
+    features: Any
+    predictions: Any
+    inference_time: float
+
+def compare_predictions(primary: Any, shadow: Any) -> Tuple[int, int]:
+    """(rows, rows that agree); floats agree within np.isclose tolerance"""
+    primary = np.asarray(primary)
+    shadow = np.asarray(shadow)
+    rows = len(primary) if primary.ndim else 1
+    if primary.shape != shadow.shape:
+        return rows, 0
+    if primary.dtype.kind == "f" or shadow.dtype.kind == "f":
+        equal = np.isclose(primary, shadow)
+    else:
+        equal = primary == shadow
+    # Multi-output rows agree only if every output does
+    if equal.ndim > 1:
+        equal = equal.reshape(len(equal), -1).all(axis=1)
+    return rows, int(np.count_nonzero(equal))
+
+class ShadowStats:
+    """Running agreement and latency comparison of one primary/candidate pair"""
+
+    __slots__ = (
+        "sampled", "shed", "completed", "errors", "rows", "agreed_rows",
+        "primary_seconds", "shadow_seconds", "deltas"
+    )
+
+    def __init__(self, window: int):
+        self.sampled = 0
+        self.shed = 0
+        self.completed = 0
+        self.errors = 0
+        self.rows = 0
+        self.agreed_rows = 0
+        self.primary_seconds = 0.0
+        self.shadow_seconds = 0.0
+        # Shadow minus primary inference time, newest last
+        self.deltas: Deque[float] = deque(maxlen=window)
+
+    def summary(self) -> Dict[str, Any]:
+        deltas = np.array(self.deltas) * 1e3
+        return {
+            "sampled": self.sampled,
+            "shed": self.shed,
+            "completed": self.completed,
+            "errors": self.errors,
+            "rows": self.rows,
+            "agreement_rate": self.agreed_rows / self.rows if self.rows else None,
+            "primary_latency_ms": self.primary_seconds / self.completed * 1e3 if self.completed else None,
+            "shadow_latency_ms": self.shadow_seconds / self.completed * 1e3 if self.completed else None,
+            "latency_delta_ms": {
+                "mean": float(deltas.mean()),
+                "p50": float(np.percentile(deltas, 50)),
+                "p95": float(np.percentile(deltas, 95))
+            } if len(deltas) else None
+        }
+
+class ShadowRunner:
+    """Replays a sampled fraction of a version's traffic against a candidate version.
+
+    Shadow configurations live in the model registry, so every replica
+    mirrors the same versions. ``offer`` runs after the primary response has
+    been sent. It samples the request and puts it on a bounded queue without
+    waiting; when the queue is full, or live requests are queueing for an
+    admission slot, the request is shed rather than adding load. ``run``
+    drains the queue with ``SHADOW_CONCURRENCY`` workers that predict with the
+    candidate on the shadow executor, outside admission control, monitoring
+    and the prediction log, then compare the result with what the primary
+    served.
+    Stats are this worker's; the Prometheus counters aggregate across workers.
+    """
+
+    def __init__(
+        self,
+        model_manager: "ModelManager",
+        queue_size: Optional[int] = None,
+        concurrency: Optional[int] = None,
+        sample: Callable[[], float] = random.random
+    ):
+        self.model_manager = model_manager
+        self.concurrency = concurrency or settings.SHADOW_CONCURRENCY
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size or settings.SHADOW_QUEUE_SIZE)
+        self.sample = sample
+        self.stats: Dict[Tuple[str, str], ShadowStats] = {}
+
+    def _stats(self, version: str, candidate_version: str) -> ShadowStats:
+        stats = self.stats.get((version, candidate_version))
+        if stats is None:
+            stats = self.stats[(version, candidate_version)] = ShadowStats(settings.SHADOW_LATENCY_WINDOW)
+        return stats
+
+    def is_shadowed(self, version: str) -> bool:
+        return self.model_manager.shadow_config(version) is not None
+
+    def offer(self, version: str, features: Any, predictions: Any, inference_time: float) -> bool:
+        """Queue a served prediction for replay if it is sampled; never blocks"""
+        config = self.model_manager.shadow_config(version)
+        if config is None or self.sample() >= config["sample_rate"]:
+            return False
+        candidate_version = config["candidate_version"]
+        stats = self._stats(version, candidate_version)
+        # Live requests waiting for a slot: the worker has no capacity to spare
+        if self.model_manager.admission.queued():
+            return self._shed(stats, version, candidate_version)
+        try:
+            self.queue.put_nowait(
+                ShadowRequest(version, candidate_version, features, predictions, inference_time)
+            )
+        except asyncio.QueueFull:
+            return self._shed(stats, version, candidate_version)
+        stats.sampled += 1
+        return True
+
+    @staticmethod
+    def _shed(stats: ShadowStats, version: str, candidate_version: str) -> bool:
+        stats.shed += 1
+        SHADOW_REQUESTS.labels(version, candidate_version, 'shed').inc()
+        return False
+
+    async def run(self) -> None:
+        """Replay queued requests until cancelled"""
+        workers = [asyncio.create_task(self._work()) for _ in range(self.concurrency)]
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            for worker in workers:
+                worker.cancel()
+
+    async def _work(self) -> None:
+        while True:
+            request = await self.queue.get()
+            try:
+                await self.replay(request)
+            finally:
+                self.queue.task_done()
+
+    async def replay(self, request: ShadowRequest) -> None:
+        """Predict with the candidate and record how it compares with the primary"""
+        stats = self._stats(request.version, request.candidate_version)
+        try:
+            predictions, inference_time = await self.model_manager.predict_shadow(
+                request.candidate_version, request.features
+            )
+            rows, agreed = compare_predictions(request.predictions, predictions)
+        except Exception as e:
+            stats.errors += 1
+            SHADOW_REQUESTS.labels(request.version, request.candidate_version, 'error').inc()
+            logger.error(f"Shadow prediction failed for model {request.candidate_version}: {str(e)}")
+            return
+
+        stats.completed += 1
+        stats.rows += rows
+        stats.agreed_rows += agreed
+        stats.primary_seconds += request.inference_time
+        stats.shadow_seconds += inference_time
+        stats.deltas.append(inference_time - request.inference_time)
+        SHADOW_REQUESTS.labels(request.version, request.candidate_version, 'completed').inc()
+        SHADOW_ROWS.labels(request.version, request.candidate_version, 'agree').inc(agreed)
+        SHADOW_ROWS.labels(request.version, request.candidate_version, 'disagree').inc(rows - agreed)
+        SHADOW_LATENCY.labels(request.version, request.candidate_version).observe(inference_time)
+
+    def summary(self) -> Dict[str, Any]:
+        """Configured shadows and this worker's comparison stats"""
+        shadows: List[Dict[str, Any]] = []
+        configured = self.model_manager.shadow_configs()
+        pairs = set(self.stats) | {
+            (version, config["candidate_version"]) for version, config in configured.items()
+        }
+        for version, candidate_version in sorted(pairs):
+            config = configured.get(version)
+            active = config is not None and config["candidate_version"] == candidate_version
+            stats = self.stats.get((version, candidate_version)) or ShadowStats(0)
+            shadows.append({
+                "model_version": version,
+                "candidate_version": candidate_version,
+                "active": active,
+                "sample_rate": config["sample_rate"] if active else None,
+                **stats.summary()
+            })
+        return {"queue_depth": self.queue.qsize(), "queue_size": self.queue.maxsize, "shadows": shadows}
@@ -0,0 +1,230 @@
+import fcntl
+import os
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+import numpy as np
+
+from app.core.config import settings
+from app.utils.logger import logger
+
+# Per (worker, version) counters
+PREDICTIONS, ERRORS, LATENCY_SUM = range(3)
+N_FIELDS = 3
+
+# Throughput is counted in one-second buckets over this many seconds
+THROUGHPUT_WINDOW = 60
+
+_MAGIC = 0x4D4C5354  # "MLST"
+_LAYOUT_VERSION = 1
+_NAME_BYTES = 64
+
+class SharedStats:
+    """Prediction counters shared by every worker process on a node.
+
+    Backed by a memory-mapped file (normally on tmpfs, next to the
+    Prometheus multiprocess files). Each process claims its own row at
+    startup and is the only writer of that row, so recording is a few
+    array updates with no lock. Readers sum across rows, so any worker can
+    answer with node-wide numbers. Without a path the arrays are private to
+    the process.
+
+    Rows of exited workers keep their counts and are adopted by the next
+    worker, so totals never go backwards.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_workers: int = 32, max_versions: int = 128):
+        self.path = Path(path) if path else None
+        self.max_workers = max_workers
+        self.max_versions = max_versions
+        self._slots: Dict[str, int] = {}
+
+        if self.path is None:
+            self._init_private()
+        else:
+            self._init_shared()
+
+        self.pid = os.getpid()
+        self.row = self._claim_row()
+
+    def _layout(self):
+        """(name, dtype, shape) of each array in the file, in order"""
+        return [
+            ("header", np.int64, (4,)),
+            ("pids", np.int64, (self.max_workers,)),
+            ("names", np.uint8, (self.max_versions, _NAME_BYTES)),
+            ("values", np.float64, (self.max_workers, self.max_versions, N_FIELDS)),
+            ("bucket_stamps", np.int64, (self.max_workers, self.max_versions, THROUGHPUT_WINDOW)),
+            ("bucket_counts", np.float64, (self.max_workers, self.max_versions, THROUGHPUT_WINDOW)),
+        ]
+
+    def _init_private(self) -> None:
+        for name, dtype, shape in self._layout():
+            setattr(self, name, np.zeros(shape, dtype=dtype))
+        self.header[:] = (_MAGIC, _LAYOUT_VERSION, self.max_workers, self.max_versions)
+
+    def _init_shared(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        layout = self._layout()
+        total_size = sum(np.dtype(dtype).itemsize * int(np.prod(shape)) for _, dtype, shape in layout)
+
+        with self._lock():
+            if not self.path.exists() or self.path.stat().st_size == 0:
+                # Sparse on tmpfs: pages are only allocated once written
+                with open(self.path, "wb") as f:
+                    f.truncate(total_size)
+                created = True
+            else:
+                created = False
+
+            offset = 0
+            for name, dtype, shape in layout:
+                setattr(self, name, np.memmap(self.path, dtype=dtype, mode="r+", offset=offset, shape=shape))
+                offset += np.dtype(dtype).itemsize * int(np.prod(shape))
+
+            expected = (_MAGIC, _LAYOUT_VERSION, self.max_workers, self.max_versions)
+            if created:
+                self.header[:] = expected
+            elif tuple(self.header) != expected:
+                raise ValueError(f"Shared stats file {self.path} has an incompatible layout")
+
+    @contextmanager
+    def _lock(self) -> Iterator[None]:
+        """Cross-process lock for the rare structural changes (rows, version slots)"""
+        if self.path is None:
+            yield
+            return
+        with open(self.path.with_name(self.path.name + ".lock"), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _alive(pid: int) -> bool:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+        return True
+
+    def _claim_row(self) -> int:
+        """Take a row that is unused or belonged to an exited worker"""
+        with self._lock():
+            for row in range(self.max_workers):
+                pid = int(self.pids[row])
+                if pid == 0 or not self._alive(pid):
+                    self.pids[row] = os.getpid()
+                    return row
+        raise RuntimeError(f"No free worker rows in shared stats (max_workers={self.max_workers})")
+
+    def close(self) -> None:
+        """Release this process's row for the next worker"""
+        if self.pids[self.row] == self.pid:
+            self.pids[self.row] = 0
+
+    def _find_slot(self, version: str) -> Optional[int]:
+        """Slot registered for a version by any worker"""
+        slot = self._slots.get(version)
+        if slot is not None:
+            return slot
+        encoded = self._encode(version)
+        matches = np.flatnonzero((self.names == encoded).all(axis=1))
+        if len(matches):
+            slot = int(matches[0])
+            self._slots[version] = slot
+            return slot
+        return None
+
+    def _slot(self, version: str) -> Optional[int]:
+        """Slot for a version, registering it on first use"""
+        slot = self._find_slot(version)
+        if slot is not None:
+            return slot
+        with self._lock():
+            slot = self._find_slot(version)
+            if slot is not None:
+                return slot
+            empty = np.flatnonzero(self.names[:, 0] == 0)
+            if not len(empty):
+                logger.warning(f"Shared stats full; not recording version {version}")
+                return None
+            slot = int(empty[0])
+            self.names[slot] = self._encode(version)
+            self._slots[version] = slot
+            return slot
+
+    @staticmethod
+    def _encode(version: str) -> np.ndarray:
+        encoded = np.zeros(_NAME_BYTES, dtype=np.uint8)
+        data = version.encode()[:_NAME_BYTES]
+        encoded[:len(data)] = np.frombuffer(data, dtype=np.uint8)
+        return encoded
+
+    def record_prediction(self, version: str, latency: float) -> None:
+        """Count a successful prediction in this worker's row"""
+        slot = self._slot(version)
+        if slot is None:
+            return
+        values = self.values[self.row, slot]
+        values[PREDICTIONS] += 1
+        values[LATENCY_SUM] += latency
+
+        now = int(time.time())
+        bucket = now % THROUGHPUT_WINDOW
+        if self.bucket_stamps[self.row, slot, bucket] != now:
+            self.bucket_counts[self.row, slot, bucket] = 0
+            self.bucket_stamps[self.row, slot, bucket] = now
+        self.bucket_counts[self.row, slot, bucket] += 1
+
+    def record_error(self, version: str) -> None:
+        """Count a failed prediction in this worker's row"""
+        slot = self._slot(version)
+        if slot is not None:
+            self.values[self.row, slot, ERRORS] += 1
+
+    def totals(self, version: str) -> Dict[str, float]:
+        """Node-wide totals for a version, summed across worker rows"""
+        slot = self._find_slot(version)
+        if slot is None:
+            return {"predictions": 0, "errors": 0, "latency_sum": 0.0, "throughput": 0.0}
+
+        values = self.values[:, slot].sum(axis=0)
+
+        now = int(time.time())
+        stamps = self.bucket_stamps[:, slot]
+        recent = (stamps > now - THROUGHPUT_WINDOW) & (stamps <= now)
+        count = float(self.bucket_counts[:, slot][recent].sum())
+        span = now - int(stamps[recent].min()) + 1 if count else 0
+
+        return {
+            "predictions": int(values[PREDICTIONS]),
+            "errors": int(values[ERRORS]),
+            "latency_sum": float(values[LATENCY_SUM]),
+            "throughput": count / span if span else 0.0
+        }
+
+_shared_stats: Optional[SharedStats] = None
+
+def get_shared_stats() -> SharedStats:
+    """Process-wide SharedStats, in the multiprocess directory when one is configured
+
+    A forked child must not write to its parent's row, so each process
+    claims its own on first use.
+    """
+    global _shared_stats
+    if _shared_stats is None or _shared_stats.pid != os.getpid():
+        directory = settings.PROMETHEUS_MULTIPROC_DIR
+        # Not *.db: MultiProcessCollector parses every .db file in the directory
+        path = os.path.join(directory, "monitor_stats.mmap") if directory else None
+        try:
+            _shared_stats = SharedStats(path)
+        except (OSError, ValueError, RuntimeError) as e:
+            logger.error(f"Failed to attach shared stats at {path}: {str(e)}")
+            _shared_stats = SharedStats()
+    return _shared_stats
@@ -0,0 +1,71 @@
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+from prometheus_client import Histogram
+
+# Buckets spanning ~10us to 10s; the prometheus_client defaults start at 5ms,
+# which puts every sub-millisecond stage in the first bucket.
+LATENCY_BUCKETS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+# Request stages, in the order they happen
+STAGES = ("queue", "preprocess", "inference", "postprocess", "monitor", "serialize")
+
+STAGE_LATENCY = Histogram(
+    'model_stage_latency_seconds',
+    'Per-stage request latency in seconds',
+    ['model_version', 'stage'],
+    buckets=LATENCY_BUCKETS
+)
+
+
+class StageTimer:
+    """Monotonic per-stage timer for a single request.
+
+    Durations accumulate per stage, so one timer can span every item of a
+    batch request; waiting stages, which overlap across items, keep their
+    longest duration instead. Stages recorded with a version are also
+    observed in the ``model_stage_latency_seconds`` histogram.
+    """
+
+    __slots__ = ("created_at", "durations")
+
+    def __init__(self):
+        self.created_at = time.perf_counter()
+        self.durations: Dict[str, float] = {}
+
+    def record(self, stage: str, seconds: float, version: Optional[str] = None) -> None:
+        """Add a measured duration to a stage"""
+        self.durations[stage] = self.durations.get(stage, 0.0) + seconds
+        if version is not None:
+            STAGE_LATENCY.labels(version, stage).observe(seconds)
+
+    def record_longest(self, stage: str, seconds: float, version: Optional[str] = None) -> None:
+        """Keep the longest duration seen for a stage, observing every one"""
+        self.durations[stage] = max(self.durations.get(stage, 0.0), seconds)
+        if version is not None:
+            STAGE_LATENCY.labels(version, stage).observe(seconds)
+
+    @contextmanager
+    def stage(self, name: str, version: Optional[str] = None) -> Iterator[None]:
+        """Time the enclosed block as the given stage"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start, version)
+
+    def server_timing(self) -> str:
+        """Render the recorded stages as a Server-Timing header value (ms)"""
+        durations = self.durations
+        entries = [
+            f"{name};dur={durations[name] * 1000:.3f}"
+            for name in STAGES if name in durations
+        ]
+        total = time.perf_counter() - self.created_at
+        entries.append(f"total;dur={total * 1000:.3f}")
+        return ", ".join(entries)
@@ -0,0 +1,51 @@
+from sqlalchemy import BigInteger, Column, DateTime, Float, ForeignKey, Integer, JSON, String
+
+from app.db.base import Base, BaseModel
+
+class ModelRegistryEntry(Base, BaseModel):
+    """A model version known to the registry, shared by every replica"""
+    __tablename__ = "model_registry"
+    
+    version = Column(String(128), unique=True, index=True, nullable=False)
+    file_name = Column(String(255))
+    artifact_sha256 = Column(String(64))
+    artifact_size = Column(BigInteger)
+    model_type = Column(String(128))
+    # "metadata" is reserved on declarative classes
+    model_metadata = Column(JSON)
+    # Last time any replica loaded this version
+    loaded_at = Column(DateTime)
+
+class ModelAlias(Base, BaseModel):
+    """A stable name (e.g. "production") pointing at a model version"""
+    __tablename__ = "model_aliases"
+    
+    alias = Column(String(128), unique=True, index=True, nullable=False)
+    version = Column(String(128), ForeignKey("model_registry.version"), nullable=False)
+
+class ShadowConfig(Base, BaseModel):
+    """A candidate version that receives a sampled copy of a primary version's traffic"""
+    __tablename__ = "model_shadows"
+    
+    primary_version = Column(String(128), unique=True, index=True, nullable=False)
+    candidate_version = Column(String(128), ForeignKey("model_registry.version"), nullable=False)
+    sample_rate = Column(Float, nullable=False)
+
+class RegistryState(Base):
+    """Single-row version stamp, bumped on every registry write"""
+    __tablename__ = "model_registry_state"
+    
+    id = Column(Integer, primary_key=True)
+    generation = Column(BigInteger, nullable=False, default=0)
+
+class PredictionLogEntry(Base, BaseModel):
+    """One served prediction request, joined with its ground-truth labels once they arrive"""
+    __tablename__ = "prediction_log"
+    
+    request_id = Column(String(64), unique=True, index=True, nullable=False)
+    model_version = Column(String(128), index=True, nullable=False)
+    features = Column(JSON, nullable=False)
+    predictions = Column(JSON, nullable=False)
+    # One label per feature row, set by feedback ingestion
+    labels = Column(JSON)
+    labelled_at = Column(DateTime, index=True)
@@ -0,0 +1 @@
+# Database and API models package
@@ -0,0 +1,42 @@
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel
+
+# Client-chosen version names become directory names; no separators or dot-only names
+MODEL_VERSION_PATTERN = r"^[A-Za-z0-9][A-Za-z0-9._-]*$"
+
+class PredictionRequest(BaseModel):
+    """Feature rows for one prediction; the default version is used when none is given"""
+    features: List[Any]
+    model_version: Optional[str] = None
+
+class PredictionResponse(BaseModel):
+    request_id: str
+    predictions: Any
+    model_version: str
+    inference_time: float
+    metadata: Optional[Dict[str, Any]] = None
+
+class BatchPredictionRequest(BaseModel):
+    requests: List[PredictionRequest]
+
+class ModelInfo(BaseModel):
+    """A model version as reported by ``ModelManager.get_model_info``"""
+    version: str
+    metadata: Dict[str, Any] = {}
+    loaded: bool = False
+    loaded_at: Optional[str] = None
+    artifact_sha256: Optional[str] = None
+    artifact_size: Optional[int] = None
+    aliases: List[str] = []
+    shadow: Optional[Dict[str, Any]] = None
+    inference_profile: Optional[Dict[str, Any]] = None
+    selection_objective: Optional[str] = None
+
+class ModelUpdateRequest(BaseModel):
+    metadata: Dict[str, Any] = {}
+
+class HealthCheck(BaseModel):
+    status: str
+    timestamp: str
+    version: str
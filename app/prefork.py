@@ -0,0 +1,182 @@
+"""
+Preforking launcher for the serving API.
+
+Models are loaded once in the parent, which then forks the serving
+workers. The workers share the model pages copy-on-write instead of each
+loading a private copy in ``lifespan``. Run with:
+
+    python -m app.prefork --workers 4
+"""
+
+import argparse
+import asyncio
+import gc
+import importlib
+import logging
+import os
+import signal
+import socket
+import time
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Fields of /proc/<pid>/smaps_rollup reported per worker, in kB
+MEMORY_FIELDS = ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty")
+
+def read_memory(pid: int) -> Optional[Dict[str, int]]:
+    """Memory of a process from /proc/<pid>/smaps_rollup, in kB
+
+    PSS splits each shared page between the processes mapping it, so the
+    gap between RSS and PSS is what copy-on-write sharing saves.
+    """
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            lines = f.readlines()
+    except (FileNotFoundError, ProcessLookupError, PermissionError):
+        return None
+
+    memory = {}
+    for line in lines:
+        name, _, value = line.partition(":")
+        if name in MEMORY_FIELDS:
+            memory[name] = int(value.split()[0])
+    return memory
+
+def log_memory_report(pids: List[int]) -> None:
+    """Log RSS vs PSS for the parent and every worker"""
+    total_rss = total_pss = 0
+    for label, pid in [("parent", os.getpid())] + [("worker", pid) for pid in pids]:
+        memory = read_memory(pid)
+        if memory is None:
+            continue
+        total_rss += memory.get("Rss", 0)
+        total_pss += memory.get("Pss", 0)
+        logger.info(
+            f"{label} {pid}: rss={memory.get('Rss', 0) / 1024:.1f}MiB "
+            f"pss={memory.get('Pss', 0) / 1024:.1f}MiB "
+            f"shared={(memory.get('Shared_Clean', 0) + memory.get('Shared_Dirty', 0)) / 1024:.1f}MiB "
+            f"private_dirty={memory.get('Private_Dirty', 0) / 1024:.1f}MiB"
+        )
+    if total_rss:
+        logger.info(
+            f"total: rss={total_rss / 1024:.1f}MiB pss={total_pss / 1024:.1f}MiB "
+            f"(sharing saves {(total_rss - total_pss) / 1024:.1f}MiB)"
+        )
+
+def load_app(import_string: str):
+    """Import an ASGI app given as ``module:attribute``"""
+    module_name, _, attribute = import_string.partition(":")
+    return getattr(importlib.import_module(module_name), attribute or "app")
+
+async def preload_models(app) -> None:
+    """Load every model version into the app state before forking"""
+    from app.ml.model_manager import ModelManager
+
+    model_manager = ModelManager()
+    await model_manager.load_models()
+    # Bundles are otherwise materialized per worker on first request
+    await model_manager.materialize_models()
+    app.state.model_manager = model_manager
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    """Listening socket shared by every worker"""
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+def spawn_worker(app, sock: socket.socket, log_level: str) -> int:
+    """Fork a worker serving ``app`` on the shared socket"""
+    pid = os.fork()
+    if pid:
+        return pid
+
+    # Child: drop the parent's signal handling and serve until told to stop
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    exit_code = 0
+    try:
+        import uvicorn
+
+        config = uvicorn.Config(app, log_level=log_level.lower(), lifespan="on")
+        uvicorn.Server(config).run(sockets=[sock])
+    except BaseException:
+        logger.exception("Worker crashed")
+        exit_code = 1
+    finally:
+        # Skip the parent's atexit handlers and buffered state
+        os._exit(exit_code)
+
+def serve(app, sock: socket.socket, workers: int, log_level: str, report_interval: float) -> None:
+    """Fork the workers and supervise them until SIGTERM or SIGINT"""
+    stopping = False
+    pids: List[int] = []
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    pids.extend(spawn_worker(app, sock, log_level) for _ in range(workers))
+    logger.info(f"Started {workers} workers: {pids}")
+
+    # First report once workers have started up and touched their pages
+    next_report = time.monotonic() + min(report_interval, 10) if report_interval > 0 else None
+    while pids:
+        pid, status = os.waitpid(-1, os.WNOHANG)
+        if pid:
+            pids.remove(pid)
+            if not stopping:
+                logger.warning(f"Worker {pid} exited with status {status}; restarting")
+                pids.append(spawn_worker(app, sock, log_level))
+            continue
+
+        if next_report is not None and time.monotonic() >= next_report and not stopping:
+            log_memory_report(pids)
+            next_report = time.monotonic() + report_interval
+        time.sleep(0.2)
+
+    logger.info("All workers stopped")
+
+def main():
+    parser = argparse.ArgumentParser(description='Preforking ML model server')
+    parser.add_argument('--app', type=str, default='app.main:app', help='ASGI app as module:attribute')
+    parser.add_argument('--host', type=str, default=settings.HOST, help='Bind address')
+    parser.add_argument('--port', type=int, default=settings.PORT, help='Bind port')
+    parser.add_argument('--workers', type=int, default=settings.WORKERS, help='Number of worker processes')
+    parser.add_argument('--memory-report-interval', type=float, default=60.0,
+                        help='Seconds between RSS/PSS reports, 0 disables')
+
+    args = parser.parse_args()
+
+    app = load_app(args.app)
+    logging.basicConfig(level=settings.LOG_LEVEL, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    start_time = time.perf_counter()
+    asyncio.run(preload_models(app))
+    logger.info(f"Loaded models in {time.perf_counter() - start_time:.2f}s")
+
+    sock = bind_socket(args.host, args.port)
+
+    # Move everything allocated so far out of the collector's reach; later
+    # collections in the workers then never write to these shared pages
+    gc.collect()
+    gc.freeze()
+
+    serve(app, sock, args.workers, settings.LOG_LEVEL, args.memory_report_interval)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,375 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from app.core.config import settings
+from app.utils.storage import LocalStorageBackend, ModelStorage
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+REGISTERING = "registering"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+FINISHED_STATES = {SUCCEEDED, FAILED, CANCELLED}
+
+TRAIN = "train"
+UPDATE = "update"
+
+class JobQueueFull(Exception):
+    """Raised when the training queue has no room for another job"""
+
+class JobNotFound(Exception):
+    """Raised for an unknown job id"""
+
+class JobNotCancellable(Exception):
+    """Raised when cancelling a job that has already started"""
+
+# Set in each training process by _init_worker
+_progress_queue = None
+
+def _init_worker(progress_queue, nice: int, threads: int, memory_limit_mb: int) -> None:
+    """Make a training process a polite neighbour of the serving workers"""
+    global _progress_queue
+    _progress_queue = progress_queue
+    if nice:
+        os.nice(nice)
+    for variable in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+        os.environ[variable] = str(threads)
+    if memory_limit_mb:
+        import resource
+        limit = memory_limit_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+def _report(job_id: str, event: str, **fields: Any) -> None:
+    if _progress_queue is not None:
+        _progress_queue.put({"job_id": job_id, "event": event, **fields})
+
+def run_training_job(job_id: str, spec: Dict[str, Any]) -> Dict[str, Any]:
+    """Train one model in a worker process; returns the version and the storage it was published in"""
+    # Imported here so the serving process never loads the training stack
+    from threadpoolctl import threadpool_limits
+    from training_pipeline.pipeline import STAGES, TrainingPipeline
+
+    _report(job_id, "started", stages_total=len(STAGES))
+    spec = dict(spec)
+    threads = spec.pop("threads")
+    version = spec.pop("version", None) or f"job-{job_id[:8]}"
+    output_dir = Path(spec.pop("output_dir"))
+    pipeline = TrainingPipeline(
+        **spec,
+        output_dir=str(output_dir),
+        cache_dir=str(output_dir / ".stage_cache"),
+        memmap_dir=str(output_dir / ".memmap"),
+        backend="threading",
+        n_jobs=threads
+    )
+
+    def on_stage(name: str, timing: Dict[str, Any]) -> None:
+        _report(job_id, "stage", stage=name, timing=timing)
+
+    with threadpool_limits(limits=threads):
+        version = asyncio.run(pipeline.run(version, on_stage=on_stage))
+
+    return {"version": version, "output_dir": str(output_dir)}
+
+def run_update_job(job_id: str, spec: Dict[str, Any]) -> Dict[str, Any]:
+    """Update a model from feedback in a worker process; returns the version and the storage it was published in"""
+    from threadpoolctl import threadpool_limits
+    from training_pipeline.incremental import UPDATE_STAGES, incremental_update
+
+    _report(job_id, "started", stages_total=len(UPDATE_STAGES))
+
+    def on_stage(name: str, timing: Dict[str, Any]) -> None:
+        _report(job_id, "stage", stage=name, timing=timing)
+
+    with threadpool_limits(limits=spec["threads"]):
+        incremental_update(
+            spec["base_model_path"],
+            spec["base_version"],
+            spec["base_metadata"],
+            spec["feedback_path"],
+            spec["version"],
+            spec["output_dir"],
+            chunk_size=spec["chunk_size"],
+            on_stage=on_stage
+        )
+
+    return {"version": spec["version"], "output_dir": spec["output_dir"]}
+
+class TrainingJob:
+    """State of one training job, as reported by the status endpoints"""
+
+    def __init__(self, job_id: str, spec: Dict[str, Any], kind: str = TRAIN):
+        self.id = job_id
+        self.kind = kind
+        self.spec = spec
+        self.status = QUEUED
+        self.created_at = datetime.now()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.stages: Dict[str, Dict[str, Any]] = {}
+        self.stages_total: Optional[int] = None
+        self.version: Optional[str] = None
+        self.error: Optional[str] = None
+        self.future: Optional[Future] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "spec": self.spec,
+            "created_at": self.created_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "progress": {
+                "stages_done": len(self.stages),
+                "stages_total": self.stages_total,
+                "stages": self.stages
+            },
+            "version": self.version,
+            "error": self.error
+        }
+
+class TrainingJobQueue:
+    """Runs training jobs in a separate process pool and registers the results.
+
+    Jobs run in ``TRAINING_WORKERS`` spawned processes (never forked from the
+    serving process), each niced and limited to ``TRAINING_THREADS`` threads
+    and optionally ``TRAINING_MEMORY_LIMIT_MB`` of address space, so serving
+    keeps its CPU. At most ``TRAINING_MAX_QUEUE`` jobs wait for a worker;
+    further submissions raise JobQueueFull. Workers report stage progress
+    over a queue drained by a background thread. Workers publish a finished
+    model in the output directory's manifest; it is then copied with all
+    its files through ``ModelManager.import_model``, which stores and loads
+    it like an uploaded one.
+
+    Besides full training runs, the queue runs incremental updates: the
+    feedback labelled since a version was built is exported from the
+    prediction log and folded into a copy of it with ``partial_fit``.
+    """
+
+    def __init__(self, model_manager, max_workers: Optional[int] = None, max_queue: Optional[int] = None):
+        self.model_manager = model_manager
+        self.max_workers = max_workers or settings.TRAINING_WORKERS
+        self.max_queue = settings.TRAINING_MAX_QUEUE if max_queue is None else max_queue
+        self.jobs: Dict[str, TrainingJob] = {}
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._progress_queue = None
+        self._progress_thread: Optional[threading.Thread] = None
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            context = multiprocessing.get_context("spawn")
+            self._progress_queue = context.Queue()
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=context,
+                initializer=_init_worker,
+                initargs=(
+                    self._progress_queue,
+                    settings.TRAINING_NICE,
+                    settings.TRAINING_THREADS,
+                    settings.TRAINING_MEMORY_LIMIT_MB
+                )
+            )
+            self._progress_thread = threading.Thread(
+                target=self._drain_progress,
+                args=(self._progress_queue,),
+                name="training-progress",
+                daemon=True
+            )
+            self._progress_thread.start()
+        return self._executor
+
+    def _drain_progress(self, progress_queue) -> None:
+        # Its own reference: shutdown drops the queue's attribute while this runs
+        while True:
+            try:
+                message = progress_queue.get()
+            except (EOFError, OSError, ValueError):
+                return
+            if message is None:
+                return
+            job = self.jobs.get(message["job_id"])
+            if job is None:
+                continue
+            if message["event"] == "started":
+                # The result may already have been handled
+                if job.status == QUEUED:
+                    job.status = RUNNING
+                job.started_at = datetime.now()
+                job.stages_total = message["stages_total"]
+            elif message["event"] == "stage":
+                job.stages[message["stage"]] = message["timing"]
+
+    def submit(self, spec: Dict[str, Any]) -> TrainingJob:
+        """Queue a training job; ``spec`` holds TrainingPipeline arguments and an optional version
+
+        Raises ValueError for data outside ``TRAINING_DATA_DIR`` and
+        JobQueueFull when the queue is at capacity.
+        """
+        data_root = Path(settings.TRAINING_DATA_DIR).resolve()
+        data_path = (data_root / spec["data_path"]).resolve()
+        if data_root not in data_path.parents or not data_path.is_file():
+            raise ValueError(f"Training data not found under {settings.TRAINING_DATA_DIR}: {spec['data_path']}")
+
+        self._check_capacity()
+
+        job = TrainingJob(uuid.uuid4().hex, dict(spec))
+        # Workers get every setting they need from here, not their own environment
+        worker_spec = {
+            **spec,
+            "data_path": str(data_path),
+            "output_dir": str(Path(settings.TRAINING_OUTPUT_DIR).resolve()),
+            "threads": settings.TRAINING_THREADS
+        }
+        return self._enqueue(job, run_training_job, worker_spec)
+
+    async def submit_update(self, base_version: str, version: Optional[str] = None) -> TrainingJob:
+        """Queue an incremental update of ``base_version`` from the feedback labelled since it was built
+
+        Raises ValueError when the base version is unknown, cannot be updated
+        incrementally or has no new feedback, and JobQueueFull when the queue
+        is at capacity.
+        """
+        prediction_log = self.model_manager.prediction_log
+        if prediction_log is None:
+            raise ValueError("Prediction logging is disabled, so there is no feedback to learn from")
+        metadata = self.model_manager.model_metadata.get(base_version)
+        if metadata is None:
+            raise ValueError(f"Model version {base_version} not found")
+        # Bundles are registered from their header; the model is needed here
+        model = await self.model_manager.get_model(base_version)
+        if not callable(getattr(model, "partial_fit", None)):
+            raise ValueError(
+                f"{type(model).__name__} does not support partial_fit; retrain it with a full training job"
+            )
+        self._check_capacity()
+
+        # Only feedback for this version's lineage that it has not seen yet
+        incremental = metadata.get("incremental", {})
+        lineage = incremental.get("lineage") or [base_version]
+        since = incremental.get("labelled_through")
+        rows = await prediction_log.labelled_rows(
+            lineage, datetime.fromisoformat(since) if since else None
+        )
+        if not rows.labels:
+            raise ValueError(f"No new feedback for model version {base_version}")
+
+        job_id = uuid.uuid4().hex
+        version = version or f"{base_version}-inc-{job_id[:8]}"
+        output_dir = Path(settings.TRAINING_OUTPUT_DIR).resolve()
+        feedback_path = output_dir / "feedback" / f"{job_id}.npz"
+        feedback_path.parent.mkdir(parents=True, exist_ok=True)
+        np.savez(
+            feedback_path,
+            X=np.asarray(rows.features),
+            y=np.asarray(rows.labels),
+            predictions=np.asarray(rows.predictions),
+            lineage=np.asarray(lineage),
+            labelled_through=np.asarray(rows.labelled_through.isoformat())
+        )
+
+        job = TrainingJob(
+            job_id,
+            {"base_version": base_version, "version": version, "rows": len(rows.labels), "requests": rows.requests},
+            kind=UPDATE
+        )
+        worker_spec = {
+            "base_version": base_version,
+            "base_model_path": str(await self.model_manager.storage.get_model_path(base_version)),
+            "base_metadata": metadata,
+            "feedback_path": str(feedback_path),
+            "version": version,
+            "output_dir": str(output_dir),
+            "chunk_size": settings.INCREMENTAL_CHUNK_SIZE,
+            "threads": settings.TRAINING_THREADS
+        }
+        return self._enqueue(job, run_update_job, worker_spec)
+
+    def _check_capacity(self) -> None:
+        active = sum(1 for job in self.jobs.values() if job.status not in FINISHED_STATES)
+        if active >= self.max_workers + self.max_queue:
+            raise JobQueueFull(f"{active} training jobs already queued or running")
+
+    def _enqueue(self, job: TrainingJob, function: Callable, worker_spec: Dict[str, Any]) -> TrainingJob:
+        # Registered first so the worker's progress always finds the job
+        self.jobs[job.id] = job
+        job.future = self._get_executor().submit(function, job.id, worker_spec)
+        self._tasks[job.id] = asyncio.create_task(self._finish(job))
+        self._prune()
+        logger.info(f"Queued {job.kind} job {job.id}")
+        return job
+
+    async def _finish(self, job: TrainingJob) -> None:
+        try:
+            result = await asyncio.wrap_future(job.future)
+            job.status = REGISTERING
+            job.version = result["version"]
+            # Every file of the version (a compiled forest, a bundle) comes along
+            output = ModelStorage(LocalStorageBackend(result["output_dir"]))
+            await self.model_manager.import_model(output, job.version)
+            job.status = SUCCEEDED
+            logger.info(f"Training job {job.id} registered model version {job.version}")
+        except asyncio.CancelledError:
+            job.status = CANCELLED
+        except Exception as e:
+            job.status = FAILED
+            job.error = str(e)
+            logger.error(f"Training job {job.id} failed: {str(e)}")
+        finally:
+            job.finished_at = datetime.now()
+            self._tasks.pop(job.id, None)
+
+    def get(self, job_id: str) -> TrainingJob:
+        job = self.jobs.get(job_id)
+        if job is None:
+            raise JobNotFound(job_id)
+        return job
+
+    def list(self) -> List[TrainingJob]:
+        return sorted(self.jobs.values(), key=lambda job: job.created_at, reverse=True)
+
+    def cancel(self, job_id: str) -> TrainingJob:
+        """Cancel a job that has not started; running jobs finish"""
+        job = self.get(job_id)
+        if job.status in FINISHED_STATES:
+            return job
+        if job.status != QUEUED or not job.future.cancel():
+            raise JobNotCancellable(job_id)
+        job.status = CANCELLED
+        return job
+
+    def _prune(self) -> None:
+        """Forget the oldest finished jobs beyond TRAINING_JOB_HISTORY"""
+        finished = [job for job in self.list() if job.status in FINISHED_STATES]
+        for job in finished[settings.TRAINING_JOB_HISTORY:]:
+            del self.jobs[job.id]
+
+    def shutdown(self) -> None:
+        """Stop accepting work; queued jobs are cancelled and running ones abandoned"""
+        for task in self._tasks.values():
+            task.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        if self._progress_queue is not None:
+            self._progress_queue.put(None)
+            self._progress_thread.join(timeout=5)
+            self._progress_queue = None
+            self._progress_thread = None
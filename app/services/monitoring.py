@@ -1,7 +1,6 @@
 import logging
 from typing import Dict, List, Any
 from datetime import datetime, timedelta
-import pandas as pd
 import numpy as np
 
 logger = logging.getLogger(__name__)
@@ -1,23 +1,31 @@
+import inspect
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 import pandas as pd
 from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestClassifier
-import joblib
-import json
+import numpy as np
 from datetime import datetime
 
+from app.core.config import settings
+from app.ml.bundle import encode_bundle
+from app.ml.preprocessor import DataPreprocessor
+from app.utils.storage import BUNDLE_FILE_NAME, ModelStorage
+
 logger = logging.getLogger(__name__)
 
 class TrainingService:
-    def __init__(self):
+    def __init__(self, storage: Optional[ModelStorage] = None):
         self.model = None
+        # Created on first save, on the configured backend, unless given
+        self.storage = storage
     
     async def train_model(self, data: pd.DataFrame, target: str) -> Dict[str, Any]:
         """Train a machine learning model"""
         try:
             # Split data
-            X = data.drop(columns=[target])
+            # Trained in the precision the model will be served at
+            X = data.drop(columns=[target]).astype(settings.TRAINING_FEATURE_DTYPE)
             y = data[target]
             
             X_train, X_test, y_train, y_test = train_test_split(
@@ -38,6 +46,7 @@ class TrainingService:
                 "training_date": datetime.now().isoformat(),
                 "features": list(X.columns),
                 "target": target,
+                "feature_dtype": np.dtype(settings.TRAINING_FEATURE_DTYPE).name,
                 "performance": {
                     "train_accuracy": train_score,
                     "test_accuracy": test_score
@@ -48,10 +57,20 @@ class TrainingService:
                 }
             }
             
+            # Training distribution, kept in the bundle for drift checks
+            X_values = X_train.to_numpy(dtype=np.float64)
+            reference_stats = {
+                "mean": X_values.mean(axis=0),
+                "std": X_values.std(axis=0),
+                "min": X_values.min(axis=0),
+                "max": X_values.max(axis=0)
+            }
+            
             return {
                 "success": True,
                 "model": self.model,
-                "metadata": metadata
+                "metadata": metadata,
+                "reference_stats": reference_stats
             }
             
         except Exception as e:
@@ -61,17 +80,37 @@ class TrainingService:
                 "error": str(e)
             }
     
-    async def save_model(self, model, metadata: Dict[str, Any], version: str) -> bool:
-        """Save trained model and metadata"""
+    async def save_model(
+        self,
+        model,
+        metadata: Dict[str, Any],
+        version: str,
+        preprocessor: Optional[DataPreprocessor] = None,
+        reference_stats: Optional[Dict[str, np.ndarray]] = None
+    ) -> bool:
+        """Save trained model, metadata and fitted preprocessing as one bundle
+
+        ``preprocessor`` is what serving runs on request features before the
+        model: an object with ``async process(features, config)``, such as a
+        fitted DataPreprocessor. Anything else raises TypeError.
+        """
+        if preprocessor is not None and not inspect.iscoroutinefunction(getattr(preprocessor, "process", None)):
+            raise TypeError(
+                f"{type(preprocessor).__name__} has no async process(features, config); "
+                "serving could not apply it"
+            )
+        
         try:
-            # Save model
-            model_path = f"models/{version}/model.joblib"
-            joblib.dump(model, model_path)
-            
-            # Save metadata
-            metadata_path = f"models/{version}/metadata.json"
-            with open(metadata_path, 'w') as f:
-                json.dump(metadata, f, indent=2)
+            bundle_data = encode_bundle(
+                model,
+                metadata,
+                preprocessing=preprocessor,
+                reference_stats=reference_stats
+            )
+            # Published in the manifest, so every backend and watcher sees it
+            if self.storage is None:
+                self.storage = ModelStorage()
+            await self.storage.save_model(version, bundle_data, metadata, BUNDLE_FILE_NAME)
             
             return True
             
@@ -0,0 +1,242 @@
+import fcntl
+import hashlib
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, List, NamedTuple, Optional, Tuple
+
+from app.utils.logger import logger
+
+class ArtifactInfo(NamedTuple):
+    """What a source knows about an artifact before downloading it"""
+    size: int
+    sha256: Optional[str] = None
+    etag: Optional[str] = None
+
+class ArtifactIntegrityError(Exception):
+    """Raised when a downloaded artifact does not match its expected digest"""
+
+class ArtifactCache:
+    """Node-local, content-addressed cache for remote model artifacts.
+
+    Artifacts are stored once per SHA-256 under ``objects/`` and shared by
+    every process on the node. A source is any object with:
+
+    - ``stat(key) -> ArtifactInfo``
+    - ``read_range(key, start, end) -> bytes`` returning bytes ``[start, end)``
+
+    When the source does not publish a digest, the cache remembers the
+    digest it computed under the object's ETag in ``refs/``.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        max_bytes: int,
+        chunk_size: int = 16 * 1024 * 1024,
+        max_workers: int = 8
+    ):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers
+
+        self.objects_dir = self.root / "objects"
+        self.refs_dir = self.root / "refs"
+        self.locks_dir = self.root / "locks"
+        self.tmp_dir = self.root / "tmp"
+        for directory in (self.objects_dir, self.refs_dir, self.locks_dir, self.tmp_dir):
+            directory.mkdir(parents=True, exist_ok=True)
+
+    def fetch(
+        self,
+        source,
+        key: str,
+        suffix: str = "",
+        info: Optional[ArtifactInfo] = None
+    ) -> Path:
+        """Return a local path for the artifact, downloading it at most once
+
+        Passing ``info`` with a known digest (e.g. from a manifest) skips the
+        ``stat`` round trip, so a cache hit makes no request at all.
+        """
+        if info is None:
+            info = source.stat(key)
+        digest = info.sha256 or self._read_ref(key, info.etag)
+
+        if digest:
+            cached = self._lookup(digest, suffix)
+            if cached is not None:
+                return cached
+
+        # Lock on the digest when known, otherwise on the object identity
+        lock_name = digest or self._ref_name(key, info.etag)
+        with self._lock(lock_name):
+            # Another process may have fetched it while we waited for the lock
+            digest = info.sha256 or self._read_ref(key, info.etag)
+            if digest:
+                cached = self._lookup(digest, suffix)
+                if cached is not None:
+                    return cached
+
+            path = self._download(source, key, info, suffix)
+
+        self._evict(protect=path)
+        return path
+
+    def object_path(self, digest: str, suffix: str = "") -> Path:
+        """Location of a cached artifact with the given digest"""
+        return self.objects_dir / digest[:2] / f"{digest}{suffix}"
+
+    def size(self) -> int:
+        """Total bytes currently held in the cache"""
+        return sum(size for _, size, _ in self._entries())
+
+    def _lookup(self, digest: str, suffix: str) -> Optional[Path]:
+        """Return a cached artifact and mark it recently used"""
+        path = self.object_path(digest, suffix)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def _download(self, source, key: str, info: ArtifactInfo, suffix: str) -> Path:
+        """Download an artifact in parallel ranges and verify it on arrival"""
+        start_time = time.perf_counter()
+        ranges = [
+            (start, min(start + self.chunk_size, info.size))
+            for start in range(0, info.size, self.chunk_size)
+        ]
+
+        fd, tmp_name = tempfile.mkstemp(dir=self.tmp_dir)
+        try:
+            os.ftruncate(fd, info.size)
+
+            def fetch_range(byte_range: Tuple[int, int]) -> None:
+                start, end = byte_range
+                data = source.read_range(key, start, end)
+                if len(data) != end - start:
+                    raise ArtifactIntegrityError(
+                        f"Short read for {key} at {start}: {len(data)} of {end - start} bytes"
+                    )
+                os.pwrite(fd, data, start)
+
+            if len(ranges) <= 1:
+                for byte_range in ranges:
+                    fetch_range(byte_range)
+            else:
+                with ThreadPoolExecutor(max_workers=min(self.max_workers, len(ranges))) as pool:
+                    list(pool.map(fetch_range, ranges))
+
+            digest = self._hash_fd(fd)
+            if info.sha256 and digest != info.sha256:
+                raise ArtifactIntegrityError(
+                    f"Digest mismatch for {key}: expected {info.sha256}, got {digest}"
+                )
+
+            path = self.object_path(digest, suffix)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(tmp_name, path)
+        except BaseException:
+            os.unlink(tmp_name)
+            raise
+        finally:
+            os.close(fd)
+
+        if not info.sha256:
+            self._write_ref(key, info.etag, digest)
+
+        logger.info(
+            f"Fetched artifact {key} ({info.size} bytes, {len(ranges)} ranges) "
+            f"in {time.perf_counter() - start_time:.2f}s"
+        )
+        return path
+
+    @staticmethod
+    def _hash_fd(fd: int) -> str:
+        """SHA-256 of an open file's contents"""
+        digest = hashlib.sha256()
+        offset = 0
+        while True:
+            block = os.pread(fd, 1024 * 1024, offset)
+            if not block:
+                return digest.hexdigest()
+            digest.update(block)
+            offset += len(block)
+
+    @staticmethod
+    def _ref_name(key: str, etag: Optional[str]) -> str:
+        """Stable file name for an (object key, etag) pair"""
+        return hashlib.sha256(f"{key}\0{etag or ''}".encode()).hexdigest()
+
+    def _read_ref(self, key: str, etag: Optional[str]) -> Optional[str]:
+        """Digest previously computed for an object without a published hash"""
+        if not etag:
+            return None
+        try:
+            return (self.refs_dir / self._ref_name(key, etag)).read_text().strip()
+        except FileNotFoundError:
+            return None
+
+    def _write_ref(self, key: str, etag: Optional[str], digest: str) -> None:
+        """Remember the digest of an object without a published hash"""
+        if not etag:
+            return
+        ref_path = self.refs_dir / self._ref_name(key, etag)
+        tmp_path = ref_path.with_suffix(".tmp")
+        tmp_path.write_text(digest)
+        os.replace(tmp_path, ref_path)
+
+    @contextmanager
+    def _lock(self, name: str, blocking: bool = True) -> Iterator[bool]:
+        """Cross-process lock on a cache entry, yielding whether it was acquired"""
+        with open(self.locks_dir / f"{name}.lock", "a") as lock_file:
+            flags = fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+            try:
+                fcntl.flock(lock_file, flags)
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _entries(self) -> List[Tuple[float, int, Path]]:
+        """(last used, size, path) for every cached artifact"""
+        entries = []
+        for path in self.objects_dir.glob("*/*"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _evict(self, protect: Optional[Path] = None) -> None:
+        """Remove least recently used artifacts until under the size bound"""
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_bytes:
+            return
+
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path == protect:
+                continue
+            digest = path.name[:64]
+            # Skip entries another process is downloading or replacing
+            with self._lock(digest, blocking=False) as acquired:
+                if not acquired:
+                    continue
+                try:
+                    path.unlink()
+                except FileNotFoundError:
+                    continue
+            total -= size
+            logger.info(f"Evicted cached artifact {path.name} ({size} bytes)")
@@ -4,6 +4,13 @@ from typing import Any, Dict
 import json
 from datetime import datetime
 
+import numpy as np
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 def generate_id() -> str:
     """Generate a unique ID"""
     return str(uuid.uuid4())
@@ -25,6 +32,26 @@ def safe_json_dumps(data: Any) -> str:
     
     return json.dumps(data, default=default_serializer)
 
+def _fast_json_default(obj: Any) -> Any:
+    """Serialize values neither encoder handles natively"""
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    raise TypeError(f"Type {type(obj)} not serializable")
+
+def fast_json_dumps(data: Any) -> bytes:
+    """Convert data to compact JSON bytes, encoding numpy arrays directly"""
+    if orjson is not None:
+        return orjson.dumps(
+            data,
+            default=_fast_json_default,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        )
+    return json.dumps(data, default=_fast_json_default, separators=(",", ":")).encode()
+
 def hash_data(data: Any) -> str:
     """Generate hash for data"""
     data_str = safe_json_dumps(data)
@@ -1,6 +1,12 @@
 # Utilities package
 from app.utils.logger import logger, setup_logging
-from app.utils.storage import ModelStorage
 from app.utils.helpers import generate_id, format_bytes
 
-__all__ = ["logger", "setup_logging", "ModelStorage", "generate_id", "format_bytes"]
\ No newline at end of file
+__all__ = ["logger", "setup_logging", "ModelStorage", "generate_id", "format_bytes"]
+
+def __getattr__(name):
+    # Storage pulls in the backends and their SDKs; load it on first use
+    if name == "ModelStorage":
+        from app.utils.storage import ModelStorage
+        return ModelStorage
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
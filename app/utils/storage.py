@@ -1,17 +1,551 @@
 import logging
+import copy
+import fcntl
+import hashlib
+import json
+import os
 import aiofiles
-import aiohttp
 import asyncio
-from typing import Optional, List, Dict, Any
+from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Optional, List, Dict, Any, AsyncIterator, Callable, Tuple
 from pathlib import Path
-import boto3
-from botocore.exceptions import ClientError
 import tempfile
 
 from app.core.config import settings
+from app.ml.bundle import BUNDLE_SUFFIX
+from app.utils.artifact_cache import ArtifactCache, ArtifactInfo
 from app.utils.logger import logger
 
-class ModelStorage:
+# In order of preference; a compiled forest is served ahead of the sklearn model it came from
+MODEL_FILE_NAMES = ["model.mlb", "model.forest", "model.joblib", "model.pkl", "model.h5", "model.onnx"]
+METADATA_FILE_NAME = "metadata.json"
+BUNDLE_FILE_NAME = f"model{BUNDLE_SUFFIX}"
+MANIFEST_FILE_NAME = "manifest.json"
+# Conditional manifest writes retried before giving up under contention
+MANIFEST_UPDATE_ATTEMPTS = 5
+
+class StorageBackend(ABC):
+    """Where model artifacts live.
+
+    Backends deal in names relative to the storage root
+    (``v1/model.joblib``, ``manifest.json``). Version discovery goes through
+    the manifest that ModelStorage maintains on top of them.
+    """
+
+    @abstractmethod
+    async def read_bytes(self, name: str) -> Optional[bytes]:
+        """Read a small object, or None if it does not exist"""
+
+    @abstractmethod
+    async def write_bytes(self, name: str, data: bytes) -> None:
+        """Write an object, replacing any existing one"""
+
+    @abstractmethod
+    async def delete(self, name: str) -> None:
+        """Remove an object if it exists"""
+
+    @abstractmethod
+    async def stamp(self, name: str) -> Optional[str]:
+        """Cheap token that changes whenever the object changes"""
+
+    @abstractmethod
+    async def local_path(self, name: str, sha256: Optional[str], size: Optional[int]) -> str:
+        """Get a local file path for an object"""
+
+    @abstractmethod
+    async def list_files(self) -> List[Tuple[str, int, Optional[str], Optional[str]]]:
+        """(name, size, sha256, etag) for every object, used to rebuild the manifest
+
+        Backends that cannot list digests return the sha256 as None and an
+        etag that changes with the content instead.
+        """
+
+    @asynccontextmanager
+    async def exclusive(self, name: str) -> AsyncIterator[None]:
+        """Keep writers in other processes away from an object for a read-modify-write"""
+        yield
+
+    async def write_bytes_if(self, name: str, data: bytes, stamp: Optional[str]) -> bool:
+        """Write an object only if its stamp is still ``stamp`` (None: absent); False if it changed
+
+        Only atomic under ``exclusive``; backends with conditional writes
+        override it.
+        """
+        if await self.stamp(name) != stamp:
+            return False
+        await self.write_bytes(name, data)
+        return True
+
+class LocalStorageBackend(StorageBackend):
+    """Artifacts in a directory on the local filesystem"""
+
+    def __init__(self, base_path: str):
+        self.base_path = Path(base_path)
+        self.base_path.mkdir(parents=True, exist_ok=True)
+
+    async def read_bytes(self, name: str) -> Optional[bytes]:
+        try:
+            async with aiofiles.open(self.base_path / name, 'rb') as f:
+                return await f.read()
+        except FileNotFoundError:
+            return None
+
+    async def write_bytes(self, name: str, data: bytes) -> None:
+        path = self.base_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write then rename so readers never see a partial file
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        async with aiofiles.open(tmp_path, 'wb') as f:
+            await f.write(data)
+        os.replace(tmp_path, path)
+
+    async def delete(self, name: str) -> None:
+        try:
+            (self.base_path / name).unlink()
+        except FileNotFoundError:
+            pass
+
+    async def stamp(self, name: str) -> Optional[str]:
+        try:
+            stat = (self.base_path / name).stat()
+        except FileNotFoundError:
+            return None
+        return f"{stat.st_mtime_ns}:{stat.st_size}"
+
+    async def local_path(self, name: str, sha256: Optional[str], size: Optional[int]) -> str:
+        path = self.base_path / name
+        if not path.exists():
+            raise FileNotFoundError(f"Artifact not found: {path}")
+        return str(path)
+
+    @asynccontextmanager
+    async def exclusive(self, name: str) -> AsyncIterator[None]:
+        # flock on a sibling lock file: serving workers and training
+        # processes writing the same directory take turns
+        with open(self.base_path / f".{name}.lock", "a") as lock_file:
+            await asyncio.to_thread(fcntl.flock, lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    async def list_files(self) -> List[Tuple[str, int, Optional[str], Optional[str]]]:
+        files = []
+        for path in sorted(self.base_path.glob("*/*")):
+            if path.is_file() and not path.name.startswith("."):
+                data = path.read_bytes()
+                files.append((
+                    path.relative_to(self.base_path).as_posix(),
+                    len(data),
+                    hashlib.sha256(data).hexdigest(),
+                    None
+                ))
+        return files
+
+class MemoryStorageBackend(StorageBackend):
+    """Artifacts held in process memory, for tests and ephemeral deployments"""
+
     def __init__(self):
+        self.objects: Dict[str, bytes] = {}
+        self.generations: Dict[str, int] = {}
+        self._spill_dir = Path(tempfile.mkdtemp(prefix="ml-model-storage-"))
+
+    async def read_bytes(self, name: str) -> Optional[bytes]:
+        return self.objects.get(name)
+
+    async def write_bytes(self, name: str, data: bytes) -> None:
+        self.objects[name] = data
+        self.generations[name] = self.generations.get(name, 0) + 1
+
+    async def delete(self, name: str) -> None:
+        self.objects.pop(name, None)
+        self.generations.pop(name, None)
+
+    async def stamp(self, name: str) -> Optional[str]:
+        generation = self.generations.get(name)
+        return None if generation is None else str(generation)
+
+    async def local_path(self, name: str, sha256: Optional[str], size: Optional[int]) -> str:
+        data = self.objects.get(name)
+        if data is None:
+            raise FileNotFoundError(f"Artifact not found: {name}")
+        # Loaders need a real file; spill each distinct artifact once
+        digest = sha256 or hashlib.sha256(data).hexdigest()
+        path = self._spill_dir / f"{digest}{Path(name).suffix}"
+        if not path.exists():
+            path.write_bytes(data)
+        return str(path)
+
+    async def list_files(self) -> List[Tuple[str, int, Optional[str], Optional[str]]]:
+        return [
+            (name, len(data), hashlib.sha256(data).hexdigest(), None)
+            for name, data in sorted(self.objects.items())
+            if name != MANIFEST_FILE_NAME
+        ]
+
+def _is_not_found(error: Exception) -> bool:
+    """Whether a boto3 error means the object does not exist"""
+    from botocore.exceptions import ClientError
+    return (
+        isinstance(error, ClientError)
+        and error.response.get("Error", {}).get("Code") in ("404", "NoSuchKey")
+    )
+
+def _is_write_conflict(error: Exception) -> bool:
+    """Whether a boto3 error means a conditional write lost to another writer"""
+    from botocore.exceptions import ClientError
+    return (
+        isinstance(error, ClientError)
+        and error.response.get("Error", {}).get("Code") in ("PreconditionFailed", "ConditionalRequestConflict")
+    )
+
+class S3ArtifactSource:
+    """Artifact source reading objects from an S3 bucket"""
+
+    def __init__(self, client, bucket: str):
+        self.client = client
+        self.bucket = bucket
+
+    def stat(self, key: str) -> ArtifactInfo:
+        response = self.client.head_object(Bucket=self.bucket, Key=key)
+        return ArtifactInfo(
+            size=response["ContentLength"],
+            sha256=response.get("Metadata", {}).get("sha256"),
+            etag=response.get("ETag")
+        )
+
+    def read_range(self, key: str, start: int, end: int) -> bytes:
+        response = self.client.get_object(
+            Bucket=self.bucket,
+            Key=key,
+            Range=f"bytes={start}-{end - 1}"
+        )
+        return response["Body"].read()
+
+class S3StorageBackend(StorageBackend):
+    """Artifacts in an S3 bucket, served through the node-local artifact cache"""
+
+    def __init__(self, bucket: str, prefix: str):
+        # Imported here so local deployments never load the AWS SDK
+        import boto3
+
+        self.s3_client = boto3.client(
+            's3',
+            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+            region_name=settings.AWS_REGION
+        )
+        self.bucket = bucket
+        self.prefix = prefix
+        self.source = S3ArtifactSource(self.s3_client, bucket)
+        self.artifact_cache = ArtifactCache(
+            settings.ARTIFACT_CACHE_DIR,
+            max_bytes=settings.ARTIFACT_CACHE_MAX_BYTES,
+            chunk_size=settings.ARTIFACT_DOWNLOAD_CHUNK_SIZE,
+            max_workers=settings.ARTIFACT_DOWNLOAD_CONCURRENCY
+        )
+
+    def _key(self, name: str) -> str:
+        return f"{self.prefix}/{name}"
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+    async def read_bytes(self, name: str) -> Optional[bytes]:
+        try:
+            response = await self._run(
+                lambda: self.s3_client.get_object(Bucket=self.bucket, Key=self._key(name))
+            )
+            return await self._run(response["Body"].read)
+        except Exception as e:
+            if _is_not_found(e):
+                return None
+            raise
+
+    async def write_bytes(self, name: str, data: bytes) -> None:
+        # Publish the digest so the artifact cache can verify downloads
+        await self._run(lambda: self.s3_client.put_object(
+            Bucket=self.bucket,
+            Key=self._key(name),
+            Body=data,
+            Metadata={"sha256": hashlib.sha256(data).hexdigest()}
+        ))
+
+    async def delete(self, name: str) -> None:
+        await self._run(lambda: self.s3_client.delete_object(Bucket=self.bucket, Key=self._key(name)))
+
+    async def write_bytes_if(self, name: str, data: bytes, stamp: Optional[str]) -> bool:
+        # Conditional put: S3 refuses it if another writer replaced the object
+        condition = {"IfMatch": stamp} if stamp is not None else {"IfNoneMatch": "*"}
+        try:
+            await self._run(lambda: self.s3_client.put_object(
+                Bucket=self.bucket,
+                Key=self._key(name),
+                Body=data,
+                Metadata={"sha256": hashlib.sha256(data).hexdigest()},
+                **condition
+            ))
+        except Exception as e:
+            if _is_write_conflict(e):
+                return False
+            raise
+        return True
+
+    async def stamp(self, name: str) -> Optional[str]:
+        try:
+            response = await self._run(
+                lambda: self.s3_client.head_object(Bucket=self.bucket, Key=self._key(name))
+            )
+        except Exception as e:
+            if _is_not_found(e):
+                return None
+            raise
+        return response.get("ETag")
+
+    async def local_path(self, name: str, sha256: Optional[str], size: Optional[int]) -> str:
+        # With a digest from the manifest a cache hit needs no request at all
+        info = ArtifactInfo(size=size, sha256=sha256) if sha256 and size is not None else None
+        path = await self._run(
+            self.artifact_cache.fetch, self.source, self._key(name), Path(name).suffix, info
+        )
+        return str(path)
+
+    async def list_files(self) -> List[Tuple[str, int, Optional[str], Optional[str]]]:
+        def list_objects():
+            files = []
+            paginator = self.s3_client.get_paginator('list_objects_v2')
+            for page in paginator.paginate(Bucket=self.bucket, Prefix=f"{self.prefix}/"):
+                for obj in page.get('Contents', []):
+                    name = obj['Key'][len(self.prefix) + 1:]
+                    if name != MANIFEST_FILE_NAME:
+                        # Listings carry no digest; the ETag changes with the content
+                        files.append((name, obj['Size'], None, obj.get('ETag')))
+            return files
+
+        return await self._run(list_objects)
+
+def create_storage_backend(storage_type: str) -> StorageBackend:
+    """Create the backend selected by MODEL_STORAGE_TYPE"""
+    if storage_type == "local":
+        return LocalStorageBackend(settings.MODEL_STORAGE_PATH)
+    if storage_type == "memory":
+        return MemoryStorageBackend()
+    if storage_type == "s3":
+        return S3StorageBackend(settings.AWS_S3_BUCKET, Path(settings.MODEL_STORAGE_PATH).name)
+    raise ValueError(f"Unsupported model storage type: {storage_type}")
+
+class ModelStorage:
+    """Model versions stored on a backend and indexed by a manifest.
+
+    ``manifest.json`` at the storage root records every version with the
+    size and SHA-256 of its files, so discovery is a single read. The
+    manifest is rebuilt from a full listing only if it is missing. Updates
+    are read-modify-write under a lock in this process and, across
+    processes (prefork workers, training jobs), under the backend's
+    exclusive hold and conditional write, retried on conflict, so
+    concurrent saves and deletes never drop each other's versions.
+    """
+
+    def __init__(self, backend: Optional[StorageBackend] = None):
         self.storage_type = settings.MODEL_STORAGE_TYPE
-        self.base_path = Path(settings.M
\ No newline at end of file
+        self.backend = backend or create_storage_backend(self.storage_type)
+        self._manifest: Optional[Dict[str, Any]] = None
+        self._manifest_stamp: Optional[str] = None
+        self._manifest_lock = asyncio.Lock()
+
+    async def get_manifest(self, refresh: bool = False) -> Dict[str, Any]:
+        """Get the manifest, re-reading it only when its stamp changed"""
+        stamp = await self.backend.stamp(MANIFEST_FILE_NAME)
+        if self._manifest is not None and not refresh and stamp == self._manifest_stamp:
+            return self._manifest
+
+        data = await self.backend.read_bytes(MANIFEST_FILE_NAME)
+        if data is None:
+            manifest = await self.rebuild_manifest()
+            stamp = await self.backend.stamp(MANIFEST_FILE_NAME)
+        else:
+            manifest = json.loads(data)
+
+        self._manifest = manifest
+        self._manifest_stamp = stamp
+        return manifest
+
+    async def manifest_stamp(self) -> Optional[str]:
+        """Cheap change token for the manifest, for polling"""
+        return await self.backend.stamp(MANIFEST_FILE_NAME)
+
+    async def rebuild_manifest(self) -> Dict[str, Any]:
+        """Rebuild the manifest from a full listing of the backend"""
+        versions: Dict[str, Dict[str, Any]] = {}
+        for name, size, sha256, etag in await self.backend.list_files():
+            version, _, file_name = name.partition("/")
+            if not file_name or "/" in file_name:
+                continue
+            files = versions.setdefault(version, {"files": {}})["files"]
+            files[file_name] = {"size": size, "sha256": sha256}
+            if etag is not None:
+                files[file_name]["etag"] = etag
+
+        # Only directories with metadata (or a bundle carrying it) are model versions
+        versions = {
+            version: entry for version, entry in versions.items()
+            if METADATA_FILE_NAME in entry["files"] or BUNDLE_FILE_NAME in entry["files"]
+        }
+        manifest = {"generation": 0, "updated_at": datetime.now().isoformat(), "versions": versions}
+        await self._write_manifest(manifest)
+        logger.info(f"Rebuilt model manifest with {len(versions)} versions")
+        return manifest
+
+    async def list_models(self) -> List[str]:
+        """List available model versions"""
+        try:
+            manifest = await self.get_manifest()
+            return sorted(manifest["versions"])
+        except Exception as e:
+            logger.error(f"Failed to list models: {str(e)}")
+            raise
+
+    async def get_version_entry(self, version: str) -> Dict[str, Any]:
+        """Get the manifest entry for a version"""
+        entry = (await self.get_manifest())["versions"].get(version)
+        if entry is None:
+            raise FileNotFoundError(f"Model version {version} not found in storage")
+        return entry
+
+    @staticmethod
+    def model_file_name(version: str, entry: Dict[str, Any]) -> str:
+        """Name of the model artifact among a manifest entry's files"""
+        for file_name in MODEL_FILE_NAMES:
+            if file_name in entry["files"]:
+                return file_name
+        raise FileNotFoundError(f"No model artifact found for version {version}")
+
+    async def get_version_digest(self, version: str) -> Optional[str]:
+        """Content stamp of the version's model artifact: its SHA-256, else its ETag"""
+        entry = await self.get_version_entry(version)
+        file_info = entry["files"][self.model_file_name(version, entry)]
+        if file_info.get("sha256"):
+            return file_info["sha256"]
+        return f"etag:{file_info['etag']}" if file_info.get("etag") else None
+
+    async def get_model_path(self, version: str) -> str:
+        """Get a local path to the model artifact of a version"""
+        entry = await self.get_version_entry(version)
+        return await self._local_path(version, self.model_file_name(version, entry), entry)
+
+    async def get_metadata_path(self, version: str) -> str:
+        """Get a local path to the metadata of a version"""
+        entry = await self.get_version_entry(version)
+        return await self._local_path(version, METADATA_FILE_NAME, entry)
+
+    async def save_model(
+        self,
+        version: str,
+        model_data: bytes,
+        metadata: Dict[str, Any],
+        file_name: str = "model.joblib",
+        sidecars: Optional[Dict[str, bytes]] = None
+    ) -> None:
+        """Save a model artifact and its metadata, then publish it in the manifest
+
+        Bundles carry their own metadata, so only the bundle file is written.
+        ``sidecars`` are further files of the version, such as a compiled
+        forest, published in the same manifest update.
+        """
+        files = {file_name: model_data, **(sidecars or {})}
+        if not file_name.endswith(BUNDLE_SUFFIX):
+            files[METADATA_FILE_NAME] = json.dumps(metadata, indent=2, default=str).encode()
+
+        try:
+            await self._publish_files(version, files)
+        except Exception as e:
+            logger.error(f"Failed to save model {version}: {str(e)}")
+            raise
+
+    async def delete_model(self, version: str) -> bool:
+        """Remove a version from the manifest, then its files; returns whether it existed
+
+        The manifest goes first so watchers stop loading the version before
+        its files disappear, and removing the files keeps a manifest rebuild
+        from bringing it back.
+        """
+        try:
+            entry = await self._update_manifest(lambda manifest: manifest["versions"].pop(version, None))
+            if entry is None:
+                return False
+            for file_name in entry["files"]:
+                await self.backend.delete(f"{version}/{file_name}")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to delete model {version}: {str(e)}")
+            raise
+
+    async def copy_version(self, source: "ModelStorage", version: str) -> None:
+        """Publish a version with every file of its entry in ``source``, such as a training output directory"""
+        entry = await source.get_version_entry(version)
+        files = {}
+        for file_name in entry["files"]:
+            data = await source.backend.read_bytes(f"{version}/{file_name}")
+            if data is None:
+                raise FileNotFoundError(f"Artifact not found: {version}/{file_name}")
+            files[file_name] = data
+        try:
+            await self._publish_files(version, files)
+        except Exception as e:
+            logger.error(f"Failed to copy model {version}: {str(e)}")
+            raise
+
+    async def _publish_files(self, version: str, files: Dict[str, bytes]) -> None:
+        """Write a version's files and make them its manifest entry, removing files it no longer has"""
+        for file_name, data in files.items():
+            await self.backend.write_bytes(f"{version}/{file_name}", data)
+
+        def publish(manifest: Dict[str, Any]) -> List[str]:
+            previous = manifest["versions"].get(version, {"files": {}})
+            manifest["versions"][version] = {
+                "files": {
+                    file_name: {"size": len(data), "sha256": hashlib.sha256(data).hexdigest()}
+                    for file_name, data in files.items()
+                }
+            }
+            return [file_name for file_name in previous["files"] if file_name not in files]
+
+        # Artifacts first, manifest last: watchers never see a version
+        # whose files are not there yet
+        stale = await self._update_manifest(publish)
+        # A leftover artifact (say an old model.forest) would otherwise be
+        # served ahead of the new one after a manifest rebuild
+        for file_name in stale:
+            await self.backend.delete(f"{version}/{file_name}")
+
+    async def _update_manifest(self, update: Callable[[Dict[str, Any]], Any]) -> Any:
+        """Apply ``update`` to the latest manifest and publish it; returns what ``update`` returned"""
+        async with self._manifest_lock:
+            async with self.backend.exclusive(MANIFEST_FILE_NAME):
+                for _ in range(MANIFEST_UPDATE_ATTEMPTS):
+                    # A copy, so a lost write leaves the cached manifest as it was
+                    manifest = copy.deepcopy(await self.get_manifest(refresh=True))
+                    stamp = self._manifest_stamp
+                    result = update(manifest)
+                    manifest["generation"] = manifest.get("generation", 0) + 1
+                    manifest["updated_at"] = datetime.now().isoformat()
+                    if await self.backend.write_bytes_if(MANIFEST_FILE_NAME, self._encode_manifest(manifest), stamp):
+                        self._manifest = manifest
+                        self._manifest_stamp = await self.backend.stamp(MANIFEST_FILE_NAME)
+                        return result
+        raise RuntimeError(f"Manifest changed during each of {MANIFEST_UPDATE_ATTEMPTS} update attempts")
+
+    @staticmethod
+    def _encode_manifest(manifest: Dict[str, Any]) -> bytes:
+        return json.dumps(manifest, indent=2, sort_keys=True).encode()
+
+    async def _write_manifest(self, manifest: Dict[str, Any]) -> None:
+        await self.backend.write_bytes(MANIFEST_FILE_NAME, self._encode_manifest(manifest))
+
+    async def _local_path(self, version: str, file_name: str, entry: Dict[str, Any]) -> str:
+        file_info = entry["files"][file_name]
+        return await self.backend.local_path(
+            f"{version}/{file_name}", file_info.get("sha256"), file_info.get("size")
+        )
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Script to benchmark compiled forest inference against scikit-learn
+"""
+
+import argparse
+import logging
+import time
+
+import numpy as np
+from sklearn.datasets import make_classification
+from sklearn.ensemble import RandomForestClassifier
+
+from app.ml.forest import compile_forest
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+def latency(predict, X: np.ndarray, repeats: int) -> float:
+    """Median seconds per predict call"""
+    # Warm up
+    predict(X)
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        predict(X)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings))
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark Compiled Forest Inference')
+    parser.add_argument('--trees', type=int, default=100, help='Trees in the benchmark forest')
+    parser.add_argument('--features', type=int, default=20, help='Features per row')
+    parser.add_argument('--max-depth', type=int, help='Maximum tree depth (default: unlimited)')
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 10, 100, 1000], help='Rows per predict call')
+    parser.add_argument('--repeats', type=int, default=50, help='Timed calls per batch size')
+
+    args = parser.parse_args()
+
+    X, y = make_classification(
+        n_samples=5000, n_features=args.features, n_informative=args.features // 2, n_classes=3, random_state=42
+    )
+    model = RandomForestClassifier(n_estimators=args.trees, max_depth=args.max_depth, random_state=42)
+    model.fit(X, y)
+    forest = compile_forest(model, threshold_dtype=np.float32)
+    logger.info(f"Compiled {forest.n_trees} trees, {forest.n_nodes} nodes, depth {forest.max_depth}")
+
+    if not np.array_equal(forest.predict(X), model.predict(X)):
+        raise SystemExit("Compiled forest predictions differ from scikit-learn")
+
+    for batch_size in args.batch_sizes:
+        batch = X[:batch_size]
+        sklearn_seconds = latency(model.predict, batch, args.repeats)
+        compiled_seconds = latency(forest.predict, batch, args.repeats)
+        logger.info(
+            f"batch {batch_size:5d}: sklearn {sklearn_seconds * 1e3:8.3f}ms "
+            f"compiled {compiled_seconds * 1e3:8.3f}ms "
+            f"({sklearn_seconds / compiled_seconds:.1f}x)"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Script to benchmark per-request overhead of the request metrics middleware
+"""
+
+import asyncio
+import argparse
+import logging
+import time
+
+from fastapi import FastAPI, Request
+from prometheus_client import Counter, Histogram
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.api.middleware import MetricsMiddleware
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# The BaseHTTPMiddleware implementation this benchmark compares against
+LEGACY_REQUEST_COUNT = Counter(
+    'benchmark_legacy_http_requests_total',
+    'Total HTTP Requests',
+    ['method', 'endpoint', 'status_code']
+)
+
+LEGACY_REQUEST_LATENCY = Histogram(
+    'benchmark_legacy_http_request_latency_seconds',
+    'HTTP request latency',
+    ['method', 'endpoint']
+)
+
+class LegacyLoggingMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        start_time = time.time()
+        response = await call_next(request)
+        latency = time.time() - start_time
+        logger.debug(
+            f"{request.method} {request.url.path} - "
+            f"Status: {response.status_code} - "
+            f"Latency: {latency:.4f}s"
+        )
+        LEGACY_REQUEST_COUNT.labels(
+            method=request.method,
+            endpoint=request.url.path,
+            status_code=response.status_code
+        ).inc()
+        LEGACY_REQUEST_LATENCY.labels(
+            method=request.method,
+            endpoint=request.url.path
+        ).observe(latency)
+        return response
+
+def build_app(middleware=None) -> FastAPI:
+    """Build a minimal app with one parameterised route"""
+    app = FastAPI()
+
+    @app.get("/models/{version}")
+    async def get_model(version: str):
+        return {"version": version}
+
+    if middleware is not None:
+        app.add_middleware(middleware)
+    return app
+
+async def run_requests(app, requests: int, versions: int) -> float:
+    """Drive the ASGI app directly and return mean seconds per request"""
+    request_message = {"type": "http.request", "body": b"", "more_body": False}
+    disconnect_message = {"type": "http.disconnect"}
+
+    async def send(message):
+        pass
+
+    start = time.perf_counter()
+    for i in range(requests):
+        # Deliver the (empty) body once, then report the client as gone, which
+        # is what a server does once the response is complete
+        messages = [disconnect_message, request_message]
+
+        async def receive():
+            return messages.pop() if len(messages) > 1 else messages[0]
+
+        path = f"/models/v{i % versions}"
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "root_path": "",
+            "query_string": b"",
+            "headers": [(b"host", b"benchmark")],
+            "client": ("127.0.0.1", 12345),
+            "server": ("benchmark", 80),
+        }
+        await app(scope, receive, send)
+    return (time.perf_counter() - start) / requests
+
+async def main():
+    parser = argparse.ArgumentParser(description='Benchmark Request Metrics Middleware')
+    parser.add_argument('--requests', type=int, default=20000, help='Requests per variant')
+    parser.add_argument('--versions', type=int, default=50, help='Distinct path values to cycle through')
+
+    args = parser.parse_args()
+
+    variants = [
+        ("no middleware", build_app()),
+        ("BaseHTTPMiddleware (legacy)", build_app(LegacyLoggingMiddleware)),
+        ("MetricsMiddleware (pure ASGI)", build_app(MetricsMiddleware)),
+    ]
+
+    baseline = None
+    for name, app in variants:
+        # Warm up route resolution and label children
+        await run_requests(app, 500, args.versions)
+        per_request = await run_requests(app, args.requests, args.versions)
+        if baseline is None:
+            baseline = per_request
+        logger.info(
+            f"{name:32s} {per_request * 1e6:8.1f} us/request "
+            f"(+{(per_request - baseline) * 1e6:.1f} us overhead)"
+        )
+
+if __name__ == "__main__":
+    asyncio.run(main())
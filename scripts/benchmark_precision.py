@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Script to benchmark serving throughput and memory with float32 vs float64 features
+"""
+
+import argparse
+import logging
+import time
+import tracemalloc
+
+import numpy as np
+from sklearn.datasets import make_classification
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import StandardScaler
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+def serve_batch(model, scaler, rows: list, dtype) -> np.ndarray:
+    """The serving path: one conversion at the edge, then scale and predict"""
+    features = np.asarray(rows, dtype=dtype)
+    return model.predict(scaler.transform(features))
+
+def measure(model, scaler, rows: list, dtype, repeats: int) -> dict:
+    """Throughput and peak allocation of serving ``rows`` at one precision"""
+    # Warm up
+    serve_batch(model, scaler, rows, dtype)
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        serve_batch(model, scaler, rows, dtype)
+    seconds = time.perf_counter() - start
+
+    tracemalloc.start()
+    serve_batch(model, scaler, rows, dtype)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "rows_per_second": len(rows) * repeats / seconds,
+        "matrix_bytes": np.asarray(rows, dtype=dtype).nbytes,
+        "peak_bytes": peak
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark Feature Precision')
+    parser.add_argument('--rows', type=int, default=1000, help='Rows per prediction batch')
+    parser.add_argument('--features', type=int, default=50, help='Features per row')
+    parser.add_argument('--trees', type=int, default=100, help='Trees in the benchmark forest')
+    parser.add_argument('--repeats', type=int, default=20, help='Batches timed per precision')
+
+    args = parser.parse_args()
+
+    X, y = make_classification(
+        n_samples=max(args.rows, 2000), n_features=args.features, random_state=42
+    )
+    scaler = StandardScaler().fit(X)
+    model = RandomForestClassifier(n_estimators=args.trees, random_state=42, n_jobs=1)
+    model.fit(scaler.transform(X), y)
+    # Requests arrive as JSON, i.e. lists of Python floats
+    rows = X[:args.rows].tolist()
+
+    results = {}
+    for dtype in (np.float64, np.float32):
+        results[dtype] = measure(model, scaler, rows, dtype, args.repeats)
+        result = results[dtype]
+        logger.info(
+            f"{np.dtype(dtype).name:8s} {result['rows_per_second']:12.0f} rows/s "
+            f"matrix {result['matrix_bytes'] / 1024:8.1f}KiB "
+            f"peak {result['peak_bytes'] / 1024:8.1f}KiB"
+        )
+
+    agreement = np.mean(
+        serve_batch(model, scaler, rows, np.float32) == serve_batch(model, scaler, rows, np.float64)
+    )
+    logger.info(
+        f"float32 speedup {results[np.float32]['rows_per_second'] / results[np.float64]['rows_per_second']:.2f}x, "
+        f"peak memory {results[np.float32]['peak_bytes'] / results[np.float64]['peak_bytes']:.2f}x, "
+        f"prediction agreement {agreement:.4f}"
+    )
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,8 @@ import json
 import logging
 from pathlib import Path
 
+from app.ml.bundle import BUNDLE_SUFFIX, write_bundle
+
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -20,27 +22,28 @@ def deploy_model(model_version, api_url="http://localhost:8000"):
         if not model_path.exists():
             raise FileNotFoundError(f"Model version {model_version} not found")
         
-        # Load model and metadata
-        with open(model_path / "metadata.json", 'r') as f:
-            metadata = json.load(f)
+        bundle_path = model_path / f"model{BUNDLE_SUFFIX}"
+        if not bundle_path.exists():
+            # Package a legacy model.joblib + metadata.json version as a bundle
+            import joblib
+            with open(model_path / "metadata.json", 'r') as f:
+                metadata = json.load(f)
+            write_bundle(str(bundle_path), joblib.load(model_path / "model.joblib"), metadata)
+            logger.info(f"Wrote bundle {bundle_path}")
         
-        # Read model file
-        with open(model_path / "model.joblib", 'rb') as f:
+        # Read bundle; it carries the metadata
+        with open(bundle_path, 'rb') as f:
             model_data = f.read()
         
         # Prepare request
         files = {
-            'model_file': ('model.joblib', model_data, 'application/octet-stream')
-        }
-        data = {
-            'metadata': json.dumps(metadata)
+            'model_file': (bundle_path.name, model_data, 'application/octet-stream')
         }
         
         # Send to API
         response = requests.post(
             f"{api_url}/api/v1/models/{model_version}",
             files=files,
-            data=data,
             headers={'X-API-Key': 'dev-key-123'}
         )
         
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Script to profile the import time of the API process
+"""
+
+import argparse
+import logging
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+ROOT = Path(__file__).resolve().parent.parent
+
+def profile_imports(module: str):
+    """Return (self_us, cumulative_us, name) for every module imported by ``module``"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        env=dict(os.environ, PYTHONPATH=str(ROOT)),
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+    
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        entries.append((int(self_us), int(cumulative_us), name.rstrip()))
+    return entries
+
+def main():
+    parser = argparse.ArgumentParser(description='Profile import time')
+    parser.add_argument('--module', type=str, default='app.main', help='Module to import')
+    parser.add_argument('--top', type=int, default=20, help='Number of modules to show')
+    parser.add_argument('--sort', choices=['self', 'cumulative'], default='cumulative', help='Sort order')
+    
+    args = parser.parse_args()
+    
+    entries = profile_imports(args.module)
+    total = next((cumulative for _, cumulative, name in entries if name.strip() == args.module), None)
+    key = 0 if args.sort == 'self' else 1
+    
+    logger.info(f"Imported {len(entries)} modules" + (f" in {total / 1000:.1f}ms" if total else ""))
+    print(f"{'self ms':>9} {'cumul ms':>9}  module")
+    for self_us, cumulative_us, name in sorted(entries, key=lambda e: e[key], reverse=True)[:args.top]:
+        print(f"{self_us / 1000:9.1f} {cumulative_us / 1000:9.1f}  {name}")
+
+if __name__ == "__main__":
+    main()
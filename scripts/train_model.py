@@ -4,9 +4,11 @@ Script to train and deploy ML models
 """
 
 import asyncio
+import json
 import logging
 import argparse
-from training_pipeline.pipeline import TrainingPipeline
+from training_pipeline.parallel import DEFAULT_MEMMAP_DIR
+from training_pipeline.pipeline import DEFAULT_CACHE_DIR, TrainingPipeline
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -17,12 +19,59 @@ async def main():
     parser.add_argument('--data-path', type=str, default='data/processed/iris_processed.csv', help='Path to training data')
     parser.add_argument('--target-column', type=str, default='target', help='Target column name')
     parser.add_argument('--version', type=str, help='Model version (default: auto-generated)')
+    parser.add_argument('--param-grid', type=json.loads, help='Hyperparameter grid as JSON, e.g. \'{"n_estimators": [100]}\'')
+    parser.add_argument('--search', choices=['halving', 'grid'], default='halving',
+                        help='Hyperparameter search: budgeted successive halving or exhaustive grid')
+    parser.add_argument('--time-budget', type=float, help='Seconds the halving search may spend before picking a winner')
+    parser.add_argument('--output-dir', type=str, default='models', help='Directory to write the model version to')
+    parser.add_argument('--cache-dir', type=str, default=DEFAULT_CACHE_DIR, help='Stage cache directory')
+    parser.add_argument('--no-cache', action='store_true', help='Run every stage without reading or writing the cache')
+    parser.add_argument('--feature-dtype', choices=['float32', 'float64'], default='float32',
+                        help='Precision of the feature matrix, recorded in the metadata and used at serving time')
+    parser.add_argument('--bootstrap', type=int, default=1000,
+                        help='Bootstrap resamples for evaluation confidence intervals (0 to skip)')
+    parser.add_argument('--backend', choices=['loky', 'multiprocessing', 'threading'], default='loky',
+                        help='joblib backend for grid search fits')
+    parser.add_argument('--n-jobs', type=int, default=-1, help='Parallel workers (-1 for all cores)')
+    parser.add_argument('--memmap-dir', type=str, default=DEFAULT_MEMMAP_DIR,
+                        help='Directory for the memory-mapped training matrix')
+    parser.add_argument('--objective', choices=['accuracy', 'latency_slo', 'pareto'], default='accuracy',
+                        help='How to pick the winner: best accuracy, best accuracy within --latency-slo-ms, or the Pareto front')
+    parser.add_argument('--latency-slo-ms', type=float, help='Single-row inference latency SLO for the latency_slo objective')
+    parser.add_argument('--finalists', type=int, default=3,
+                        help='Top-ranked candidates refit and profiled for the latency_slo and pareto objectives')
+    parser.add_argument('--compile', action='store_true',
+                        help='Also write model.forest, the compiled forest that serving prefers over model.joblib')
     
     args = parser.parse_args()
     
     try:
-        pipeline = TrainingPipeline()
-        version = await pipeline.run()
+        pipeline = TrainingPipeline(
+            data_path=args.data_path,
+            target_column=args.target_column,
+            param_grid=args.param_grid,
+            search=args.search,
+            time_budget=args.time_budget,
+            output_dir=args.output_dir,
+            cache_dir=None if args.no_cache else args.cache_dir,
+            feature_dtype=args.feature_dtype,
+            n_bootstrap=args.bootstrap,
+            backend=args.backend,
+            n_jobs=args.n_jobs,
+            memmap_dir=args.memmap_dir,
+            compile=args.compile,
+            objective=args.objective,
+            latency_slo_ms=args.latency_slo_ms,
+            finalists=args.finalists
+        )
+        version = await pipeline.run(args.version)
+        for stage, timing in pipeline.stage_timings.items():
+            logger.info(f"  {stage}: {timing['status']} ({timing['seconds']:.3f}s)")
+        memory = pipeline.memory.report()
+        logger.info(
+            f"Peak memory {memory['peak_rss_mib']}MiB across {memory['peak_workers']} worker processes "
+            f"({args.backend}, n_jobs={args.n_jobs})"
+        )
         logger.info(f"Training completed successfully. Model version: {version}")
         return 0
     except Exception as e:
@@ -1,10 +1,22 @@
 import pytest
 from fastapi.testclient import TestClient
 from app.main import app
+from app.api.deps import get_model_manager
 from app.core.config import settings
+from app.ml.model_manager import ModelManager
+from app.utils.storage import MemoryStorageBackend, ModelStorage
 
 client = TestClient(app)
 
+@pytest.fixture(autouse=True)
+def model_manager():
+    """Serve from an empty in-memory store; the lifespan that creates the real one needs a database"""
+    manager = ModelManager()
+    manager.storage = ModelStorage(MemoryStorageBackend())
+    app.dependency_overrides[get_model_manager] = lambda: manager
+    yield manager
+    app.dependency_overrides.pop(get_model_manager, None)
+
 def test_health_check():
     """Test health check endpoint"""
     response = client.get("/health")
@@ -41,4 +53,52 @@ def test_docs_available():
 def test_redoc_available():
     """Test that ReDoc is available"""
     response = client.get("/redoc")
-    assert response.status_code == 200
\ No newline at end of file
+    assert response.status_code == 200
+
+
+def test_render_prediction_numpy():
+    """Test the fast prediction encoder handles numpy output and metadata"""
+    import json
+    import numpy as np
+    from app.api.responses import render_prediction, render_prediction_list
+    from app.utils.helpers import fast_json_dumps
+    
+    metadata = {"model_type": "RandomForestClassifier", "features": ["a", "b"]}
+    body = render_prediction(
+        "req-1",
+        np.array([0, 1, 1]),
+        "v1",
+        np.float64(0.0012),
+        fast_json_dumps(metadata)
+    )
+    decoded = json.loads(body)
+    assert decoded["predictions"] == [0, 1, 1]
+    assert decoded["metadata"] == metadata
+    
+    # Clients can drop metadata from the response
+    slim = json.loads(render_prediction("req-2", np.array([[0.2, 0.8]]), "v1", 0.001))
+    assert "metadata" not in slim
+    assert slim["predictions"] == [[0.2, 0.8]]
+    
+    assert len(json.loads(render_prediction_list([body, body]))) == 2
+
+def test_model_upload_validates_version_name(model_manager):
+    """Test uploads are only stored under version names that stay inside storage"""
+    import io
+    import json
+    import joblib
+    from sklearn.dummy import DummyClassifier
+    
+    buffer = io.BytesIO()
+    joblib.dump(DummyClassifier().fit([[0], [1]], [0, 1]), buffer)
+    files = {"model_file": ("model.joblib", buffer.getvalue())}
+    data = {"metadata": json.dumps({"model_type": "dummy"})}
+    
+    for version in ("..x", "-rf", ".hidden", "v" * 129):
+        response = client.post(f"/api/v1/models/{version}", files=files, data=data)
+        assert response.status_code == 400, version
+    assert model_manager.model_metadata == {}
+    
+    response = client.post("/api/v1/models/v1.2_rc-1", files=files, data=data)
+    assert response.status_code == 201
+    assert model_manager.model_metadata["v1.2_rc-1"] == {"model_type": "dummy"}
@@ -0,0 +1,48 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from app.api.middleware import MetricsMiddleware, UNMATCHED_ROUTE
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/test-metrics/models/{version}")
+    async def get_model(version: str):
+        return {"version": version}
+
+    app.add_middleware(MetricsMiddleware)
+    return app
+
+def request_count(method: str, route: str, status_class: str) -> float:
+    value = REGISTRY.get_sample_value(
+        'http_requests_total',
+        {'method': method, 'route': route, 'status_class': status_class}
+    )
+    return value or 0.0
+
+def test_metrics_labelled_by_route_template():
+    """Test that path parameters do not create new series"""
+    client = TestClient(build_app())
+    route = "/test-metrics/models/{version}"
+    before = request_count("GET", route, "2xx")
+    
+    for version in ("v1", "v2", "v3"):
+        assert client.get(f"/test-metrics/models/{version}").status_code == 200
+    
+    assert request_count("GET", route, "2xx") == before + 3
+    assert REGISTRY.get_sample_value(
+        'http_requests_total',
+        {'method': 'GET', 'route': '/test-metrics/models/v1', 'status_class': '2xx'}
+    ) is None
+
+def test_metrics_bounded_labels_for_unknown_requests():
+    """Test unmatched paths and unusual methods map to fixed label values"""
+    client = TestClient(build_app())
+    before_unmatched = request_count("GET", UNMATCHED_ROUTE, "4xx")
+    
+    assert client.get("/no/such/path").status_code == 404
+    assert client.request("PROPFIND", "/test-metrics/models/v1").status_code == 405
+    
+    assert request_count("GET", UNMATCHED_ROUTE, "4xx") == before_unmatched + 1
+    assert request_count("OTHER", "/test-metrics/models/{version}", "4xx") >= 1
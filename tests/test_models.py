@@ -1,6 +1,7 @@
 import pytest
 import numpy as np
 from app.ml.model_loader import ModelLoader
+from app.core.config import settings
 from app.ml.preprocessor import DataPreprocessor
 
 @pytest.mark.asyncio
@@ -48,4 +49,536 @@ def test_feature_validation():
     
     assert validate_features(features_2d, (2, 3)) == True
     assert validate_features(features_1d, (3,)) == True
-    assert validate_features(features_2d, (3, 2)) == False  # Wrong shape
\ No newline at end of file
+    assert validate_features(features_2d, (3, 2)) == False  # Wrong shape
+
+def test_stage_timer_server_timing():
+    """Test per-stage timings and Server-Timing rendering"""
+    from app.ml.timing import StageTimer
+    
+    timer = StageTimer()
+    timer.record("inference", 0.002, "v1")
+    timer.record("inference", 0.001, "v1")
+    with timer.stage("preprocess"):
+        pass
+    # Batch items wait concurrently, so queue time is not summed
+    timer.record_longest("queue", 0.004, "v1")
+    timer.record_longest("queue", 0.001, "v1")
+    
+    assert abs(timer.durations["inference"] - 0.003) < 1e-9
+    assert timer.durations["queue"] == 0.004
+    header = timer.server_timing()
+    # Stages are rendered in pipeline order, followed by the total
+    assert header.index("preprocess;dur=") < header.index("inference;dur=3.000")
+    assert header.split(", ")[-1].startswith("total;dur=")
+
+@pytest.mark.asyncio
+async def test_admission_controller_sheds_load():
+    """Test bounded per-version queues reject instead of piling up"""
+    import asyncio
+    from app.ml.admission import AdmissionController, AdmissionRejected
+    
+    controller = AdmissionController(max_concurrency=1, max_queue=1)
+    release = asyncio.Event()
+    
+    async def hold_slot():
+        async with controller.admit("v1"):
+            await release.wait()
+    
+    holder = asyncio.create_task(hold_slot())
+    waiter = asyncio.create_task(hold_slot())
+    await asyncio.sleep(0)
+    assert controller.get_queue("v1").waiting == 1
+    
+    # Queue is full: rejected immediately with 429
+    with pytest.raises(AdmissionRejected) as exc_info:
+        async with controller.admit("v1"):
+            pass
+    assert exc_info.value.status_code == 429
+    assert exc_info.value.retry_after >= 1
+    
+    # Other versions have their own queues
+    async with controller.admit("v2") as queue_wait:
+        assert queue_wait >= 0
+    
+    release.set()
+    await asyncio.gather(holder, waiter)
+    
+    # Estimated wait exceeding the client's timeout is rejected with 503
+    queue = controller.get_queue("v1")
+    queue.service_time = 0.5
+    with pytest.raises(AdmissionRejected) as exc_info:
+        async with controller.admit("v1", timeout=0.1):
+            pass
+    assert exc_info.value.status_code == 503
+    
+    # A deadline that runs out while queued is a timeout (504), not shedding
+    from app.ml.deadline import DeadlineExceeded
+    queue.service_time = 0.0
+    async with controller.admit("v1"):
+        with pytest.raises(DeadlineExceeded) as exc_info:
+            async with controller.admit("v1", timeout=0.05):
+                pass
+    assert exc_info.value.reason == "expired"
+
+@pytest.mark.asyncio
+async def test_expired_deadline_skips_inference():
+    """Test expired or cancelled requests never reach the model"""
+    from prometheus_client import REGISTRY
+    from app.ml.deadline import Deadline, DeadlineExceeded
+    from app.ml.model_manager import ModelManager
+    
+    class CountingModel:
+        calls = 0
+        
+        def predict(self, features):
+            CountingModel.calls += 1
+            return np.zeros(len(features))
+    
+    manager = ModelManager()
+    manager.models["deadline-test"] = CountingModel()
+    manager.model_metadata["deadline-test"] = {}
+    
+    result = await manager.predict("deadline-test", [[1.0, 2.0]], deadline=Deadline(5.0))
+    assert result["predictions"] == [0.0]
+    assert CountingModel.calls == 1
+    
+    with pytest.raises(DeadlineExceeded) as exc_info:
+        await manager.predict("deadline-test", [[1.0, 2.0]], deadline=Deadline(0.0))
+    assert exc_info.value.reason == "expired"
+    
+    cancelled = Deadline()
+    cancelled.cancel()
+    with pytest.raises(DeadlineExceeded) as exc_info:
+        await manager.predict("deadline-test", [[1.0, 2.0]], deadline=cancelled)
+    assert exc_info.value.reason == "cancelled"
+    
+    assert CountingModel.calls == 1
+    assert REGISTRY.get_sample_value(
+        'model_work_avoided_total',
+        {'model_version': 'deadline-test', 'reason': 'cancelled', 'stage': 'queue'}
+    ) == 1.0
+
+@pytest.mark.asyncio
+async def test_model_manager_sync_loads_changed_versions():
+    """Test versions published to storage are loaded and reloaded on change"""
+    import io
+    import joblib
+    from sklearn.dummy import DummyClassifier
+    from app.ml.model_manager import ModelManager
+    from app.utils.storage import MemoryStorageBackend, ModelStorage
+    
+    manager = ModelManager()
+    manager.storage = ModelStorage(MemoryStorageBackend())
+    
+    buffer = io.BytesIO()
+    joblib.dump(DummyClassifier().fit([[0], [1]], [0, 1]), buffer)
+    await manager.storage.save_model("watch-test", buffer.getvalue(), {"revision": 1})
+    await manager.sync_models()
+    assert manager.model_metadata["watch-test"] == {"revision": 1}
+    
+    # Unchanged artifacts are not reloaded
+    manager.model_metadata["watch-test"] = {"revision": "cached"}
+    await manager.sync_models()
+    assert manager.model_metadata["watch-test"] == {"revision": "cached"}
+    
+    buffer = io.BytesIO()
+    joblib.dump(DummyClassifier(strategy="uniform").fit([[0], [1]], [0, 1]), buffer)
+    await manager.storage.save_model("watch-test", buffer.getvalue(), {"revision": 2})
+    await manager.sync_models()
+    assert manager.model_metadata["watch-test"] == {"revision": 2}
+
+@pytest.mark.asyncio
+async def test_model_bundle_round_trip(tmp_path):
+    """Test bundles expose metadata from the header and load heavy sections lazily"""
+    from sklearn.dummy import DummyClassifier
+    from app.ml.bundle import ModelBundle, SECTION_ALIGNMENT, write_bundle
+    
+    preprocessor = DataPreprocessor()
+    await preprocessor.fit_preprocessor([[0.0, 10.0], [2.0, 30.0]], {'normalization': 'standard'})
+    model = DummyClassifier(strategy="most_frequent").fit([[0, 0], [1, 1], [1, 1]], [0, 1, 1])
+    path = tmp_path / "model.mlb"
+    write_bundle(
+        str(path),
+        model,
+        {"model_type": "dummy", "preprocessing": {"normalization": "standard"}},
+        preprocessing=preprocessor,
+        reference_stats={"mean": np.array([1.0, 20.0])}
+    )
+    
+    bundle = ModelBundle(str(path))
+    assert bundle.metadata()["model_type"] == "dummy"
+    assert all(section["offset"] % SECTION_ALIGNMENT == 0 for section in bundle.sections.values())
+    
+    stats = bundle.reference_stats()
+    assert isinstance(stats["mean"], np.memmap)
+    assert stats["mean"].tolist() == [1.0, 20.0]
+    assert bundle.load_model().predict([[5, 5]]).tolist() == [1]
+    
+    # The fitted scaler comes from the bundle instead of the first request
+    restored = bundle.load_preprocessing()
+    assert await restored.process([[1.0, 20.0]], {'normalization': 'standard'}) == [[0.0, 0.0]]
+
+@pytest.mark.asyncio
+async def test_model_manager_materializes_bundle_on_first_predict():
+    """Test bundled versions register from metadata and load on first use"""
+    from sklearn.dummy import DummyClassifier
+    from app.ml.bundle import encode_bundle
+    from app.ml.model_manager import ModelManager
+    from app.utils.storage import MemoryStorageBackend, ModelStorage
+    
+    manager = ModelManager()
+    manager.storage = ModelStorage(MemoryStorageBackend())
+    model = DummyClassifier(strategy="constant", constant=7).fit([[0], [1]], [7, 3])
+    await manager.update_model("bundle-test", encode_bundle(model, {"revision": 1}), {}, "model.mlb")
+    
+    assert manager.model_metadata["bundle-test"] == {"revision": 1}
+    assert "bundle-test" not in manager.models
+    assert (await manager.get_model_info("bundle-test"))["loaded"] is False
+    
+    result = await manager.predict("bundle-test", [[0.5]])
+    assert result["predictions"] == [7]
+    assert "bundle-test" in manager.models
+
+class _DtypeRecorder:
+    """Model stub that remembers the array it was asked to predict on"""
+    
+    def predict(self, features):
+        self.seen = features
+        return np.zeros(len(features))
+
+@pytest.mark.asyncio
+async def test_features_reach_model_in_recorded_dtype():
+    """Test request features are converted once to the metadata's dtype and never upcast"""
+    from app.ml.model_manager import ModelManager
+    
+    preprocessor = DataPreprocessor()
+    await preprocessor.fit_preprocessor([[0.0, 10.0], [2.0, 30.0]], {'normalization': 'standard'})
+    features = np.array([[1.0, np.nan], [3.0, 20.0]], dtype=np.float32)
+    processed = await preprocessor.process(
+        features, {'normalization': 'standard', 'imputation': 'mean'}
+    )
+    assert processed.dtype == np.float32
+    
+    manager = ModelManager()
+    for version, dtype in (("narrow", "float32"), ("wide", "float64")):
+        model = _DtypeRecorder()
+        manager.models[version] = model
+        manager.model_metadata[version] = {"feature_dtype": dtype}
+        manager.feature_dtypes[version] = np.dtype(dtype)
+        manager.preprocessors[version] = preprocessor
+        await manager.predict(version, [[1.0, 20.0]])
+        assert model.seen.dtype == np.dtype(dtype)
+    
+    # Metadata without the field predates it: the model was trained in float64
+    model = _DtypeRecorder()
+    manager.models["legacy"] = model
+    manager.model_metadata["legacy"] = {}
+    await manager.predict("legacy", [[1.0, 20.0]])
+    assert model.seen.dtype == np.float64
+
+@pytest.mark.asyncio
+async def test_model_registry_records_loads_and_resolves_aliases(tmp_path):
+    """Test loads are recorded in the registry and reads come from its cached snapshot"""
+    import io
+    import joblib
+    from sklearn.dummy import DummyClassifier
+    from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+    from sqlalchemy.orm import sessionmaker
+    from app.ml.model_manager import ModelManager
+    from app.ml.registry import ModelRegistry
+    from app.models.database import Base
+    from app.utils.storage import MemoryStorageBackend, ModelStorage
+    
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'registry.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    
+    manager = ModelManager()
+    manager.storage = ModelStorage(MemoryStorageBackend())
+    buffer = io.BytesIO()
+    joblib.dump(DummyClassifier(strategy="constant", constant=4).fit([[0], [1]], [4, 2]), buffer)
+    await manager.storage.save_model("registry-test", buffer.getvalue(), {"model_type": "dummy"})
+    await manager.load_model("registry-test")
+    
+    # Versions loaded before the registry was attached are recorded too
+    await manager.attach_registry(ModelRegistry(session_factory, ttl=60))
+    entry = await manager.storage.get_version_entry("registry-test")
+    info = await manager.get_model_info("registry-test")
+    assert info["artifact_sha256"] == entry["files"]["model.joblib"]["sha256"]
+    assert info["loaded_at"] is not None
+    
+    await manager.set_alias("production", "registry-test")
+    assert (await manager.get_model_info("production"))["version"] == "registry-test"
+    assert (await manager.list_models())[0]["aliases"] == ["production"]
+    assert (await manager.predict("production", [[0.5]]))["predictions"] == [4]
+    
+    with pytest.raises(ValueError):
+        await manager.set_alias("staging", "missing")
+    
+    # Another replica's registration shows up once the generation moves
+    other = ModelRegistry(session_factory, ttl=60)
+    await other.record_version("other-replica", {"model_type": "dummy"})
+    generation = manager.registry.snapshot.generation
+    await manager.registry.refresh()
+    assert manager.registry.snapshot.generation > generation
+    assert [model["version"] for model in await manager.list_models()] == ["other-replica", "registry-test"]
+    
+    # Deleting a version drops its entry and the aliases and shadows naming it
+    await manager.storage.save_model("candidate", buffer.getvalue(), {"model_type": "dummy"})
+    await manager.load_model("candidate")
+    await manager.set_shadow("candidate", "registry-test", 0.5)
+    assert await manager.delete_model("registry-test")
+    snapshot = manager.registry.snapshot
+    assert "registry-test" not in snapshot.versions
+    assert snapshot.aliases == {} and snapshot.shadows == {}
+    assert [model["version"] for model in await manager.list_models()] == ["candidate", "other-replica"]
+    assert await manager.get_model_info("production") is None
+    
+    # A version only another replica registered can be deleted too
+    assert await manager.delete_model("other-replica")
+    assert not await manager.delete_model("other-replica")
+    
+    await engine.dispose()
+
+@pytest.mark.asyncio
+async def test_saturation_sampler_reports_readiness():
+    """Test saturation signals are sampled in the background and read by probes"""
+    import time
+    from app.ml.model_manager import ModelManager
+    
+    class SlowModel:
+        def predict(self, features):
+            time.sleep(0.05)
+            return np.zeros(len(features))
+    
+    manager = ModelManager()
+    saturation = manager.saturation
+    assert saturation.readiness()["reasons"] == ["saturation sampler not started"]
+    assert saturation.sample()["reasons"] == ["no models loaded"]
+    
+    manager.models["saturation-test"] = SlowModel()
+    manager.model_metadata["saturation-test"] = {}
+    await manager.predict("saturation-test", [[1.0]])
+    saturation.record_batch(50)
+    
+    snapshot = saturation.sample(loop_lag=0.01)
+    assert snapshot["ready"] is True
+    assert snapshot["executor_utilization"] > 0
+    assert snapshot["batch_fill_ratio"] == 50 / settings.MAX_PREDICTION_BATCH_SIZE
+    assert snapshot["queues"]["saturation-test"]["in_flight"] == 0
+    assert saturation.readiness()["ready"] is True
+    
+    # Probes never sample: a lagging loop shows up on the next sample only
+    assert saturation.sample(loop_lag=10.0)["reasons"] == ["event loop lagging"]
+    assert saturation.readiness()["ready"] is False
+    manager.inference_executor.shutdown()
+
+@pytest.mark.asyncio
+async def test_monitoring_overview_snapshot_keeps_etag_until_stats_change():
+    """Test the overview is pre-encoded and its ETag only moves with the stats"""
+    import json
+    import time
+    from app.ml.monitoring import ModelMonitor
+    
+    monitor = ModelMonitor()
+    first = monitor.refresh_overview(["overview-test"], loaded=["overview-test"])
+    body = json.loads(first.body)
+    assert body["overview-test"]["loaded"] is True
+    assert body["overview-test"]["stats"]["total_predictions"] == 0
+    
+    # Nothing changed: same bytes, same ETag
+    assert monitor.refresh_overview(["overview-test"], loaded=["overview-test"]).etag == first.etag
+    
+    await monitor.record_prediction("overview-test", [[1.0]], [0], 0.01)
+    second = monitor.refresh_overview(["overview-test"], loaded=["overview-test"])
+    assert second.etag != first.etag
+    assert json.loads(second.body)["overview-test"]["stats"]["successful_predictions"] == 1
+    assert monitor.throughput_windows["overview-test"].throughput(time.time()) > 0
+    assert monitor.overview is second
+
+def _record_in_worker(path: str, count: int) -> None:
+    """Record predictions from a separate worker process"""
+    from app.ml.shared_stats import SharedStats
+    stats = SharedStats(path, max_workers=3)
+    for _ in range(count):
+        stats.record_prediction("shared-test", 0.5)
+    stats.record_error("shared-test")
+
+def test_shared_stats_aggregate_across_processes(tmp_path):
+    """Test every worker sees node-wide totals from the shared segment"""
+    import multiprocessing
+    from app.ml.shared_stats import SharedStats
+    
+    path = str(tmp_path / "monitor_stats.mmap")
+    stats = SharedStats(path, max_workers=3)
+    stats.record_prediction("shared-test", 0.1)
+    
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=_record_in_worker, args=(path, 5)) for _ in range(2)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    
+    totals = stats.totals("shared-test")
+    assert totals["predictions"] == 11
+    assert totals["errors"] == 2
+    assert totals["latency_sum"] == pytest.approx(5.1)
+    assert totals["throughput"] > 0
+    
+    # Every row was used; a new worker adopts an exited worker's row
+    # without losing its counts
+    replacement = SharedStats(path, max_workers=3)
+    assert replacement.row != stats.row
+    assert replacement.totals("shared-test")["predictions"] == 11
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("threshold_dtype", [np.float64, np.float32])
+async def test_compiled_forest_matches_sklearn(tmp_path, threshold_dtype):
+    """Test compiled forests reproduce sklearn's probabilities and load as a model format"""
+    from sklearn.ensemble import ExtraTreesClassifier, RandomForestClassifier
+    from app.ml.forest import FOREST_SUFFIX, compile_forest
+    
+    rng = np.random.default_rng(0)
+    X = np.round(rng.normal(size=(600, 6)), 2)
+    y = np.array(["a", "b", "c"])[(X[:, 0] + X[:, 1] > 0).astype(int) + (X[:, 2] > 1)]
+    
+    for model_class in (RandomForestClassifier, ExtraTreesClassifier):
+        model = model_class(n_estimators=20, random_state=0).fit(X[:400], y[:400])
+        path = tmp_path / f"{model_class.__name__}{FOREST_SUFFIX}"
+        forest = compile_forest(model, str(path), threshold_dtype=threshold_dtype)
+        assert forest.threshold.dtype == threshold_dtype
+        
+        # Exact splits, so leaves and probabilities agree on unseen rows too
+        np.testing.assert_allclose(forest.predict_proba(X), model.predict_proba(X), rtol=0, atol=1e-12)
+        assert (forest.predict(X) == model.predict(X)).all()
+        
+        loaded = await ModelLoader().load_model(str(path))
+        assert isinstance(loaded.feature, np.memmap)
+        assert (ModelLoader().predict_native(loaded, X[:5].tolist()) == model.predict(X[:5])).all()
+        
+        with pytest.raises(ValueError):
+            forest.predict(X[:, :3])
+
+@pytest.mark.asyncio
+async def test_model_info_exposes_inference_profile():
+    """Test training-time size and latency are surfaced by get_model_info"""
+    from app.ml.model_manager import ModelManager
+    
+    manager = ModelManager()
+    profile = {"size_bytes": 2048, "single_row_ms": 0.8, "batch_ms": 4.0, "batch_rows": 256}
+    manager.model_metadata["profiled"] = {
+        "inference_profile": profile,
+        "training_metrics": {"selection": {"objective": "pareto"}}
+    }
+    
+    info = await manager.get_model_info("profiled")
+    assert info["inference_profile"] == profile
+    assert info["selection_objective"] == "pareto"
+
+@pytest.mark.asyncio
+async def test_prediction_log_records_preprocessed_features():
+    """Test logged features are the preprocessed ones the model predicted on"""
+    from app.ml.model_manager import ModelManager
+    from app.ml.prediction_log import PredictionLog
+    
+    preprocessor = DataPreprocessor()
+    await preprocessor.fit_preprocessor([[0.0, 10.0], [2.0, 30.0]], {'normalization': 'standard'})
+    manager = ModelManager()
+    manager.attach_prediction_log(PredictionLog(session_factory=lambda: None))
+    model = _DtypeRecorder()
+    manager.models["scaled"] = model
+    manager.model_metadata["scaled"] = {"preprocessing": {'normalization': 'standard'}}
+    manager.preprocessors["scaled"] = preprocessor
+    await manager.predict("scaled", [[1.0, 20.0]], request_id="logged")
+    
+    record = manager.prediction_log.buffer[0]
+    assert record["request_id"] == "logged"
+    np.testing.assert_array_equal(record["features"], model.seen)
+    np.testing.assert_allclose(record["features"], [[0.0, 0.0]])
+
+@pytest.mark.asyncio
+async def test_prediction_log_keeps_newest_records_when_full():
+    """Test the prediction log buffer is bounded and drops its oldest records"""
+    from app.ml.prediction_log import PredictionLog
+    
+    prediction_log = PredictionLog(session_factory=lambda: None, max_buffer=3)
+    for i in range(5):
+        prediction_log.record(f"request-{i}", "v1", [[i]], np.array([i]))
+    
+    assert [record["request_id"] for record in prediction_log.buffer] == ["request-2", "request-3", "request-4"]
+
+@pytest.mark.asyncio
+async def test_shadow_compares_candidate_on_sampled_traffic(tmp_path):
+    """Test shadowed traffic is sampled, shed when the queue is full and compared off the request path"""
+    import asyncio
+    import io
+    import joblib
+    from sklearn.dummy import DummyClassifier
+    from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+    from sqlalchemy.orm import sessionmaker
+    from app.ml.model_manager import ModelManager
+    from app.ml.registry import ModelRegistry
+    from app.ml.shadow import ShadowRunner, compare_predictions
+    from app.models.database import Base
+    from app.utils.storage import MemoryStorageBackend, ModelStorage
+    
+    assert compare_predictions([1, 2, 3], np.array([1, 0, 3])) == (3, 2)
+    assert compare_predictions([0.5, 1.0], [0.5 + 1e-12, 2.0]) == (2, 1)
+    assert compare_predictions([1, 2], [1]) == (2, 0)
+    
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'registry.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    
+    manager = ModelManager()
+    manager.storage = ModelStorage(MemoryStorageBackend())
+    for version, constant in (("primary", 4), ("candidate", 4)):
+        buffer = io.BytesIO()
+        joblib.dump(DummyClassifier(strategy="constant", constant=constant).fit([[0], [1]], [4, 2]), buffer)
+        await manager.storage.save_model(version, buffer.getvalue(), {"model_type": "dummy"})
+        await manager.load_model(version)
+    await manager.attach_registry(ModelRegistry(session_factory, ttl=60))
+    
+    with pytest.raises(ValueError):
+        await manager.set_shadow("primary", "missing", 0.5)
+    await manager.set_shadow("primary", "candidate", 0.5)
+    assert (await manager.get_model_info("primary"))["shadow"] == {"candidate_version": "candidate", "sample_rate": 0.5}
+    
+    draws = iter([0.9, 0.1, 0.1])
+    manager.shadow = ShadowRunner(manager, queue_size=1, sample=lambda: next(draws))
+    result = await manager.predict("primary", [[0.5], [1.5]], native_predictions=True)
+    offers = [
+        manager.shadow.offer("primary", [[0.5], [1.5]], result["predictions"], result["inference_time"])
+        for _ in range(3)
+    ]
+    # Not sampled, queued, then shed because nothing has drained the queue yet
+    assert offers == [False, True, False]
+    
+    # Live requests waiting for admission: sampled traffic is shed, not queued
+    manager.admission.get_queue("primary").waiting = 1
+    manager.shadow.sample = lambda: 0.1
+    assert not manager.shadow.offer("primary", [[0.5]], [4], 0.001)
+    manager.admission.get_queue("primary").waiting = 0
+    
+    runner = asyncio.create_task(manager.shadow.run())
+    await asyncio.wait_for(manager.shadow.queue.join(), timeout=10)
+    runner.cancel()
+    
+    summary = manager.shadow.summary()
+    shadow = summary["shadows"][0]
+    assert (shadow["model_version"], shadow["candidate_version"], shadow["active"]) == ("primary", "candidate", True)
+    assert (shadow["sampled"], shadow["shed"], shadow["completed"], shadow["errors"]) == (1, 2, 1, 0)
+    assert shadow["rows"] == 2 and shadow["agreement_rate"] == 1.0
+    assert shadow["latency_delta_ms"] is not None
+    # Replays are not served traffic, and ran on the shadow executor
+    assert (await manager.get_model_stats("candidate"))["stats"]["total_predictions"] == 0
+    assert manager.shadow_executor.busy_seconds() > 0
+    
+    assert await manager.clear_shadow("primary")
+    assert not await manager.clear_shadow("primary")
+    assert not manager.shadow.offer("primary", [[0.5]], [4], 0.001)
+    
+    await engine.dispose()
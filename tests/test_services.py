@@ -33,6 +33,41 @@ async def test_training_service():
     assert "model" in result
     assert "metadata" in result
 
+@pytest.mark.asyncio
+async def test_training_service_publishes_bundle_through_storage():
+    """Test saved models go through the storage manifest, so serving finds them"""
+    import pandas as pd
+    import numpy as np
+    from app.ml.bundle import ModelBundle
+    from app.utils.storage import MemoryStorageBackend, ModelStorage
+    
+    storage = ModelStorage(MemoryStorageBackend())
+    service = TrainingService(storage)
+    data = pd.DataFrame({
+        'feature1': np.random.randn(50),
+        'target': np.random.randint(0, 2, 50)
+    })
+    result = await service.train_model(data, 'target')
+    
+    assert await service.save_model(
+        result["model"], result["metadata"], "trained", reference_stats=result["reference_stats"]
+    )
+    assert await storage.list_models() == ["trained"]
+    bundle = ModelBundle(await storage.get_model_path("trained"))
+    assert bundle.metadata()["target"] == "target"
+    
+    # Serving awaits process() on the bundled preprocessing
+    from sklearn.preprocessing import StandardScaler
+    from app.ml.preprocessor import DataPreprocessor
+    with pytest.raises(TypeError):
+        await service.save_model(result["model"], result["metadata"], "scaled", preprocessor=StandardScaler())
+    assert await storage.list_models() == ["trained"]
+    
+    preprocessor = DataPreprocessor()
+    await preprocessor.fit_preprocessor(data[['feature1']].to_numpy().tolist(), {'normalization': 'standard'})
+    assert await service.save_model(result["model"], result["metadata"], "scaled", preprocessor=preprocessor)
+    assert isinstance(ModelBundle(await storage.get_model_path("scaled")).load_preprocessing(), DataPreprocessor)
+
 @pytest.mark.asyncio
 async def test_monitoring_service():
     """Test monitoring service"""
@@ -52,4 +87,265 @@ async def test_monitoring_service():
     
     # Test drift detection (will return empty without enough data)
     drift = await service.check_data_drift("v1", [[1, 2, 3], [4, 5, 6]])
-    assert isinstance(drift, dict)
\ No newline at end of file
+    assert isinstance(drift, dict)
+
+
+class _RecordingManager:
+    """Stands in for ModelManager; records registered models"""
+
+    def __init__(self):
+        self.imports = []
+
+    async def import_model(self, source, version):
+        self.imports.append((source, version))
+
+def _training_dirs(tmp_path, monkeypatch):
+    from app.core.config import settings
+    import pandas as pd
+    import numpy as np
+
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    rng = np.random.default_rng(0)
+    pd.DataFrame({
+        'feature1': rng.normal(size=120),
+        'feature2': rng.normal(size=120),
+        'target': rng.integers(0, 2, 120)
+    }).to_csv(data_dir / "train.csv", index=False)
+    monkeypatch.setattr(settings, "TRAINING_DATA_DIR", str(data_dir))
+    monkeypatch.setattr(settings, "TRAINING_OUTPUT_DIR", str(tmp_path / "jobs"))
+    monkeypatch.setattr(settings, "TRAINING_NICE", 0)
+
+@pytest.mark.asyncio
+async def test_training_job_runs_in_worker_and_registers_model(tmp_path, monkeypatch):
+    """Test a queued training job trains out of process and registers its model with every file"""
+    import asyncio
+    from app.ml.model_manager import ModelManager
+    from app.services.jobs import SUCCEEDED, TrainingJobQueue
+    from app.utils.storage import MemoryStorageBackend, ModelStorage
+
+    _training_dirs(tmp_path, monkeypatch)
+    manager = ModelManager()
+    manager.storage = ModelStorage(MemoryStorageBackend())
+    job_queue = TrainingJobQueue(manager, max_workers=1, max_queue=0)
+    try:
+        job = job_queue.submit({
+            "data_path": "train.csv",
+            "version": "job-test",
+            "param_grid": {"n_estimators": [5]},
+            "search": "grid",
+            "n_bootstrap": 20,
+            "compile": True
+        })
+        for _ in range(1200):
+            # Progress travels separately from the result, so wait for both
+            if job.finished_at is not None and len(job.stages) == job.stages_total:
+                break
+            await asyncio.sleep(0.1)
+
+        assert job.status == SUCCEEDED, job.error
+        assert job.version == "job-test"
+        assert job.to_dict()["progress"]["stages_done"] == job.stages_total
+        entry = await manager.storage.get_version_entry("job-test")
+        assert set(entry["files"]) == {"model.forest", "model.joblib", "metadata.json"}
+        assert (await manager.storage.get_model_path("job-test")).endswith(".forest")
+        assert "evaluation_metrics" in manager.model_metadata["job-test"]
+        assert manager.model_metadata["job-test"]["compiled_forest"]["trees"] == 5
+    finally:
+        job_queue.shutdown()
+
+@pytest.mark.asyncio
+async def test_training_job_queue_rejects_bad_submissions(tmp_path, monkeypatch):
+    """Test data outside the data directory and a full queue are refused"""
+    from app.services.jobs import JobQueueFull, TrainingJobQueue, TrainingJob
+
+    _training_dirs(tmp_path, monkeypatch)
+    job_queue = TrainingJobQueue(_RecordingManager(), max_workers=1, max_queue=0)
+
+    with pytest.raises(ValueError):
+        job_queue.submit({"data_path": "../outside.csv"})
+
+    # One job already occupies the only worker
+    job_queue.jobs["busy"] = TrainingJob("busy", {})
+    with pytest.raises(JobQueueFull):
+        job_queue.submit({"data_path": "train.csv"})
+
+def test_job_queue_shutdown_stops_progress_thread(tmp_path, monkeypatch):
+    """Test shutdown ends the progress thread cleanly instead of racing it for the queue"""
+    from app.services.jobs import TrainingJobQueue
+
+    _training_dirs(tmp_path, monkeypatch)
+    job_queue = TrainingJobQueue(_RecordingManager(), max_workers=1, max_queue=0)
+    job_queue._get_executor()
+    thread = job_queue._progress_thread
+
+    job_queue.shutdown()
+    assert not thread.is_alive()
+    assert job_queue._progress_queue is None
+
+def test_job_requests_reject_unsafe_versions():
+    """Test version names that could leave the output directory fail validation"""
+    from pydantic import ValidationError
+    from app.api.endpoints.feedback import IncrementalUpdateRequest
+    from app.api.endpoints.training import TrainingJobRequest
+
+    assert TrainingJobRequest(data_path="train.csv", version="v2.1_rc-1").version == "v2.1_rc-1"
+    for version in ("../x", "..", "a/b", ".hidden", ""):
+        with pytest.raises(ValidationError):
+            TrainingJobRequest(data_path="train.csv", version=version)
+        with pytest.raises(ValidationError):
+            IncrementalUpdateRequest(base_version="v1", version=version)
+
+@pytest.mark.asyncio
+async def test_feedback_updates_model_incrementally(tmp_path, monkeypatch):
+    """Test feedback is joined to logged predictions and folded in with partial_fit"""
+    import asyncio
+    import io
+    import joblib
+    import numpy as np
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.linear_model import SGDClassifier
+    from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+    from sqlalchemy.orm import sessionmaker
+    from app.ml.model_manager import ModelManager
+    from app.ml.prediction_log import PredictionLog
+    from app.models.database import Base
+    from app.services.jobs import SUCCEEDED, TrainingJobQueue
+    from app.utils.storage import MemoryStorageBackend, ModelStorage
+
+    _training_dirs(tmp_path, monkeypatch)
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'log.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    manager = ModelManager()
+    manager.storage = ModelStorage(MemoryStorageBackend())
+    manager.attach_prediction_log(PredictionLog(session_factory, flush_interval=60))
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(200, 2))
+    y = (X[:, 0] > 0).astype(int)
+    for version, model in (
+        ("sgd-base", SGDClassifier(random_state=0)),
+        ("forest-base", RandomForestClassifier(n_estimators=2, random_state=0))
+    ):
+        buffer = io.BytesIO()
+        joblib.dump(model.fit(X, y), buffer)
+        await manager.storage.save_model(version, buffer.getvalue(), {"feature_dtype": "float64"})
+        await manager.load_model(version)
+
+    rows = rng.normal(size=(6, 2)).tolist()
+    await manager.predict("sgd-base", rows[:4], request_id="first")
+    await manager.predict("sgd-base", rows[4:], request_id="second")
+    await manager.predict("forest-base", rows[:1], request_id="third")
+
+    summary = await manager.prediction_log.record_feedback([
+        {"request_id": "first", "labels": [int(row[0] > 0) for row in rows[:4]]},
+        {"request_id": "second", "labels": [1]},
+        {"request_id": "missing", "labels": [0]}
+    ])
+    assert summary["matched"] == 1
+    assert summary["label_count_mismatch"] == ["second"]
+    assert summary["unknown_request_ids"] == ["missing"]
+
+    job_queue = TrainingJobQueue(manager, max_workers=1, max_queue=1)
+    try:
+        with pytest.raises(ValueError):
+            await job_queue.submit_update("forest-base")
+
+        job = await job_queue.submit_update("sgd-base", "sgd-next")
+        for _ in range(600):
+            if job.finished_at is not None:
+                break
+            await asyncio.sleep(0.1)
+        assert job.status == SUCCEEDED, job.error
+
+        incremental = manager.model_metadata["sgd-next"]["incremental"]
+        assert incremental["base_version"] == "sgd-base"
+        assert incremental["rows"] == 4
+        assert incremental["lineage"] == ["sgd-base", "sgd-next"]
+        assert "sgd-next" in manager.models
+
+        # Feedback already folded into sgd-next is not used again
+        with pytest.raises(ValueError):
+            await job_queue.submit_update("sgd-next")
+
+        # Not even after a correction: the relabelled rows keep their label time
+        summary = await manager.prediction_log.record_feedback([
+            {"request_id": "first", "labels": [0, 0, 0, 0]}
+        ])
+        assert summary["matched"] == 1
+        with pytest.raises(ValueError):
+            await job_queue.submit_update("sgd-next")
+    finally:
+        job_queue.shutdown()
+        await engine.dispose()
+
+@pytest.mark.asyncio
+async def test_incremental_update_of_a_lazy_bundle_keeps_its_sections(tmp_path, monkeypatch):
+    """Test bundles are checked for partial_fit before loading and updated into bundles"""
+    import asyncio
+    import numpy as np
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.linear_model import SGDClassifier
+    from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+    from sqlalchemy.orm import sessionmaker
+    from app.ml.bundle import encode_bundle
+    from app.ml.model_manager import ModelManager
+    from app.ml.prediction_log import PredictionLog
+    from app.ml.preprocessor import DataPreprocessor
+    from app.models.database import Base
+    from app.services.jobs import SUCCEEDED, TrainingJobQueue
+    from app.utils.storage import MemoryStorageBackend, ModelStorage
+
+    _training_dirs(tmp_path, monkeypatch)
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'log.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    manager = ModelManager()
+    manager.storage = ModelStorage(MemoryStorageBackend())
+    manager.attach_prediction_log(PredictionLog(session_factory, flush_interval=60))
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(200, 2))
+    y = (X[:, 0] > 0).astype(int)
+    preprocessor = DataPreprocessor()
+    await preprocessor.fit_preprocessor(X.tolist(), {"normalization": "standard"})
+    metadata = {"feature_dtype": "float64", "preprocessing": {"normalization": "standard"}}
+    for version, model in (
+        ("sgd-bundle", SGDClassifier(random_state=0)),
+        ("forest-bundle", RandomForestClassifier(n_estimators=2, random_state=0))
+    ):
+        bundle = encode_bundle(model.fit(X, y), metadata, preprocessor, {"mean": X.mean(axis=0)})
+        await manager.update_model(version, bundle, {}, "model.mlb")
+
+    rows = rng.normal(size=(4, 2)).tolist()
+    await manager.predict("sgd-bundle", rows, request_id="first")
+    await manager.prediction_log.record_feedback([
+        {"request_id": "first", "labels": [int(row[0] > 0) for row in rows]}
+    ])
+    # Back to header-only, as after a restart
+    await manager.load_model("sgd-bundle")
+    assert "sgd-bundle" not in manager.models and "forest-bundle" not in manager.models
+
+    job_queue = TrainingJobQueue(manager, max_workers=1, max_queue=1)
+    try:
+        with pytest.raises(ValueError, match="partial_fit"):
+            await job_queue.submit_update("forest-bundle")
+
+        job = await job_queue.submit_update("sgd-bundle", "sgd-bundle-next")
+        for _ in range(600):
+            if job.finished_at is not None:
+                break
+            await asyncio.sleep(0.1)
+        assert job.status == SUCCEEDED, job.error
+
+        assert "sgd-bundle-next" in manager.bundles
+        assert manager.model_metadata["sgd-bundle-next"]["preprocessing"] == {"normalization": "standard"}
+        await manager.get_model("sgd-bundle-next")
+        assert isinstance(manager.preprocessors["sgd-bundle-next"], DataPreprocessor)
+        assert manager.reference_stats["sgd-bundle-next"]["mean"].tolist() == X.mean(axis=0).tolist()
+    finally:
+        job_queue.shutdown()
+        await engine.dispose()
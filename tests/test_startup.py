@@ -0,0 +1,63 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Cumulative import time allowed for app.main; override on slow CI machines
+IMPORT_BUDGET_SECONDS = float(os.environ.get("APP_IMPORT_BUDGET_SECONDS", "1.0"))
+
+# Training-only or optional dependencies that serving must not import eagerly
+DEFERRED_MODULES = ["sklearn", "pandas", "scipy", "boto3", "botocore", "aiohttp", "psutil", "app.services.training"]
+
+def _run_python(*args: str) -> subprocess.CompletedProcess:
+    env = dict(os.environ, PYTHONPATH=str(ROOT))
+    return subprocess.run(
+        [sys.executable, *args],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+
+def _import_seconds(module: str) -> float:
+    """Cumulative import time of a module in a fresh interpreter"""
+    result = _run_python("-X", "importtime", "-c", f"import {module}")
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        parts = [part.strip() for part in line.split("|")]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1]) / 1e6
+    raise AssertionError(f"No import time reported for {module}")
+
+def test_app_import_within_budget():
+    """Test importing the API stays within the cold-start budget"""
+    # Best of three to ride out a cold page cache
+    seconds = min(_import_seconds("app.main") for _ in range(3))
+    assert seconds <= IMPORT_BUDGET_SECONDS, (
+        f"Importing app.main took {seconds:.3f}s (budget {IMPORT_BUDGET_SECONDS}s); "
+        f"run scripts/profile_imports.py to find the regression"
+    )
+
+@pytest.mark.parametrize("entry_point", ["app.main", "app.ml.model_manager"])
+def test_heavy_dependencies_are_deferred(entry_point):
+    """Test serving entry points do not import training or optional dependencies"""
+    result = _run_python(
+        "-c",
+        f"import sys, {entry_point}; "
+        f"print(','.join(m for m in {DEFERRED_MODULES!r} if m in sys.modules))"
+    )
+    assert result.stdout.strip() == ""
+
+@pytest.mark.skipif(not Path("/proc/self/smaps_rollup").exists(), reason="needs Linux smaps_rollup")
+def test_prefork_memory_report_reads_rss_and_pss():
+    """Test the prefork launcher can measure shared vs proportional memory"""
+    from app.prefork import read_memory
+    
+    memory = read_memory(os.getpid())
+    assert memory["Rss"] >= memory["Pss"] > 0
+    assert read_memory(2 ** 22 + 1) is None
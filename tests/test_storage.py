@@ -0,0 +1,261 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import pytest
+
+from app.utils.artifact_cache import ArtifactCache, ArtifactInfo, ArtifactIntegrityError
+from app.utils.storage import LocalStorageBackend, MemoryStorageBackend, ModelStorage
+
+class FakeObjectStore:
+    """In-process stand-in for an object store with ranged reads"""
+    
+    def __init__(self, publish_digest: bool = True):
+        self.objects = {}
+        self.publish_digest = publish_digest
+        self.range_reads = 0
+        self.lock = threading.Lock()
+    
+    def put(self, key: str, data: bytes) -> str:
+        self.objects[key] = data
+        return hashlib.sha256(data).hexdigest()
+    
+    def stat(self, key: str) -> ArtifactInfo:
+        data = self.objects[key]
+        return ArtifactInfo(
+            size=len(data),
+            sha256=hashlib.sha256(data).hexdigest() if self.publish_digest else None,
+            etag=f'"{hashlib.md5(data).hexdigest()}"'
+        )
+    
+    def read_range(self, key: str, start: int, end: int) -> bytes:
+        with self.lock:
+            self.range_reads += 1
+        return self.objects[key][start:end]
+
+def test_artifact_cache_ranged_download_and_hit(tmp_path):
+    """Test artifacts are fetched in ranges once and then served locally"""
+    store = FakeObjectStore()
+    data = os.urandom(10_000)
+    digest = store.put("models/v1/model.joblib", data)
+    cache = ArtifactCache(str(tmp_path), max_bytes=1_000_000, chunk_size=1024, max_workers=4)
+    
+    path = cache.fetch(store, "models/v1/model.joblib", ".joblib")
+    assert path == cache.object_path(digest, ".joblib")
+    assert path.read_bytes() == data
+    assert store.range_reads == 10
+    
+    assert cache.fetch(store, "models/v1/model.joblib", ".joblib") == path
+    assert store.range_reads == 10
+
+def test_artifact_cache_without_published_digest(tmp_path):
+    """Test digests computed on arrival are remembered by ETag"""
+    store = FakeObjectStore(publish_digest=False)
+    digest = store.put("models/v1/metadata.json", b'{"model_type": "rf"}')
+    cache = ArtifactCache(str(tmp_path), max_bytes=1_000_000)
+    
+    assert cache.fetch(store, "models/v1/metadata.json").name == digest
+    cache.fetch(store, "models/v1/metadata.json")
+    assert store.range_reads == 1
+
+def test_artifact_cache_rejects_corrupt_download(tmp_path):
+    """Test integrity is verified before an artifact enters the cache"""
+    store = FakeObjectStore()
+    store.put("models/v1/model.joblib", b"expected bytes")
+    
+    class CorruptingStore(FakeObjectStore):
+        def read_range(self, key, start, end):
+            return b"X" * (end - start)
+    
+    corrupt = CorruptingStore()
+    corrupt.objects = store.objects
+    cache = ArtifactCache(str(tmp_path), max_bytes=1_000_000)
+    
+    with pytest.raises(ArtifactIntegrityError):
+        cache.fetch(corrupt, "models/v1/model.joblib")
+    assert cache.size() == 0
+    assert list(cache.tmp_dir.iterdir()) == []
+
+def test_artifact_cache_concurrent_fetch_downloads_once(tmp_path):
+    """Test concurrent fetchers of one artifact share a single download"""
+    store = FakeObjectStore()
+    store.put("models/v1/model.joblib", os.urandom(4096))
+    cache = ArtifactCache(str(tmp_path), max_bytes=1_000_000, chunk_size=1024)
+    
+    paths = []
+    threads = [
+        threading.Thread(target=lambda: paths.append(cache.fetch(store, "models/v1/model.joblib")))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert len(set(paths)) == 1
+    assert store.range_reads == 4
+
+def test_artifact_cache_evicts_least_recently_used(tmp_path):
+    """Test the cache stays within its size bound"""
+    store = FakeObjectStore()
+    for version in ("v1", "v2", "v3"):
+        store.put(f"models/{version}/model.joblib", os.urandom(400))
+    cache = ArtifactCache(str(tmp_path), max_bytes=1000)
+    
+    first = cache.fetch(store, "models/v1/model.joblib")
+    os.utime(first, (0, 0))
+    cache.fetch(store, "models/v2/model.joblib")
+    cache.fetch(store, "models/v3/model.joblib")
+    
+    assert cache.size() <= 1000
+    assert not first.exists()
+
+def test_artifact_cache_known_info_skips_stat(tmp_path):
+    """Test a digest from the manifest serves cache hits without a request"""
+    store = FakeObjectStore()
+    data = os.urandom(2048)
+    digest = store.put("models/v1/model.joblib", data)
+    cache = ArtifactCache(str(tmp_path), max_bytes=1_000_000)
+    cache.fetch(store, "models/v1/model.joblib")
+    
+    class OfflineStore(FakeObjectStore):
+        def stat(self, key):
+            raise AssertionError("stat should not be called")
+    
+    info = ArtifactInfo(size=len(data), sha256=digest)
+    assert cache.fetch(OfflineStore(), "models/v1/model.joblib", info=info).read_bytes() == data
+
+def test_bundle_loads_after_its_cached_file_is_evicted(tmp_path):
+    """Test a bundle registered from its header still loads once the cache evicts its file"""
+    import numpy as np
+    from sklearn.dummy import DummyClassifier
+    from app.ml.bundle import ModelBundle, encode_bundle
+    
+    store = FakeObjectStore()
+    model = DummyClassifier(strategy="constant", constant=3).fit([[0], [1]], [3, 1])
+    data = encode_bundle(model, {"model_type": "dummy"}, reference_stats={"mean": np.array([1.0, 2.0])})
+    store.put("v1/model.mlb", data)
+    filler = os.urandom(len(data))
+    store.put("v2/model.joblib", filler)
+    cache = ArtifactCache(str(tmp_path), max_bytes=len(data) + len(filler) - 1)
+    
+    bundle = ModelBundle(str(cache.fetch(store, "v1/model.mlb", ".mlb")))
+    cache.fetch(store, "v2/model.joblib", ".joblib")
+    
+    assert not bundle.path.exists()
+    assert bundle.load_model().predict([[0]]).tolist() == [3]
+    assert bundle.reference_stats()["mean"].tolist() == [1.0, 2.0]
+    bundle.close()
+
+@pytest.mark.asyncio
+async def test_local_storage_rebuilds_missing_manifest(tmp_path):
+    """Test existing version directories are indexed into a manifest once"""
+    (tmp_path / "v1").mkdir()
+    (tmp_path / "v1" / "model.joblib").write_bytes(b"model")
+    (tmp_path / "v1" / "metadata.json").write_text("{}")
+    (tmp_path / "scratch").mkdir()
+    (tmp_path / "scratch" / "notes.txt").write_text("not a model")
+    storage = ModelStorage(LocalStorageBackend(str(tmp_path)))
+    
+    assert await storage.list_models() == ["v1"]
+    manifest = json.loads((tmp_path / "manifest.json").read_text())
+    assert manifest["versions"]["v1"]["files"]["model.joblib"]["sha256"] == hashlib.sha256(b"model").hexdigest()
+    assert await storage.get_model_path("v1") == str(tmp_path / "v1" / "model.joblib")
+
+@pytest.mark.asyncio
+async def test_memory_storage_save_publishes_manifest():
+    """Test saving a version updates the manifest and its change stamp"""
+    storage = ModelStorage(MemoryStorageBackend())
+    assert await storage.list_models() == []
+    stamp = await storage.manifest_stamp()
+    
+    await storage.save_model("v2", b"model bytes", {"model_type": "test"})
+    
+    assert await storage.manifest_stamp() != stamp
+    assert await storage.list_models() == ["v2"]
+    assert (await storage.get_manifest())["generation"] == 1
+    assert await storage.get_version_digest("v2") == hashlib.sha256(b"model bytes").hexdigest()
+    with open(await storage.get_model_path("v2"), "rb") as f:
+        assert f.read() == b"model bytes"
+    with open(await storage.get_metadata_path("v2")) as f:
+        assert json.load(f) == {"model_type": "test"}
+
+@pytest.mark.asyncio
+async def test_storage_concurrent_saves_and_deletes_keep_manifest_consistent():
+    """Test concurrent saves keep every version and deleted versions stay deleted"""
+    class SlowBackend(MemoryStorageBackend):
+        async def write_bytes(self, name, data):
+            # Interleave concurrent saves between manifest read and write
+            await asyncio.sleep(0.01)
+            await super().write_bytes(name, data)
+    
+    backend = SlowBackend()
+    storage = ModelStorage(backend)
+    await asyncio.gather(*(storage.save_model(f"v{i}", b"model", {}) for i in range(4)))
+    assert await storage.list_models() == ["v0", "v1", "v2", "v3"]
+    
+    assert await storage.delete_model("v1")
+    assert not await storage.delete_model("v1")
+    assert "v1/model.joblib" not in backend.objects
+    # A rebuilt manifest does not bring the version back
+    del backend.objects["manifest.json"]
+    assert await ModelStorage(backend).list_models() == ["v0", "v2", "v3"]
+
+@pytest.mark.asyncio
+async def test_resave_deletes_files_the_new_upload_does_not_have():
+    """Test a stale compiled forest from an earlier save is not left to be served"""
+    backend = MemoryStorageBackend()
+    storage = ModelStorage(backend)
+    await storage.save_model("v1", b"old model", {}, sidecars={"model.forest": b"old forest"})
+    assert (await storage.get_model_path("v1")).endswith(".forest")
+    
+    await storage.save_model("v1", b"new model", {})
+    
+    assert "v1/model.forest" not in backend.objects
+    assert set((await storage.get_manifest())["versions"]["v1"]["files"]) == {"model.joblib", "metadata.json"}
+    del backend.objects["manifest.json"]
+    with open(await ModelStorage(backend).get_model_path("v1"), "rb") as f:
+        assert f.read() == b"new model"
+
+@pytest.mark.asyncio
+async def test_manifest_updates_from_separate_writers_are_not_lost(tmp_path):
+    """Test writers with their own in-process locks (other processes) keep each other's versions"""
+    class SlowReadBackend(MemoryStorageBackend):
+        async def read_bytes(self, name):
+            # Both writers read the manifest before either writes it
+            data = await super().read_bytes(name)
+            await asyncio.sleep(0.01)
+            return data
+    
+    backend = SlowReadBackend()
+    assert await ModelStorage(backend).list_models() == []
+    writers = [ModelStorage(backend), ModelStorage(backend)]
+    await asyncio.gather(*(writers[i % 2].save_model(f"v{i}", b"model", {}) for i in range(4)))
+    assert await ModelStorage(backend).list_models() == ["v0", "v1", "v2", "v3"]
+    
+    local_writers = [ModelStorage(LocalStorageBackend(str(tmp_path))) for _ in range(2)]
+    await asyncio.gather(*(local_writers[i % 2].save_model(f"v{i}", b"model", {}) for i in range(6)))
+    await local_writers[0].delete_model("v0")
+    manifest = json.loads((tmp_path / "manifest.json").read_text())
+    assert sorted(manifest["versions"]) == ["v1", "v2", "v3", "v4", "v5"]
+
+@pytest.mark.asyncio
+async def test_listing_without_digests_uses_etag_as_version_digest():
+    """Test versions indexed from an S3-style listing still detect changed artifacts"""
+    class EtagBackend(MemoryStorageBackend):
+        async def list_files(self):
+            return [
+                (name, len(data), None, f'"{hashlib.md5(data).hexdigest()}"')
+                for name, data in sorted(self.objects.items()) if name != "manifest.json"
+            ]
+    
+    backend = EtagBackend()
+    await backend.write_bytes("v1/model.joblib", b"first")
+    await backend.write_bytes("v1/metadata.json", b"{}")
+    first = await ModelStorage(backend).get_version_digest("v1")
+    
+    await backend.write_bytes("v1/model.joblib", b"second")
+    del backend.objects["manifest.json"]
+    second = await ModelStorage(backend).get_version_digest("v1")
+    assert first is not None and second is not None and first != second
@@ -0,0 +1,317 @@
+import json
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.utils.storage import LocalStorageBackend, ModelStorage
+from training_pipeline.pipeline import TrainingPipeline
+from training_pipeline.stages import Stage, StageCache, StageGraph
+
+def write_dataset(path) -> None:
+    rng = np.random.default_rng(0)
+    y = np.repeat([0, 1, 2], 30)
+    data = pd.DataFrame({
+        'feature1': rng.normal(y, 0.5),
+        'feature2': rng.normal(-y, 0.5),
+        'target': y
+    })
+    data.loc[3, 'feature1'] = np.nan
+    data.to_csv(path, index=False)
+
+@pytest.mark.asyncio
+async def test_pipeline_reuses_cached_data_stages(tmp_path):
+    """Test a changed hyperparameter re-runs training but skips the data stages"""
+    data_path = tmp_path / "data.csv"
+    write_dataset(data_path)
+    
+    def build(param_grid):
+        return TrainingPipeline(
+            data_path=str(data_path),
+            param_grid=param_grid,
+            cv=2,
+            output_dir=str(tmp_path / "models"),
+            cache_dir=str(tmp_path / "cache"),
+            memmap_dir=str(tmp_path / "memmap"),
+            n_bootstrap=50
+        )
+    
+    first = build({'n_estimators': [5]})
+    await first.run("v1")
+    assert {timing["status"] for timing in first.stage_timings.values()} == {"ran"}
+    
+    second = build({'n_estimators': [10]})
+    await second.run("v2")
+    status = {stage: timing["status"] for stage, timing in second.stage_timings.items()}
+    assert status["load"] == "skipped"
+    assert status["preprocess"] == status["split"] == status["profile"] == "cached"
+    assert status["train"] == status["evaluate"] == status["package"] == "ran"
+    
+    metadata = json.loads((tmp_path / "models" / "v2" / "metadata.json").read_text())
+    assert metadata["training_metrics"]["best_params"] == {"n_estimators": 10}
+    assert metadata["stage_timings"]["train"]["status"] == "ran"
+    assert (tmp_path / "models" / "v2" / "model.joblib").exists()
+    assert metadata["resources"]["backend"] == "loky"
+    assert metadata["inference_profile"]["size_bytes"] > 0
+    assert metadata["training_metrics"]["selection"]["objective"] == "accuracy"
+    assert metadata["resources"]["peak_rss_mib"] > 0
+
+@pytest.mark.asyncio
+async def test_pipeline_publishes_version_in_manifest(tmp_path):
+    """Test a packaged version is listed in the manifest with its compiled forest"""
+    data_path = tmp_path / "data.csv"
+    write_dataset(data_path)
+    pipeline = TrainingPipeline(
+        data_path=str(data_path),
+        param_grid={'n_estimators': [5]},
+        cv=2,
+        output_dir=str(tmp_path / "models"),
+        cache_dir=None,
+        memmap_dir=str(tmp_path / "memmap"),
+        n_bootstrap=10,
+        compile=True
+    )
+    await pipeline.run("v1")
+    
+    storage = ModelStorage(LocalStorageBackend(str(tmp_path / "models")))
+    assert await storage.list_models() == ["v1"]
+    entry = await storage.get_version_entry("v1")
+    assert set(entry["files"]) == {"model.joblib", "model.forest", "metadata.json"}
+    assert (await storage.get_model_path("v1")).endswith("model.forest")
+
+@pytest.mark.asyncio
+async def test_packaged_model_serves_raw_rows_like_the_holdout(tmp_path):
+    """Test serving applies the training imputer and scaler to raw rows"""
+    import joblib
+    from app.ml.model_manager import ModelManager
+    from training_pipeline.data_processing import DataProcessor
+    from training_pipeline.model_training import ModelTrainer
+    
+    data_path = tmp_path / "data.csv"
+    write_dataset(data_path)
+    pipeline = TrainingPipeline(
+        data_path=str(data_path),
+        param_grid={'n_estimators': [5]},
+        cv=2,
+        output_dir=str(tmp_path / "models"),
+        cache_dir=None,
+        memmap_dir=str(tmp_path / "memmap"),
+        n_bootstrap=10
+    )
+    await pipeline.run("v1")
+    
+    # The holdout exactly as the pipeline built it, and the rows it came from
+    processor = DataProcessor()
+    statistics = await processor.scan_data(str(data_path), "target")
+    processed = await processor.transform_data(str(data_path), "target", statistics, dtype=np.float32)
+    _, X_test, _, _ = ModelTrainer().split_data(processed, "target")
+    # Plus the row with a missing value, so imputation is exercised too
+    rows = X_test.index.append(pd.Index([3]))
+    model = joblib.load(tmp_path / "models" / "v1" / "model.joblib")
+    expected = model.predict(processed.drop(columns=["target"]).loc[rows].to_numpy())
+    raw_rows = pd.read_csv(data_path).drop(columns=["target"]).loc[rows]
+    assert raw_rows.isna().any().any()
+    
+    manager = ModelManager()
+    manager.storage = ModelStorage(LocalStorageBackend(str(tmp_path / "models")))
+    await manager.load_model("v1")
+    result = await manager.predict("v1", raw_rows.to_numpy().tolist(), native_predictions=True)
+    np.testing.assert_array_equal(result["predictions"], expected)
+
+@pytest.mark.asyncio
+async def test_stage_graph_runs_independent_stages_concurrently(tmp_path):
+    """Test stages without a dependency between them overlap"""
+    def slow(value):
+        time.sleep(0.2)
+        return value
+    
+    graph = StageGraph([
+        Stage("source", lambda: 1),
+        Stage("left", slow, inputs=["source"]),
+        Stage("right", slow, inputs=["source"]),
+        Stage("join", lambda left, right: left + right, inputs=["left", "right"]),
+    ])
+    
+    start_time = time.perf_counter()
+    outputs = await graph.run(StageCache(str(tmp_path)))
+    assert outputs["join"] == 2
+    assert time.perf_counter() - start_time < 0.38
+    
+    # Fully cached: only the final stage is loaded
+    timings = {}
+    await graph.run(StageCache(str(tmp_path)), timings)
+    assert timings["join"]["status"] == "cached"
+    assert timings["left"]["status"] == timings["source"]["status"] == "skipped"
+
+def test_stage_graph_rejects_cycles():
+    """Test cyclic stage graphs are rejected before anything runs"""
+    graph = StageGraph([
+        Stage("a", lambda b: b, inputs=["b"]),
+        Stage("b", lambda a: a, inputs=["a"]),
+    ])
+    with pytest.raises(ValueError):
+        graph.order()
+
+def test_successive_halving_prunes_candidates_and_reports_cost():
+    """Test halving stops weak candidates early and fits far fewer trees than a grid"""
+    from training_pipeline.search import successive_halving_search
+    
+    rng = np.random.default_rng(0)
+    y = np.repeat([0, 1], 60)
+    X = pd.DataFrame({'signal': rng.normal(y * 2.0, 1.0), 'noise': rng.normal(size=120)})
+    param_grid = {'n_estimators': [9, 27], 'max_depth': [1, 2, 4, None], 'max_features': [1, 2]}
+    
+    result = successive_halving_search(X, y, param_grid, min_estimators=3, cv=3)
+    search = result["search"]
+    
+    assert [rung["candidates"] for rung in search["rungs"]] == [8, 3, 1]
+    assert result["best_params"]["n_estimators"] == 27
+    assert result["model"].n_estimators == 27
+    assert search["tree_fits"] < search["exhaustive_tree_fits"]
+    # Pruned candidates never grew past the first rung
+    assert sum(candidate["n_estimators"] == 3 for candidate in search["candidates"]) == 5
+    
+    budgeted = successive_halving_search(X, y, param_grid, min_estimators=3, cv=3, time_budget=0.0)
+    assert budgeted["search"]["budget_exhausted"] is True
+    assert len(budgeted["search"]["candidates"]) == 1
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("suffix", [".csv", ".parquet", ".arrow"])
+async def test_chunked_preprocessing_matches_in_memory_fit(tmp_path, suffix):
+    """Test statistics fit over chunks equal a single in-memory imputer and scaler fit"""
+    from sklearn.impute import SimpleImputer
+    from sklearn.preprocessing import StandardScaler
+    from training_pipeline.data_processing import DataProcessor
+    
+    data_path = tmp_path / f"data{suffix}"
+    write_dataset(tmp_path / "data.csv")
+    frame = pd.read_csv(tmp_path / "data.csv")
+    if suffix == ".parquet":
+        frame.to_parquet(data_path)
+    elif suffix == ".arrow":
+        frame.to_feather(data_path)
+    
+    processor = DataProcessor(chunk_size=7)
+    # Integer and float columns are downcast as they are read
+    assert (await processor.load_data(str(data_path)))['target'].dtype == np.int8
+    processed = await processor.process_data(str(data_path), 'target')
+    
+    features = frame.drop(columns=['target'])
+    expected = StandardScaler().fit_transform(SimpleImputer(strategy='mean').fit_transform(features))
+    np.testing.assert_allclose(processed[['feature1', 'feature2']].to_numpy(), expected, atol=1e-5)
+    assert processed['target'].tolist() == frame['target'].tolist()
+
+@pytest.mark.asyncio
+async def test_evaluation_uses_one_chunked_probability_pass():
+    """Test labels come from predict_proba in chunks and bootstrap intervals bracket the metrics"""
+    from sklearn.linear_model import LogisticRegression
+    from training_pipeline.model_evaluation import ModelEvaluator
+    
+    rng = np.random.default_rng(0)
+    y = np.repeat([0, 1, 2], 40)
+    X = pd.DataFrame({'feature1': rng.normal(y, 0.8), 'feature2': rng.normal(-y, 0.8)})
+    
+    class CountingModel(LogisticRegression):
+        proba_rows = []
+        
+        def predict(self, X):
+            raise AssertionError("evaluation should not call predict")
+        
+        def predict_proba(self, X):
+            self.proba_rows.append(len(X))
+            return super().predict_proba(X)
+    
+    model = CountingModel().fit(X, y)
+    evaluator = ModelEvaluator(chunk_size=50, n_bootstrap=200, n_jobs=2)
+    metrics = await evaluator.evaluate_model(model, X, pd.Series(y))
+    
+    assert model.proba_rows == [50, 50, 20]
+    assert metrics["accuracy"] == np.mean(LogisticRegression.predict(model, X) == y)
+    intervals = metrics["confidence_intervals"]
+    assert intervals["n_bootstrap"] == 200
+    for name in ("accuracy", "roc_auc"):
+        assert intervals[name]["lower"] <= metrics[name] <= intervals[name]["upper"]
+    assert metrics["timing"]["rows"] == 120
+    
+    # The resample AUC is the weighted rank statistic sklearn computes on the drawn rows
+    from sklearn.metrics import roc_auc_score
+    from training_pipeline.model_evaluation import _weighted_roc_auc
+    drawn = rng.integers(0, len(y), len(y))
+    weights = np.bincount(drawn, minlength=len(y))[None].astype(float)
+    scores = np.round(model.predict_proba(X)[:, 1], 1)
+    assert _weighted_roc_auc(weights, y == 1, scores)[0] == pytest.approx(roc_auc_score(y[drawn] == 1, scores[drawn]))
+    
+    # Blocks are sized from the row budget; one resample per block gives the same draws
+    from training_pipeline.model_evaluation import _bootstrap_batch
+    proba = model.predict_proba(X)
+    y_pred = proba.argmax(axis=1)
+    np.testing.assert_allclose(
+        _bootstrap_batch(y, y_pred, proba, 10, 7, row_budget=len(y)),
+        _bootstrap_batch(y, y_pred, proba, 10, 7)
+    )
+    
+    # Seeds are derived per worker, so a rerun reproduces the intervals
+    again = await ModelEvaluator(chunk_size=50, n_bootstrap=200, n_jobs=2).evaluate_model(model, X, pd.Series(y))
+    assert again["confidence_intervals"] == intervals
+
+def test_memmap_array_is_shared_read_only(tmp_path):
+    """Test the training matrix is written once and mapped read-only for parallel fits"""
+    from sklearn.ensemble import RandomForestClassifier
+    from training_pipeline.parallel import memmap_array, parallel_backend
+    
+    X = np.random.default_rng(0).normal(size=(200, 4)).astype(np.float32)
+    y = (X[:, 0] > 0).astype(int)
+    mapped = memmap_array(X, str(tmp_path))
+    
+    assert isinstance(mapped, np.memmap)
+    assert not mapped.flags.writeable
+    assert mapped.dtype == np.float32
+    np.testing.assert_array_equal(mapped, X)
+    # Same contents map the existing file
+    assert memmap_array(X, str(tmp_path)).filename == mapped.filename
+    assert len(list(tmp_path.iterdir())) == 1
+    
+    with parallel_backend("loky", 2):
+        model = RandomForestClassifier(n_estimators=10, random_state=0, n_jobs=2).fit(mapped, y)
+    assert model.score(X, y) > 0.9
+
+def test_selection_objectives_trade_accuracy_for_latency():
+    """Test the objectives pick different candidates from the same profiles"""
+    from training_pipeline.selection import pareto_front, select_candidate
+    
+    candidates = [
+        {"cv_accuracy": 0.950, "single_row_ms": 9.0, "size_bytes": 9000},
+        {"cv_accuracy": 0.945, "single_row_ms": 2.0, "size_bytes": 2000},
+        {"cv_accuracy": 0.900, "single_row_ms": 1.0, "size_bytes": 1000},
+        {"cv_accuracy": 0.890, "single_row_ms": 3.0, "size_bytes": 3000},
+    ]
+    assert pareto_front(candidates) == [0, 1, 2]
+    assert select_candidate(candidates, "accuracy")["selected"] == 0
+    assert select_candidate(candidates, "latency_slo", latency_slo_ms=5.0)["selected"] == 1
+    assert select_candidate(candidates, "pareto")["selected"] == 1
+    
+    missed = select_candidate(candidates, "latency_slo", latency_slo_ms=0.5)
+    assert missed["selected"] == 2 and not missed["slo_met"]
+    with pytest.raises(ValueError):
+        select_candidate(candidates, "latency_slo")
+
+def test_fit_model_profiles_finalists():
+    """Test finalists are refit and profiled and the winner's numbers are reported"""
+    from training_pipeline.model_training import ModelTrainer
+    
+    rng = np.random.default_rng(0)
+    y = np.repeat([0, 1], 60)
+    X = pd.DataFrame({'feature1': rng.normal(y, 0.7), 'feature2': rng.normal(-y, 0.7)})
+    
+    result = ModelTrainer().fit_model(
+        X, pd.Series(y), {'n_estimators': [5, 40], 'max_depth': [2, None]}, cv=2,
+        search="grid", n_jobs=1, objective="latency_slo", latency_slo_ms=1e6, finalists=4
+    )
+    selection = result["selection"]
+    assert len(selection["candidates"]) == 4
+    assert all(candidate["size_bytes"] > 0 and candidate["single_row_ms"] > 0 for candidate in selection["candidates"])
+    selected = selection["candidates"][selection["selected"]]
+    assert result["best_params"] == selected["params"]
+    assert result["model"].n_estimators == selected["params"]["n_estimators"]
+    assert result["inference_profile"]["size_bytes"] == selected["size_bytes"]
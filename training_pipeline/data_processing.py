@@ -1,61 +1,198 @@
 import pandas as pd
 import numpy as np
+from pathlib import Path
 from sklearn.preprocessing import StandardScaler
 from sklearn.impute import SimpleImputer
+from typing import Any, Dict, Iterator, Union
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Rows per chunk when streaming a dataset
+DEFAULT_CHUNK_SIZE = 100_000
+
+PARQUET_SUFFIXES = {".parquet", ".pq"}
+ARROW_SUFFIXES = {".arrow", ".feather", ".ipc"}
+
+DataSource = Union[str, Path, pd.DataFrame]
+
+def downcast_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Shrink numeric columns to the smallest dtype that holds their values"""
+    for column in df.columns:
+        series = df[column]
+        if pd.api.types.is_float_dtype(series):
+            df[column] = pd.to_numeric(series, downcast="float")
+        elif pd.api.types.is_integer_dtype(series):
+            df[column] = pd.to_numeric(series, downcast="integer")
+    return df
+
 class DataProcessor:
-    def __init__(self):
+    """Loads training data and fits the imputer and scaler over it.
+
+    Datasets are read in chunks of ``chunk_size`` rows: CSV through the
+    chunked pandas reader, Parquet and Arrow IPC through memory-mapped
+    pyarrow readers. Preprocessing takes two passes over the chunks, one
+    for the imputation means and one that imputes, accumulates the scaler
+    statistics and fills a preallocated feature matrix, so no full-size
+    intermediate copies are made.
+    """
+    
+    def __init__(self, chunk_size: int = DEFAULT_CHUNK_SIZE):
         self.scaler = StandardScaler()
         self.imputer = SimpleImputer(strategy='mean')
         self.feature_columns = None
+        self.chunk_size = chunk_size
+    
+    def iter_chunks(self, source: DataSource) -> Iterator[pd.DataFrame]:
+        """Yield a dataset (file path or frame) as downcast chunks of at most chunk_size rows"""
+        if isinstance(source, pd.DataFrame):
+            for start in range(0, len(source), self.chunk_size):
+                yield source.iloc[start:start + self.chunk_size]
+            return
+        
+        path = Path(source)
+        suffix = path.suffix.lower()
+        if suffix in PARQUET_SUFFIXES:
+            try:
+                import pyarrow.parquet as pq
+            except ImportError:
+                raise ImportError("pyarrow is required to read Parquet data")
+            parquet_file = pq.ParquetFile(path, memory_map=True)
+            for batch in parquet_file.iter_batches(batch_size=self.chunk_size):
+                yield downcast_frame(batch.to_pandas())
+        elif suffix in ARROW_SUFFIXES:
+            try:
+                import pyarrow as pa
+            except ImportError:
+                raise ImportError("pyarrow is required to read Arrow data")
+            # Batches are views into the mapped file until converted
+            with pa.memory_map(str(path)) as source_file:
+                reader = pa.ipc.open_file(source_file)
+                for index in range(reader.num_record_batches):
+                    batch = reader.get_batch(index)
+                    for start in range(0, batch.num_rows, self.chunk_size):
+                        yield downcast_frame(batch.slice(start, self.chunk_size).to_pandas())
+        else:
+            for chunk in pd.read_csv(path, chunksize=self.chunk_size):
+                yield downcast_frame(chunk)
     
     async def load_data(self, file_path: str) -> pd.DataFrame:
-        """Load and preprocess data"""
+        """Load a dataset into one frame with downcast dtypes"""
         try:
-            df = pd.read_csv(file_path)
-            logger.info(f"Loaded data with shape: {df.shape}")
+            df = pd.concat(self.iter_chunks(file_path), ignore_index=True)
+            logger.info(
+                f"Loaded data with shape: {df.shape} "
+                f"({df.memory_usage(deep=True).sum() / 1024 ** 2:.1f}MiB)"
+            )
             return df
         except Exception as e:
             logger.error(f"Failed to load data: {str(e)}")
             raise
     
-    async def preprocess_data(self, df: pd.DataFrame, target_column: str) -> pd.DataFrame:
-        """Preprocess the data"""
+    async def scan_data(self, source: DataSource, target_column: str) -> Dict[str, Any]:
+        """First pass: row count and per-column means of the observed feature values"""
         try:
-            # Handle missing values
-            df = df.dropna(subset=[target_column])
+            feature_columns = None
+            n_rows = 0
+            sums = counts = None
             
-            # Separate features and target
-            X = df.drop(columns=[target_column])
-            y = df[target_column]
+            for chunk in self.iter_chunks(source):
+                chunk = chunk.dropna(subset=[target_column])
+                features = chunk.drop(columns=[target_column])
+                if feature_columns is None:
+                    feature_columns = features.columns.tolist()
+                    sums = np.zeros(len(feature_columns))
+                    counts = np.zeros(len(feature_columns), dtype=np.int64)
+                
+                values = features.to_numpy(dtype=np.float64)
+                observed = ~np.isnan(values)
+                sums += np.where(observed, values, 0.0).sum(axis=0)
+                counts += observed.sum(axis=0)
+                n_rows += len(chunk)
             
-            # Store feature columns
-            self.feature_columns = X.columns.tolist()
+            if feature_columns is None or not n_rows:
+                raise ValueError("No rows with a target value")
             
-            # Impute missing values
-            X_imputed = self.imputer.fit_transform(X)
+            empty = [column for column, count in zip(feature_columns, counts) if not count]
+            if empty:
+                raise ValueError(f"Feature columns without any values: {empty}")
             
-            # Scale features
-            X_scaled = self.scaler.fit_transform(X_imputed)
+            logger.info(f"Scanned {n_rows} rows with {len(feature_columns)} features")
+            return {
+                "feature_columns": feature_columns,
+                "n_rows": n_rows,
+                "means": (sums / counts).tolist(),
+                "missing": (n_rows - counts).tolist()
+            }
+        
+        except Exception as e:
+            logger.error(f"Data scan failed: {str(e)}")
+            raise
+    
+    async def transform_data(
+        self,
+        source: DataSource,
+        target_column: str,
+        statistics: Dict[str, Any],
+        dtype: Any = np.float64
+    ) -> pd.DataFrame:
+        """Second pass: impute and scale into a preallocated feature matrix"""
+        try:
+            self.feature_columns = statistics["feature_columns"]
+            # The means are already known, so fitting on them alone is exact
+            self.imputer.fit(pd.DataFrame([statistics["means"]], columns=self.feature_columns))
+            self.scaler = StandardScaler()
+            
+            X = np.empty((statistics["n_rows"], len(self.feature_columns)), dtype=dtype)
+            targets = []
+            position = 0
+            for chunk in self.iter_chunks(source):
+                chunk = chunk.dropna(subset=[target_column])
+                X_chunk = self.imputer.transform(chunk[self.feature_columns])
+                self.scaler.partial_fit(X_chunk)
+                X[position:position + len(chunk)] = X_chunk
+                targets.append(chunk[target_column].to_numpy())
+                position += len(chunk)
             
-            # Create processed DataFrame
-            processed_df = pd.DataFrame(X_scaled, columns=self.feature_columns)
-            processed_df[target_column] = y.reset_index(drop=True)
+            # Scale in place once the statistics cover every row
+            for start in range(0, len(X), self.chunk_size):
+                block = X[start:start + self.chunk_size]
+                block -= self.scaler.mean_.astype(dtype)
+                block /= self.scaler.scale_.astype(dtype)
+            
+            processed_df = pd.DataFrame(X, columns=self.feature_columns, copy=False)
+            processed_df[target_column] = np.concatenate(targets)
             
             logger.info(f"Processed data shape: {processed_df.shape}")
             return processed_df
-            
+        
         except Exception as e:
             logger.error(f"Data preprocessing failed: {str(e)}")
             raise
     
+    async def preprocess_data(self, df: pd.DataFrame, target_column: str) -> pd.DataFrame:
+        """Preprocess the data"""
+        statistics = await self.scan_data(df, target_column)
+        return await self.transform_data(df, target_column, statistics)
+    
+    async def process_data(self, file_path: str, target_column: str) -> pd.DataFrame:
+        """Stream a dataset from disk and preprocess it without loading it whole"""
+        statistics = await self.scan_data(file_path, target_column)
+        return await self.transform_data(file_path, target_column, statistics)
+    
     def get_preprocessing_config(self) -> dict:
-        """Get preprocessing configuration for model metadata"""
+        """Get preprocessing configuration for model metadata
+
+        ``fitted`` holds the imputer and scaler statistics, which serving
+        applies to raw rows (see ``app.ml.preprocessor.DataPreprocessor``).
+        """
         return {
             "imputer_strategy": "mean",
             "scaler_type": "StandardScaler",
-            "feature_columns": self.feature_columns
-        }
\ No newline at end of file
+            "feature_columns": self.feature_columns,
+            "fitted": {
+                "fill_values": self.imputer.statistics_.tolist(),
+                "mean": self.scaler.mean_.tolist(),
+                "scale": self.scaler.scale_.tolist()
+            }
+        }
@@ -0,0 +1,120 @@
+import asyncio
+import io
+import logging
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+import joblib
+import numpy as np
+
+from app.ml.bundle import BUNDLE_SUFFIX, ModelBundle, encode_bundle
+from app.ml.model_loader import ModelLoader
+from app.utils.storage import LocalStorageBackend, ModelStorage
+
+logger = logging.getLogger(__name__)
+
+# Stages of an update, as reported to on_stage
+UPDATE_STAGES = ("load", "update", "package")
+
+DEFAULT_CHUNK_SIZE = 10_000
+
+# Describe the full training run, not the update, so they are not carried over
+_RUN_FIELDS = ("stage_timings", "resources", "compiled_forest", "inference_profile")
+
+def supports_partial_fit(model: Any) -> bool:
+    return callable(getattr(model, "partial_fit", None))
+
+def partial_fit_chunks(model: Any, X: np.ndarray, y: np.ndarray, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Any:
+    """Fold new rows into a fitted model, ``chunk_size`` rows per partial_fit call"""
+    if not supports_partial_fit(model):
+        raise ValueError(
+            f"{type(model).__name__} does not support partial_fit; retrain it with a full training job"
+        )
+    # A fitted classifier must be told its classes; unseen labels then raise
+    kwargs = {"classes": model.classes_} if hasattr(model, "classes_") else {}
+    for start in range(0, len(X), chunk_size):
+        model.partial_fit(X[start:start + chunk_size], y[start:start + chunk_size], **kwargs)
+    return model
+
+def incremental_update(
+    base_model_path: str,
+    base_version: str,
+    base_metadata: Dict[str, Any],
+    feedback_path: str,
+    version: str,
+    output_dir: str,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    on_stage: Optional[Callable[[str, Dict[str, Any]], None]] = None
+) -> str:
+    """Produce ``version`` from ``base_version`` and labelled feedback without refitting.
+
+    ``feedback_path`` is an ``.npz`` of the new rows (``X``, ``y`` and the
+    served ``predictions``) plus the update's ``lineage`` and
+    ``labelled_through`` watermark. The base model is updated with
+    ``partial_fit`` over the new rows only, so the cost is proportional to
+    the feedback, not to the original training set. The model and metadata
+    are published in ``output_dir`` like a pipeline package, as a bundle
+    with the base's preprocessing and reference stats when the base is
+    one; returns the model path.
+    """
+    timings: Dict[str, Dict[str, Any]] = {}
+
+    def finish(stage: str, started: float) -> None:
+        timings[stage] = {"seconds": round(time.perf_counter() - started, 4)}
+        if on_stage is not None:
+            on_stage(stage, timings[stage])
+
+    started = time.perf_counter()
+    bundle = ModelBundle(base_model_path) if base_model_path.endswith(BUNDLE_SUFFIX) else None
+    model = bundle.load_model() if bundle is not None else asyncio.run(ModelLoader().load_model(base_model_path))
+    with np.load(feedback_path, allow_pickle=False) as feedback:
+        X = feedback["X"].astype(base_metadata.get("feature_dtype", "float64"), copy=False)
+        y = feedback["y"]
+        served = feedback["predictions"]
+        lineage = feedback["lineage"].tolist()
+        labelled_through = str(feedback["labelled_through"])
+    finish("load", started)
+
+    started = time.perf_counter()
+    # Prequential: how the base model did on these rows before learning from them
+    live_accuracy = float(np.mean(served == y)) if len(y) else None
+    partial_fit_chunks(model, X, y, chunk_size)
+    finish("update", started)
+
+    started = time.perf_counter()
+    previous = base_metadata.get("incremental", {})
+    metadata = {key: value for key, value in base_metadata.items() if key not in _RUN_FIELDS}
+    metadata.update({
+        "version": version,
+        "created_at": datetime.now().isoformat(),
+        "incremental": {
+            "base_version": base_version,
+            "rows": int(len(y)),
+            "total_rows": previous.get("total_rows", 0) + int(len(y)),
+            "updates": previous.get("updates", 0) + 1,
+            "labelled_through": labelled_through,
+            "lineage": lineage + [version],
+            "live_accuracy": live_accuracy,
+            "stage_timings": timings
+        }
+    })
+
+    if bundle is not None:
+        # The bundle embeds the metadata, so its timings are closed first
+        finish("package", started)
+        file_name = f"model{BUNDLE_SUFFIX}"
+        model_data = encode_bundle(model, metadata, bundle.load_preprocessing(), bundle.reference_stats())
+        bundle.close()
+    else:
+        file_name = "model.joblib"
+        buffer = io.BytesIO()
+        joblib.dump(model, buffer)
+        model_data = buffer.getvalue()
+        finish("package", started)
+    asyncio.run(ModelStorage(LocalStorageBackend(output_dir)).save_model(version, model_data, metadata, file_name))
+    model_path = Path(output_dir) / version / file_name
+
+    logger.info(f"Model {version} updated from {base_version} with {len(y)} rows")
+    return str(model_path)
@@ -1,43 +1,220 @@
 from sklearn.metrics import classification_report, confusion_matrix, roc_auc_score
+from joblib import Parallel, delayed, effective_n_jobs
+from typing import Any, Dict, Optional
 import pandas as pd
 import numpy as np
 import logging
 import json
+import time
 
 logger = logging.getLogger(__name__)
 
+# Holdout rows scored per predict_proba call
+DEFAULT_EVAL_CHUNK_SIZE = 50_000
+DEFAULT_N_BOOTSTRAP = 1000
+
+def _roc_auc(y_true: np.ndarray, proba: np.ndarray) -> float:
+    """ROC AUC for binary (positive-class column) or one-vs-rest multiclass scores"""
+    if proba.shape[1] == 2:
+        return roc_auc_score(y_true, proba[:, 1])
+    return roc_auc_score(y_true, proba, multi_class='ovr', labels=np.arange(proba.shape[1]))
+
+# Resample weight cells (resamples x rows) each worker holds at a time;
+# a block is as many resamples as fit, so memory does not grow with the holdout
+BOOTSTRAP_ROW_BUDGET = 1 << 20
+
+def _weighted_roc_auc(weights: np.ndarray, positive: np.ndarray, scores: np.ndarray) -> np.ndarray:
+    """Mann-Whitney ROC AUC of ``scores`` under each row of ``weights``, ties counting half.
+    
+    A bootstrap resample is the same rows repeated, so row ``b`` of
+    ``weights`` holds how often each row was drawn; the AUC of that resample
+    is this weighted statistic. Rows are sorted once for every resample and
+    summed per (score, class) group, so each class costs one gather of the
+    integer counts rather than masked copies of it.
+    """
+    # By score, negatives ahead of positives within a score
+    order = np.lexsort((positive, scores))
+    sorted_scores = scores[order]
+    sorted_positive = positive[order]
+    starts = np.flatnonzero(np.r_[
+        True, (sorted_scores[1:] != sorted_scores[:-1]) | (sorted_positive[1:] != sorted_positive[:-1])
+    ])
+    group_weight = np.add.reduceat(weights[:, order], starts, axis=1)
+    group_positive = sorted_positive[starts]
+    group_scores = sorted_scores[starts]
+    
+    # Cumulative negative weight, with a leading zero for "no negatives below"
+    negative_weight = group_weight[:, ~group_positive]
+    negatives_through = np.zeros((len(weights), negative_weight.shape[1] + 1), dtype=negative_weight.dtype)
+    np.cumsum(negative_weight, axis=1, out=negatives_through[:, 1:])
+    positive_weight = group_weight[:, group_positive]
+    negative_scores = group_scores[~group_positive]
+    positive_scores = group_scores[group_positive]
+    below = np.searchsorted(negative_scores, positive_scores, side="left")
+    through = np.searchsorted(negative_scores, positive_scores, side="right")
+    # Negatives below count once, tied ones half: (below + through) / 2
+    twice_wins = (
+        np.einsum("bg,bg->b", positive_weight, negatives_through[:, below])
+        + np.einsum("bg,bg->b", positive_weight, negatives_through[:, through])
+    )
+    pairs = positive_weight.sum(axis=1) * negatives_through[:, -1]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(pairs > 0, twice_wins / (2.0 * pairs), np.nan)
+
+def _bootstrap_batch(
+    y_codes: np.ndarray,
+    y_pred_codes: np.ndarray,
+    proba: np.ndarray,
+    n: int,
+    seed,
+    row_budget: int = BOOTSTRAP_ROW_BUDGET
+) -> np.ndarray:
+    """(accuracy, ROC AUC) for ``n`` resamples; AUC is NaN for resamples missing a class"""
+    rng = np.random.default_rng(seed)
+    n_rows, n_classes = proba.shape
+    correct = (y_codes == y_pred_codes).astype(np.int64)
+    # Binary AUC scores the positive class; multiclass is the one-vs-rest macro mean
+    classes = [1] if n_classes == 2 else range(n_classes)
+    block_size = max(1, row_budget // n_rows)
+    results = np.empty((n, 2))
+    for start in range(0, n, block_size):
+        size = min(block_size, n - start)
+        # Integer draw counts; nothing below widens them to a float matrix
+        weights = rng.multinomial(n_rows, np.full(n_rows, 1.0 / n_rows), size=size)
+        results[start:start + size, 0] = weights @ correct / n_rows
+        auc_sum = np.zeros(size)
+        for k in classes:
+            # Any NaN class (absent from the resample) makes the resample's AUC NaN
+            auc_sum += _weighted_roc_auc(weights, y_codes == k, proba[:, k])
+        results[start:start + size, 1] = auc_sum / len(classes)
+    return results
+
 class ModelEvaluator:
-    def __init__(self):
+    """Scores a classifier on a holdout set.
+    
+    Labels are derived from a single ``predict_proba`` pass, run over
+    ``chunk_size`` rows at a time into one preallocated matrix. Bootstrap
+    confidence intervals for accuracy and ROC AUC are computed from those
+    probabilities, split across ``n_jobs`` workers, so no resample runs the
+    model again.
+    """
+    
+    def __init__(
+        self,
+        chunk_size: int = DEFAULT_EVAL_CHUNK_SIZE,
+        n_bootstrap: int = DEFAULT_N_BOOTSTRAP,
+        confidence: float = 0.95,
+        n_jobs: int = -1,
+        random_state: int = 42
+    ):
         self.metrics = {}
+        self.chunk_size = chunk_size
+        self.n_bootstrap = n_bootstrap
+        self.confidence = confidence
+        self.n_jobs = n_jobs
+        self.random_state = random_state
+    
+    def predict_proba_chunked(self, model, X) -> np.ndarray:
+        """Class probabilities for every row, computed chunk by chunk"""
+        proba = None
+        for start in range(0, len(X), self.chunk_size):
+            chunk = X.iloc[start:start + self.chunk_size] if isinstance(X, pd.DataFrame) else X[start:start + self.chunk_size]
+            chunk_proba = model.predict_proba(chunk)
+            if proba is None:
+                proba = np.empty((len(X), chunk_proba.shape[1]), dtype=chunk_proba.dtype)
+            proba[start:start + len(chunk_proba)] = chunk_proba
+        if proba is None:
+            raise ValueError("Cannot evaluate on an empty test set")
+        return proba
+    
+    def bootstrap_intervals(
+        self,
+        y_codes: np.ndarray,
+        y_pred_codes: np.ndarray,
+        proba: np.ndarray,
+        n_bootstrap: int
+    ) -> Dict[str, Any]:
+        """Percentile intervals for accuracy and ROC AUC, resampled in parallel"""
+        n_workers = max(1, min(effective_n_jobs(self.n_jobs), n_bootstrap))
+        sizes = [len(batch) for batch in np.array_split(np.arange(n_bootstrap), n_workers)]
+        # Independent streams per worker keep results reproducible for any n_jobs split
+        seeds = np.random.SeedSequence(self.random_state).spawn(n_workers)
+        batches = Parallel(n_jobs=n_workers)(
+            delayed(_bootstrap_batch)(y_codes, y_pred_codes, proba, size, seed)
+            for size, seed in zip(sizes, seeds)
+        )
+        samples = np.concatenate(batches)
+        
+        tail = (1 - self.confidence) / 2 * 100
+        intervals = {}
+        for column, name in enumerate(["accuracy", "roc_auc"]):
+            values = samples[:, column]
+            values = values[~np.isnan(values)]
+            if not len(values):
+                intervals[name] = None
+                continue
+            lower, upper = np.percentile(values, [tail, 100 - tail])
+            intervals[name] = {"lower": float(lower), "upper": float(upper), "resamples": int(len(values))}
+        return {"confidence": self.confidence, "n_bootstrap": n_bootstrap, **intervals}
     
-    async def evaluate_model(self, model, X_test: pd.DataFrame, y_test: pd.Series) -> dict:
-        """Evaluate model performance"""
+    async def evaluate_model(
+        self,
+        model,
+        X_test: pd.DataFrame,
+        y_test: pd.Series,
+        n_bootstrap: Optional[int] = None
+    ) -> dict:
+        """Evaluate model performance; ``n_bootstrap`` overrides the evaluator's resample count"""
         try:
-            # Make predictions
-            y_pred = model.predict(X_test)
-            y_pred_proba = model.predict_proba(X_test)
+            n_bootstrap = self.n_bootstrap if n_bootstrap is None else n_bootstrap
+            start_time = time.perf_counter()
+            
+            # One inference pass; labels are the most probable class
+            y_pred_proba = self.predict_proba_chunked(model, X_test)
+            y_pred_codes = y_pred_proba.argmax(axis=1)
+            y_pred = model.classes_[y_pred_codes]
+            inference_time = time.perf_counter()
             
             # Calculate metrics
-            accuracy = np.mean(y_pred == y_test)
-            roc_auc = roc_auc_score(y_test, y_pred_proba, multi_class='ovr')
+            y_true = np.asarray(y_test)
+            y_codes = np.searchsorted(model.classes_, y_true)
+            accuracy = np.mean(y_pred == y_true)
+            roc_auc = _roc_auc(y_codes, y_pred_proba)
             
             # Classification report
-            clf_report = classification_report(y_test, y_pred, output_dict=True)
+            clf_report = classification_report(y_true, y_pred, output_dict=True)
             
             # Confusion matrix
-            cm = confusion_matrix(y_test, y_pred)
+            cm = confusion_matrix(y_true, y_pred)
+            metrics_time = time.perf_counter()
+            
+            confidence_intervals = None
+            if n_bootstrap:
+                confidence_intervals = self.bootstrap_intervals(y_codes, y_pred_codes, y_pred_proba, n_bootstrap)
+            end_time = time.perf_counter()
             
             self.metrics = {
                 "accuracy": float(accuracy),
                 "roc_auc": float(roc_auc),
+                "confidence_intervals": confidence_intervals,
                 "classification_report": clf_report,
                 "confusion_matrix": cm.tolist(),
-                "class_names": list(map(str, np.unique(y_test)))
+                "class_names": list(map(str, np.unique(y_test))),
+                "timing": {
+                    "inference_seconds": round(inference_time - start_time, 6),
+                    "metrics_seconds": round(metrics_time - inference_time, 6),
+                    "bootstrap_seconds": round(end_time - metrics_time, 6),
+                    "total_seconds": round(end_time - start_time, 6),
+                    "rows": len(y_true)
+                }
             }
             
-            logger.info(f"Model evaluation completed. Accuracy: {accuracy:.4f}, ROC AUC: {roc_auc:.4f}")
+            logger.info(
+                f"Model evaluation completed in {end_time - start_time:.2f}s. "
+                f"Accuracy: {accuracy:.4f}, ROC AUC: {roc_auc:.4f}"
+            )
             return self.metrics
-            
+        
         except Exception as e:
             logger.error(f"Model evaluation failed: {str(e)}")
             raise
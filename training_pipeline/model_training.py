@@ -1,12 +1,25 @@
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split, GridSearchCV
 from sklearn.metrics import accuracy_score, classification_report
+import numpy as np
 import pandas as pd
 import logging
 import joblib
+import time
+from typing import Dict, List, Optional
+
+from training_pipeline.parallel import DEFAULT_BACKEND, parallel_backend
+from training_pipeline.search import successive_halving_search
+from training_pipeline.selection import DEFAULT_PROFILE_BATCH, profile_model, select_candidate
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_PARAM_GRID = {
+    'n_estimators': [50, 100, 200],
+    'max_depth': [None, 10, 20],
+    'min_samples_split': [2, 5, 10]
+}
+
 class ModelTrainer:
     def __init__(self):
         self.best_model = None
@@ -15,45 +28,141 @@ class ModelTrainer:
     async def train_model(self, df: pd.DataFrame, target_column: str) -> dict:
         """Train machine learning model"""
         try:
-            # Split data
-            X = df.drop(columns=[target_column])
-            y = df[target_column]
-            
-            X_train, X_test, y_train, y_test = train_test_split(
-                X, y, test_size=0.2, random_state=42, stratify=y
-            )
-            
-            # Hyperparameter tuning
-            param_grid = {
-                'n_estimators': [50, 100, 200],
-                'max_depth': [None, 10, 20],
-                'min_samples_split': [2, 5, 10]
-            }
-            
-            rf = RandomForestClassifier(random_state=42)
-            grid_search = GridSearchCV(
-                rf, param_grid, cv=5, scoring='accuracy', n_jobs=-1
-            )
-            
-            grid_search.fit(X_train, y_train)
-            
-            self.best_model = grid_search.best_estimator_
-            self.best_params = grid_search.best_params_
+            X_train, X_test, y_train, y_test = self.split_data(df, target_column)
+            result = self.fit_model(X_train, y_train)
             
             # Evaluate model
             y_pred = self.best_model.predict(X_test)
             accuracy = accuracy_score(y_test, y_pred)
             
             logger.info(f"Model training completed. Best accuracy: {accuracy:.4f}")
-            logger.info(f"Best parameters: {self.best_params}")
             
             return {
                 "model": self.best_model,
                 "accuracy": accuracy,
                 "best_params": self.best_params,
-                "feature_importance": dict(zip(X.columns, self.best_model.feature_importances_))
+                "feature_importance": result["feature_importance"]
             }
             
         except Exception as e:
             logger.error(f"Model training failed: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+    
+    def split_data(self, df: pd.DataFrame, target_column: str, test_size: float = 0.2, random_state: int = 42):
+        """Stratified train/test split of a processed frame"""
+        X = df.drop(columns=[target_column])
+        y = df[target_column]
+        
+        return train_test_split(
+            X, y, test_size=test_size, random_state=random_state, stratify=y
+        )
+    
+    def fit_model(
+        self,
+        X_train: pd.DataFrame,
+        y_train: pd.Series,
+        param_grid: Optional[Dict[str, list]] = None,
+        cv: int = 5,
+        random_state: int = 42,
+        search: str = "halving",
+        time_budget: Optional[float] = None,
+        n_jobs: int = -1,
+        backend: str = DEFAULT_BACKEND,
+        feature_names: Optional[List[str]] = None,
+        objective: str = "accuracy",
+        latency_slo_ms: Optional[float] = None,
+        finalists: int = 3,
+        X_profile=None
+    ) -> dict:
+        """Tune a random forest on the training split
+
+        ``search`` is ``halving`` (budgeted successive halving over trees, see
+        training_pipeline.search) or ``grid`` (exhaustive GridSearchCV).
+        ``X_train`` may be a plain or memory-mapped array, in which case
+        ``feature_names`` labels the feature importances. Grid search runs
+        its fits on ``n_jobs`` workers of the joblib ``backend``; halving
+        grows each forest on ``n_jobs`` threads, which share memory anyway.
+
+        The winner is then chosen by ``objective`` (see
+        training_pipeline.selection). For ``accuracy`` only the top-ranked
+        model is profiled; otherwise the ``finalists`` best-ranked parameter
+        sets are refit and each one's size and inference latency on
+        ``X_profile`` (default: the first training rows) decide.
+        """
+        # Hyperparameter tuning
+        param_grid = param_grid or DEFAULT_PARAM_GRID
+        start_time = time.perf_counter()
+        
+        if search == "halving":
+            result = successive_halving_search(
+                X_train, y_train, param_grid, cv=cv, time_budget=time_budget,
+                random_state=random_state, n_jobs=n_jobs
+            )
+            self.best_model = result["model"]
+            self.best_params = result["best_params"]
+            cv_accuracy = result["cv_accuracy"]
+            ranked = result["ranked"]
+            search_report = result["search"]
+        elif search == "grid":
+            rf = RandomForestClassifier(random_state=random_state)
+            grid_search = GridSearchCV(
+                rf, param_grid, cv=cv, scoring='accuracy', n_jobs=n_jobs
+            )
+            
+            with parallel_backend(backend, n_jobs):
+                grid_search.fit(X_train, y_train)
+            
+            self.best_model = grid_search.best_estimator_
+            self.best_params = grid_search.best_params_
+            cv_accuracy = float(grid_search.best_score_)
+            results = grid_search.cv_results_
+            ranked = [
+                {"params": results["params"][i], "cv_accuracy": float(results["mean_test_score"][i])}
+                for i in np.argsort(results["rank_test_score"], kind="stable")
+            ]
+            search_report = {
+                "strategy": "grid",
+                "seconds": round(time.perf_counter() - start_time, 3),
+                "fits": len(grid_search.cv_results_["params"]) * cv + 1
+            }
+        else:
+            raise ValueError(f"Unknown search strategy: {search}")
+        
+        if X_profile is None:
+            X_profile = X_train[:DEFAULT_PROFILE_BATCH]
+        finalist_count = 1 if objective == "accuracy" else max(1, finalists)
+        models = []
+        candidates = []
+        for rank, finalist in enumerate(ranked[:finalist_count]):
+            if rank == 0:
+                model = self.best_model
+            else:
+                model = RandomForestClassifier(random_state=random_state, n_jobs=n_jobs, **finalist["params"])
+                model.fit(X_train, y_train)
+            models.append(model)
+            candidates.append({**finalist, **profile_model(model, X_profile)})
+        
+        selection = select_candidate(candidates, objective, latency_slo_ms)
+        selected = candidates[selection["selected"]]
+        self.best_model = models[selection["selected"]]
+        self.best_params = selected["params"]
+        cv_accuracy = selected["cv_accuracy"]
+        
+        logger.info(
+            f"Best parameters: {self.best_params} "
+            f"({selected['single_row_ms']:.2f}ms per row, {selected['size_bytes'] / 1024 ** 2:.1f}MiB)"
+        )
+        
+        return {
+            "model": self.best_model,
+            "best_params": self.best_params,
+            "cv_accuracy": cv_accuracy,
+            "selection": selection,
+            "inference_profile": {
+                key: selected[key] for key in ("size_bytes", "single_row_ms", "batch_ms", "batch_rows")
+            },
+            "feature_importance": dict(zip(
+                feature_names or list(X_train.columns), self.best_model.feature_importances_
+            )),
+            "search": search_report
+        }
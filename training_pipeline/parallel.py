@@ -0,0 +1,107 @@
+import hashlib
+import logging
+import os
+import resource
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+import numpy as np
+from joblib import parallel_config
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BACKEND = "loky"
+DEFAULT_MEMMAP_DIR = "data/.memmap"
+
+def memmap_array(array: Any, directory: str = DEFAULT_MEMMAP_DIR, dtype: Any = None) -> np.memmap:
+    """Write an array to ``directory`` once and return a read-only memory map of it.
+
+    Files are named by a hash of the contents, so rerunning on the same data
+    maps the existing file. joblib hands memory maps to process workers by
+    filename and offset, so workers share the parent's pages instead of
+    receiving a pickled copy each.
+    """
+    values = np.ascontiguousarray(array, dtype=dtype)
+    digest = hashlib.sha256(values.data).hexdigest()[:16]
+    path = Path(directory) / f"{digest}-{values.dtype.name}-{'x'.join(map(str, values.shape))}.npy"
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "wb") as f:
+            np.save(f, values)
+        os.replace(tmp_path, path)
+    return np.load(path, mmap_mode="r")
+
+@contextmanager
+def parallel_backend(backend: str = DEFAULT_BACKEND, n_jobs: int = -1) -> Iterator[None]:
+    """joblib backend and worker count for parallel calls inside the block.
+
+    Arrays passed to process workers are memory-mapped read-only rather than
+    copied (``mmap_mode='r'``); the threading backend shares memory anyway.
+    Wrap only the outer parallel loop: the setting also overrides the thread
+    preference of estimators such as random forests.
+    """
+    with parallel_config(backend=backend, n_jobs=n_jobs, mmap_mode="r"):
+        yield
+
+def _rss(process) -> int:
+    try:
+        return process.memory_info().rss
+    except Exception:
+        return 0
+
+class PeakMemory:
+    """Samples resident memory of this process and its workers until stopped.
+
+    Worker processes are included because that is where copies of the
+    training matrix would show up. Pages of a shared memory map count once
+    per process that touches them, so the total is an upper bound. Without
+    psutil only this process's own peak (from getrusage) is reported.
+    """
+
+    def __init__(self, interval: float = 0.1):
+        self.interval = interval
+        self.peak_bytes = 0
+        self.peak_workers = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        try:
+            import psutil
+            self._process = psutil.Process()
+        except ImportError:
+            self._process = None
+
+    def sample(self) -> None:
+        if self._process is None:
+            return
+        children = self._process.children(recursive=True)
+        total = _rss(self._process) + sum(_rss(child) for child in children)
+        self.peak_bytes = max(self.peak_bytes, total)
+        self.peak_workers = max(self.peak_workers, len(children))
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def __enter__(self) -> "PeakMemory":
+        self.sample()
+        self._thread = threading.Thread(target=self._run, name="peak-memory", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.sample()
+
+    def report(self) -> Dict[str, Any]:
+        # ru_maxrss is KiB on Linux
+        own_peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        return {
+            "peak_rss_mib": round(max(self.peak_bytes, own_peak) / 1024 ** 2, 1),
+            "process_peak_rss_mib": round(own_peak / 1024 ** 2, 1),
+            "peak_workers": self.peak_workers,
+            "sampled_workers": self._process is not None
+        }
@@ -1,63 +1,294 @@
 import asyncio
+import io
 import logging
+import tempfile
 from datetime import datetime
-from typing import Dict, Any
+from pathlib import Path
+from typing import Callable, Dict, Any, Optional
 
+import joblib
+import numpy as np
+
+from app.ml.forest import FOREST_SUFFIX, compile_forest
+from app.utils.storage import LocalStorageBackend, ModelStorage
 from training_pipeline.data_processing import DataProcessor
-from training_pipeline.model_training import ModelTrainer
-from training_pipeline.model_evaluation import ModelEvaluator
+from training_pipeline.model_training import DEFAULT_PARAM_GRID, ModelTrainer
+from training_pipeline.model_evaluation import DEFAULT_N_BOOTSTRAP, ModelEvaluator
+from training_pipeline.parallel import DEFAULT_BACKEND, DEFAULT_MEMMAP_DIR, PeakMemory, memmap_array
+from training_pipeline.stages import Stage, StageCache, StageGraph, file_sha256
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_DATA_PATH = "data/processed/iris_processed.csv"
+DEFAULT_CACHE_DIR = "data/.stage_cache"
+# Trees split on float32 internally, so a float32 matrix is used without a copy
+DEFAULT_FEATURE_DTYPE = "float32"
+
+# Stages of every run, as built by TrainingPipeline.build_graph
+STAGES = ("load", "preprocess", "split", "train", "profile", "evaluate", "package")
+
 class TrainingPipeline:
-    def __init__(self):
+    """Training as a DAG of cached stages.
+
+    load (a streaming scan of the data file) -> preprocess -> split ->
+    train -> evaluate -> package, with ``profile`` (training reference
+    statistics) running alongside ``train``.
+    Every stage but ``package`` is memoized in ``cache_dir`` under a hash of
+    its parameters and inputs, where the input of ``load`` is the data
+    file's content hash. Changing a hyperparameter therefore re-runs only
+    train, evaluate and package. The feature matrix is built in
+    ``feature_dtype``, which is recorded in the metadata so serving converts
+    requests to the same precision.
+
+    Training reads a read-only memory map of the training matrix (written to
+    ``memmap_dir``), so grid search's ``backend`` workers share its pages
+    rather than each holding a copy. Peak memory of the run, workers included, is written to
+    the metadata.
+    """
+
+    def __init__(
+        self,
+        data_path: str = DEFAULT_DATA_PATH,
+        target_column: str = "target",
+        param_grid: Optional[Dict[str, list]] = None,
+        test_size: float = 0.2,
+        random_state: int = 42,
+        cv: int = 5,
+        search: str = "halving",
+        time_budget: Optional[float] = None,
+        output_dir: str = "models",
+        cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
+        feature_dtype: str = DEFAULT_FEATURE_DTYPE,
+        n_bootstrap: int = DEFAULT_N_BOOTSTRAP,
+        backend: str = DEFAULT_BACKEND,
+        n_jobs: int = -1,
+        memmap_dir: str = DEFAULT_MEMMAP_DIR,
+        compile: bool = False,
+        objective: str = "accuracy",
+        latency_slo_ms: Optional[float] = None,
+        finalists: int = 3
+    ):
         self.data_processor = DataProcessor()
         self.model_trainer = ModelTrainer()
         self.model_evaluator = ModelEvaluator()
-    
-    async def run(self):
-        """Run the complete training pipeline"""
+        self.data_path = data_path
+        self.target_column = target_column
+        self.param_grid = param_grid or DEFAULT_PARAM_GRID
+        self.test_size = test_size
+        self.random_state = random_state
+        self.cv = cv
+        self.search = search
+        self.time_budget = time_budget
+        self.output_dir = output_dir
+        self.feature_dtype = np.dtype(feature_dtype).name
+        self.n_bootstrap = n_bootstrap
+        # Not stage params: they change how training runs, not what it produces
+        self.backend = backend
+        self.n_jobs = n_jobs
+        self.memmap_dir = memmap_dir
+        self.compile = compile
+        self.objective = objective
+        self.latency_slo_ms = latency_slo_ms
+        self.finalists = finalists
+        self.cache = StageCache(cache_dir) if cache_dir else None
+        self.stage_timings: Dict[str, Dict[str, Any]] = {}
+        self.memory: Optional[PeakMemory] = None
+
+    def build_graph(self, version: str) -> StageGraph:
+        """Stages of one run, wired by their inputs"""
+        return StageGraph([
+            Stage("load", self._load, params={
+                "data_path": self.data_path,
+                "data_sha256": file_sha256(self.data_path),
+                "target_column": self.target_column
+            }),
+            Stage("preprocess", self._preprocess, inputs=["load"], params={
+                "data_path": self.data_path,
+                "target_column": self.target_column,
+                "feature_dtype": self.feature_dtype
+            }),
+            Stage("split", self._split, inputs=["preprocess"], params={
+                "target_column": self.target_column,
+                "test_size": self.test_size,
+                "random_state": self.random_state
+            }),
+            Stage("train", self._train, inputs=["split"], params={
+                "param_grid": self.param_grid,
+                "cv": self.cv,
+                "random_state": self.random_state,
+                "search": self.search,
+                "time_budget": self.time_budget,
+                "objective": self.objective,
+                "latency_slo_ms": self.latency_slo_ms,
+                "finalists": self.finalists
+            }),
+            Stage("profile", self._profile, inputs=["split"]),
+            Stage("evaluate", self._evaluate, inputs=["train", "split"], params={
+                "n_bootstrap": self.n_bootstrap
+            }),
+            Stage(
+                "package",
+                self._package,
+                inputs=["preprocess", "train", "evaluate", "profile"],
+                params={"version": version, "output_dir": self.output_dir, "compile": self.compile},
+                cache=False
+            ),
+        ])
+
+    async def run(
+        self,
+        version: Optional[str] = None,
+        on_stage: Optional[Callable[[str, Dict[str, Any]], None]] = None
+    ) -> str:
+        """Run the complete training pipeline; ``on_stage`` is told as each stage finishes"""
         try:
             logger.info("Starting training pipeline")
-            
-            # 1. Data processing
-            logger.info("Step 1: Processing data")
-            processed_data = await self.data_processor.process_data()
-            
-            # 2. Model training
-            logger.info("Step 2: Training model")
-            model, training_metrics = await self.model_trainer.train_model(processed_data)
-            
-            # 3. Model evaluation
-            logger.info("Step 3: Evaluating model")
-            evaluation_metrics = await self.model_evaluator.evaluate_model(model, processed_data)
-            
-            # 4. Save model and metadata
-            logger.info("Step 4: Saving model")
-            version = f"v{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-            await self._save_model(model, training_metrics, evaluation_metrics, version)
-            
+            version = version or f"v{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+
+            self.stage_timings = {}
+            with PeakMemory() as self.memory:
+                await self.build_graph(version).run(self.cache, self.stage_timings, on_stage)
+            logger.info(f"Peak memory: {self.memory.report()['peak_rss_mib']}MiB")
+
             logger.info(f"Training pipeline completed successfully. Model version: {version}")
             return version
-            
+
         except Exception as e:
             logger.error(f"Training pipeline failed: {str(e)}")
             raise
-    
-    async def _save_model(self, model, training_metrics, evaluation_metrics, version):
-        """Save model and metadata"""
-        # This would integrate with your ModelManager
+
+    async def _load(self, data_path: str, data_sha256: str, target_column: str) -> Dict[str, Any]:
+        # Streams the file once for its shape and imputation means; the hash
+        # only keys the cache
+        return await self.data_processor.scan_data(data_path, target_column)
+
+    async def _preprocess(
+        self,
+        statistics: Dict[str, Any],
+        data_path: str,
+        target_column: str,
+        feature_dtype: str
+    ) -> Dict[str, Any]:
+        processed = await self.data_processor.transform_data(
+            data_path, target_column, statistics, dtype=feature_dtype
+        )
+        # Fitted state travels with the data so cached runs can package it;
+        # the config carries its statistics into the metadata for serving
+        return {
+            "data": processed,
+            "imputer": self.data_processor.imputer,
+            "scaler": self.data_processor.scaler,
+            "preprocessing": self.data_processor.get_preprocessing_config()
+        }
+
+    def _split(self, preprocessed: Dict[str, Any], target_column: str, test_size: float, random_state: int) -> Dict[str, Any]:
+        X_train, X_test, y_train, y_test = self.model_trainer.split_data(
+            preprocessed["data"], target_column, test_size, random_state
+        )
+        return {"X_train": X_train, "X_test": X_test, "y_train": y_train, "y_test": y_test}
+
+    def _train(
+        self,
+        split: Dict[str, Any],
+        param_grid: Dict[str, list],
+        cv: int,
+        random_state: int,
+        search: str,
+        time_budget: Optional[float],
+        objective: str,
+        latency_slo_ms: Optional[float],
+        finalists: int
+    ) -> Dict[str, Any]:
+        X_train = memmap_array(split["X_train"], self.memmap_dir)
+        return self.model_trainer.fit_model(
+            X_train, split["y_train"].to_numpy(), param_grid, cv, random_state, search, time_budget,
+            n_jobs=self.n_jobs, backend=self.backend, feature_names=list(split["X_train"].columns),
+            objective=objective, latency_slo_ms=latency_slo_ms, finalists=finalists,
+            # Latency is timed on held-out rows
+            X_profile=split["X_test"].to_numpy()
+        )
+
+    def _profile(self, split: Dict[str, Any]) -> Dict[str, list]:
+        """Training distribution, kept in the metadata for drift checks"""
+        X_values = split["X_train"].to_numpy(dtype=np.float64)
+        return {
+            "mean": X_values.mean(axis=0).tolist(),
+            "std": X_values.std(axis=0).tolist(),
+            "min": X_values.min(axis=0).tolist(),
+            "max": X_values.max(axis=0).tolist()
+        }
+
+    async def _evaluate(self, training: Dict[str, Any], split: Dict[str, Any], n_bootstrap: int) -> Dict[str, Any]:
+        return await self.model_evaluator.evaluate_model(
+            # The model was fit on an unlabelled matrix, as it is served
+            training["model"], split["X_test"].to_numpy(), split["y_test"], n_bootstrap
+        )
+
+    async def _package(
+        self,
+        preprocessed: Dict[str, Any],
+        training: Dict[str, Any],
+        evaluation_metrics: Dict[str, Any],
+        reference_stats: Dict[str, list],
+        version: str,
+        output_dir: str,
+        compile: bool
+    ) -> str:
+        """Save model and metadata, plus the compiled forest if ``compile`` is set"""
         metadata = {
             "version": version,
-            "training_metrics": training_metrics,
+            "model_type": type(training["model"]).__name__,
+            "training_metrics": {
+                "cv_accuracy": training["cv_accuracy"],
+                "best_params": training["best_params"],
+                "search": training["search"],
+                "selection": training["selection"],
+                "feature_importance": {
+                    name: float(value) for name, value in training["feature_importance"].items()
+                }
+            },
             "evaluation_metrics": evaluation_metrics,
+            "inference_profile": training["inference_profile"],
             "created_at": datetime.now().isoformat(),
-            "preprocessing": self.data_processor.get_preprocessing_config()
+            "preprocessing": preprocessed["preprocessing"],
+            "feature_dtype": self.feature_dtype,
+            "reference_stats": reference_stats,
+            # Stages that ran or were loaded for this run; skipped ones are absent
+            "stage_timings": dict(self.stage_timings),
+            # Up to packaging, which is the last stage
+            "resources": {
+                "backend": self.backend,
+                "n_jobs": self.n_jobs,
+                **self._memory_report()
+            }
         }
-        
-        # Save model using your storage system
-        # await model_manager.update_model(version, model, metadata)
-        logger.info(f"Model {version} saved with metadata: {metadata}")
+
+        files = {}
+        if compile:
+            # float32 thresholds give the same splits at half the size
+            forest = compile_forest(training["model"], threshold_dtype=np.float32)
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                forest_path = Path(tmp_dir) / f"model{FOREST_SUFFIX}"
+                forest.save(str(forest_path))
+                files[forest_path.name] = forest_path.read_bytes()
+            metadata["compiled_forest"] = {"trees": forest.n_trees, "nodes": forest.n_nodes, "max_depth": forest.max_depth}
+
+        # Published like any other version, so the manifest lists it and
+        # the server loads the compiled forest ahead of the joblib model
+        buffer = io.BytesIO()
+        joblib.dump(training["model"], buffer)
+        storage = ModelStorage(LocalStorageBackend(output_dir))
+        await storage.save_model(version, buffer.getvalue(), metadata, "model.joblib", sidecars=files)
+
+        model_path = Path(output_dir) / version / "model.joblib"
+        logger.info(f"Model {version} saved to {model_path.parent}")
+        return str(model_path)
+
+    def _memory_report(self) -> Dict[str, Any]:
+        if self.memory is None:
+            return {}
+        self.memory.sample()
+        return self.memory.report()
 
 async def main():
     """Main pipeline execution"""
@@ -71,4 +302,4 @@ async def main():
     return 0
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main())
@@ -0,0 +1,110 @@
+import io
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+import joblib
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+OBJECTIVES = ("accuracy", "latency_slo", "pareto")
+
+# Rows per call when timing batch inference
+DEFAULT_PROFILE_BATCH = 256
+
+def _median_ms(model: Any, batches: List[np.ndarray]) -> float:
+    # Warm up
+    model.predict(batches[0])
+    seconds = []
+    for X in batches:
+        start = time.perf_counter()
+        model.predict(X)
+        seconds.append(time.perf_counter() - start)
+    return float(np.median(seconds)) * 1e3
+
+def profile_model(model: Any, X_sample: Any, repeats: int = 20, batch_size: int = DEFAULT_PROFILE_BATCH) -> Dict[str, Any]:
+    """Serialized size and median single-row / batch predict latency of a fitted model"""
+    buffer = io.BytesIO()
+    joblib.dump(model, buffer)
+
+    # Frames are sliced as frames so models fitted with feature names see them
+    rows = X_sample.iloc if hasattr(X_sample, "iloc") else np.asarray(X_sample)
+    single_rows = [rows[i:i + 1] for i in range(min(repeats, len(X_sample)))]
+    batch = rows[:batch_size]
+
+    return {
+        "size_bytes": len(buffer.getvalue()),
+        "single_row_ms": round(_median_ms(model, single_rows), 4),
+        "batch_ms": round(_median_ms(model, [batch] * repeats), 4),
+        "batch_rows": len(batch)
+    }
+
+def pareto_front(candidates: List[Dict[str, Any]]) -> List[int]:
+    """Indices of candidates no other candidate beats on accuracy, latency and size at once"""
+    front = []
+    for i, candidate in enumerate(candidates):
+        dominated = any(
+            other["cv_accuracy"] >= candidate["cv_accuracy"]
+            and other["single_row_ms"] <= candidate["single_row_ms"]
+            and other["size_bytes"] <= candidate["size_bytes"]
+            and (
+                other["cv_accuracy"] > candidate["cv_accuracy"]
+                or other["single_row_ms"] < candidate["single_row_ms"]
+                or other["size_bytes"] < candidate["size_bytes"]
+            )
+            for j, other in enumerate(candidates) if j != i
+        )
+        if not dominated:
+            front.append(i)
+    return front
+
+def select_candidate(
+    candidates: List[Dict[str, Any]],
+    objective: str = "accuracy",
+    latency_slo_ms: Optional[float] = None,
+    accuracy_tolerance: float = 0.01
+) -> Dict[str, Any]:
+    """Pick a profiled candidate by ``objective``.
+
+    ``accuracy`` takes the best CV accuracy. ``latency_slo`` takes the most
+    accurate candidate whose single-row latency is within ``latency_slo_ms``,
+    or the fastest one if none is. ``pareto`` restricts to the Pareto front
+    of accuracy, latency and size and takes the fastest member within
+    ``accuracy_tolerance`` of the best accuracy. Ties go to the earlier
+    (higher-ranked) candidate. Returns the selection report.
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(f"Unknown selection objective: {objective}")
+    if objective == "latency_slo" and latency_slo_ms is None:
+        raise ValueError("The latency_slo objective needs latency_slo_ms")
+
+    indices = list(range(len(candidates)))
+    front = pareto_front(candidates)
+    slo_met = True
+    if objective == "accuracy":
+        selected = max(indices, key=lambda i: (candidates[i]["cv_accuracy"], -i))
+    elif objective == "latency_slo":
+        within = [i for i in indices if candidates[i]["single_row_ms"] <= latency_slo_ms]
+        slo_met = bool(within)
+        if within:
+            selected = max(within, key=lambda i: (candidates[i]["cv_accuracy"], -i))
+        else:
+            selected = min(indices, key=lambda i: (candidates[i]["single_row_ms"], i))
+            logger.warning(
+                f"No candidate meets the {latency_slo_ms}ms latency SLO; selecting the fastest"
+            )
+    else:
+        best = max(candidates[i]["cv_accuracy"] for i in front)
+        close = [i for i in front if candidates[i]["cv_accuracy"] >= best - accuracy_tolerance]
+        selected = min(close, key=lambda i: (candidates[i]["single_row_ms"], i))
+
+    return {
+        "objective": objective,
+        "latency_slo_ms": latency_slo_ms,
+        "slo_met": slo_met,
+        "accuracy_tolerance": accuracy_tolerance if objective == "pareto" else None,
+        "selected": selected,
+        "pareto_front": front,
+        "candidates": candidates
+    }
@@ -0,0 +1,205 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import joblib
+
+logger = logging.getLogger(__name__)
+
+# Bump to invalidate every cached stage output after an incompatible change
+STAGE_CACHE_VERSION = 1
+
+def file_sha256(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """Content hash of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class Stage:
+    """One step of a training DAG.
+
+    ``func`` is called on a worker thread with the outputs of ``inputs`` (in
+    order) followed by ``params`` as keyword arguments; coroutine functions
+    get an event loop of their own on that thread. Outputs of stages
+    with ``cache`` set are memoized under a hash of the params and the keys
+    of their inputs, so a stage's key changes whenever anything upstream of
+    it does.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable[..., Any],
+        inputs: Iterable[str] = (),
+        params: Optional[Dict[str, Any]] = None,
+        cache: bool = True
+    ):
+        self.name = name
+        self.func = func
+        self.inputs = list(inputs)
+        self.params = params or {}
+        self.cache = cache
+
+    def call(self, *values: Any) -> Any:
+        result = self.func(*values, **self.params)
+        if asyncio.iscoroutine(result):
+            # Off the caller's loop, so CPU-bound async stages still overlap
+            result = asyncio.run(result)
+        return result
+
+    def key(self, input_keys: List[str]) -> str:
+        """Content hash identifying this stage's output"""
+        payload = json.dumps(
+            {
+                "cache_version": STAGE_CACHE_VERSION,
+                "stage": self.name,
+                "params": self.params,
+                "inputs": input_keys
+            },
+            sort_keys=True,
+            default=str
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+class StageCache:
+    """Stage outputs on disk, one joblib file per stage key"""
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+
+    def _path(self, stage: str, key: str) -> Path:
+        return self.directory / stage / f"{key}.joblib"
+
+    def load(self, stage: str, key: str) -> Tuple[bool, Any]:
+        """(hit, value) for a stage key; unreadable entries count as misses"""
+        path = self._path(stage, key)
+        if not path.exists():
+            return False, None
+        try:
+            return True, joblib.load(path)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable cache entry {path}: {str(e)}")
+            return False, None
+
+    def save(self, stage: str, key: str, value: Any) -> None:
+        path = self._path(stage, key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        joblib.dump(value, tmp_path)
+        os.replace(tmp_path, path)
+
+class StageGraph:
+    """A DAG of stages; independent stages run concurrently"""
+
+    def __init__(self, stages: Iterable[Stage] = ()):
+        self.stages: Dict[str, Stage] = {}
+        for stage in stages:
+            self.add(stage)
+
+    def add(self, stage: Stage) -> None:
+        if stage.name in self.stages:
+            raise ValueError(f"Duplicate stage {stage.name}")
+        self.stages[stage.name] = stage
+
+    def order(self) -> List[str]:
+        """Stage names in dependency order; raises ValueError on unknown inputs or cycles"""
+        order: List[str] = []
+        state: Dict[str, str] = {}
+
+        def visit(name: str, path: Tuple[str, ...]) -> None:
+            if name not in self.stages:
+                raise ValueError(f"Stage {path[-1]} depends on unknown stage {name}")
+            if state.get(name) == "done":
+                return
+            if state.get(name) == "visiting":
+                raise ValueError(f"Stage cycle: {' -> '.join(path + (name,))}")
+            state[name] = "visiting"
+            for dependency in self.stages[name].inputs:
+                visit(dependency, path + (name,))
+            state[name] = "done"
+            order.append(name)
+
+        for name in self.stages:
+            visit(name, (name,))
+        return order
+
+    def keys(self) -> Dict[str, str]:
+        """Cache key of every stage, derived from params alone without running anything"""
+        keys: Dict[str, str] = {}
+        for name in self.order():
+            stage = self.stages[name]
+            keys[name] = stage.key([keys[dependency] for dependency in stage.inputs])
+        return keys
+
+    async def run(
+        self,
+        cache: Optional[StageCache] = None,
+        timings: Optional[Dict[str, Dict[str, Any]]] = None,
+        on_stage: Optional[Callable[[str, Dict[str, Any]], None]] = None
+    ) -> Dict[str, Any]:
+        """Produce the outputs of the final stages (those nothing depends on)
+
+        Evaluation is demand-driven: a stage whose output is cached is loaded
+        and its inputs are never touched, so upstream stages are skipped
+        entirely. Inputs a stage does need are produced concurrently.
+        ``timings`` is filled in per stage with the seconds taken and whether
+        it ran, came from the cache or was skipped, and ``on_stage`` is called
+        with each stage's name and timing as it finishes. Returns every output
+        that was produced or loaded.
+        """
+        keys = self.keys()
+        timings = {} if timings is None else timings
+        tasks: Dict[str, asyncio.Task] = {}
+
+        def record(name: str, timing: Dict[str, Any]) -> None:
+            timings[name] = timing
+            if on_stage is not None:
+                on_stage(name, timing)
+
+        def get(name: str) -> asyncio.Task:
+            if name not in tasks:
+                tasks[name] = asyncio.create_task(produce(self.stages[name]))
+            return tasks[name]
+
+        async def produce(stage: Stage) -> Any:
+            key = keys[stage.name]
+            if cache is not None and stage.cache:
+                start_time = time.perf_counter()
+                hit, value = await asyncio.to_thread(cache.load, stage.name, key)
+                if hit:
+                    seconds = time.perf_counter() - start_time
+                    record(stage.name, {"seconds": round(seconds, 6), "status": "cached"})
+                    logger.info(f"Stage {stage.name} loaded from cache in {seconds:.3f}s")
+                    return value
+
+            values = await asyncio.gather(*(get(name) for name in stage.inputs))
+
+            start_time = time.perf_counter()
+            value = await asyncio.to_thread(stage.call, *values)
+            if cache is not None and stage.cache:
+                await asyncio.to_thread(cache.save, stage.name, key, value)
+            seconds = time.perf_counter() - start_time
+            record(stage.name, {"seconds": round(seconds, 6), "status": "ran"})
+            logger.info(f"Stage {stage.name} ran in {seconds:.3f}s")
+            return value
+
+        consumed = {dependency for stage in self.stages.values() for dependency in stage.inputs}
+        final = [name for name in self.stages if name not in consumed]
+        try:
+            await asyncio.gather(*(get(name) for name in final))
+        except Exception:
+            for task in tasks.values():
+                task.cancel()
+            raise
+
+        for name in self.stages:
+            if name not in tasks:
+                record(name, {"seconds": 0.0, "status": "skipped"})
+        return {name: task.result() for name, task in tasks.items()}